@@ -1,2 +1,23 @@
 from .interface import *
-from .manager import *
\ No newline at end of file
+from .manager import *
+from .lru import *
+from .throttle import *
+from .dedup import *
+from .storage import *
+from .session import *
+from .logsink import *
+from .template import *
+from .broadcast import *
+from .http import *
+from .admission import *
+from .scheduler import *
+from .cache import *
+from .keywords import *
+from .accounting import *
+from .interaction import *
+from .debounce import *
+from .batch import *
+from .audio import *
+from .tracing import *
+from .guilds import *
+from .admin import *
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import sys
+import asyncio
+import tracemalloc
+from contextvars import ContextVar
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .interface import HandlerInterface
+from .manager import Colors, logger
+
+
+# 当前正在执行的插件，框架在调用响应器之前设置，响应器中创建的任务会继承这个值
+current_plugin: ContextVar[Optional[str]] = ContextVar("current_plugin", default=None)
+
+
+class ResourceAccountant:
+    """按插件统计资源占用
+
+    开启后会替换事件循环的任务工厂，响应器（及其创建的任务）中创建的 asyncio 任务都会记在对应的插件名下；
+    同时使用 tracemalloc 定期采样，按调用栈中第一个属于插件目录的文件把仍未释放的内存归到对应的插件。
+    某个插件的存活任务数超过 `task_threshold`，或内存比第一次采样时增长超过 `memory_threshold` 字节时输出警告。
+
+    Args:
+        interval (float): 内存采样间隔（秒）
+        frames (int): tracemalloc 记录的调用栈深度，越深归属越准确，开销也越大
+        memory_threshold (int): 内存增长告警阈值（字节）
+        task_threshold (int): 存活任务数告警阈值
+    """
+
+    def __init__(
+            self,
+            interval: float = 60.0,
+            frames: int = 10,
+            memory_threshold: int = 50 * 1024 * 1024,
+            task_threshold: int = 1000
+    ) -> None:
+        self.interval: float = interval
+        self.frames: int = frames
+        self.memory_threshold: int = memory_threshold
+        self.task_threshold: int = task_threshold
+
+        self.paths: Dict[str, Path] = {}
+        self.live_tasks: Counter = Counter()
+        self.created_tasks: Counter = Counter()
+        self.memory: Dict[str, int] = {}
+        self.baseline: Dict[str, int] = {}
+        self.samples: int = 0
+
+        self._alerted: Set[Tuple[str, str]] = set()
+        self._sampler: Optional[asyncio.Task] = None
+        self._previous_factory = None
+
+    def __repr__(self) -> str:
+        return f"ResourceAccountant(plugins={sorted(self.paths)}, interval={self.interval})"
+
+    def register(self, handler: HandlerInterface) -> None:
+        """记录响应器所属插件的路径：定义 `__handler__` 的模块为包时使用包的目录，否则使用模块文件"""
+        parts = type(handler).__module__.split(".")
+        for i in range(len(parts), 0, -1):
+            module = sys.modules.get(".".join(parts[:i]))
+            if getattr(module, "__handler__", None) is not None:
+                break
+        else:
+            module = sys.modules.get(type(handler).__module__)
+        file = getattr(module, "__file__", None)
+        if file is None:
+            return
+        path = Path(file).resolve()
+        self.paths[handler.name] = path.parent if path.name == "__init__.py" else path
+
+    def start(self) -> None:
+        """安装任务工厂并开始定期采样，需要在事件循环中调用"""
+        if self._sampler is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._sampler = loop.create_task(self._sample_forever())
+
+    def close(self) -> None:
+        if self._sampler is None:
+            return
+        self._sampler.cancel()
+        self._sampler = None
+        asyncio.get_running_loop().set_task_factory(self._previous_factory)
+        tracemalloc.stop()
+
+    def sample(self) -> Dict[str, int]:
+        """立即采样一次，返回各插件仍未释放的内存（字节），内存较多时耗时较长，可以在线程中调用"""
+        snapshot = tracemalloc.take_snapshot()
+        prefixes = [(name, str(path) + (os.sep if path.is_dir() else "")) for name, path in self.paths.items()]
+        owners: Dict[str, Optional[str]] = {}
+        memory = {name: 0 for name in self.paths}
+        for stat in snapshot.statistics("traceback"):
+            for frame in stat.traceback:
+                if frame.filename not in owners:
+                    owners[frame.filename] = next(
+                        (name for name, prefix in prefixes if frame.filename.startswith(prefix)), None
+                    )
+                owner = owners[frame.filename]
+                if owner is not None:
+                    memory[owner] += stat.size
+                    break
+        self.memory = memory
+        self.samples += 1
+        for name, size in memory.items():
+            self.baseline.setdefault(name, size)
+            self._check(name, "memory", size - self.baseline[name], self.memory_threshold, "内存增长", _format_bytes)
+        return memory
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回各插件的资源统计"""
+        return {
+            name: {
+                "tasks": self.live_tasks[name],
+                "tasks_created": self.created_tasks[name],
+                "memory": self.memory.get(name),
+                "memory_growth": self.memory[name] - self.baseline[name] if name in self.memory else None,
+            }
+            for name in self.paths
+        }
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        # Python 3.11 起调用方可以通过 context 参数指定任务的上下文，之前的版本总是复制当前上下文
+        plugin = kwargs["context"].get(current_plugin) if "context" in kwargs else current_plugin.get()
+        if plugin is not None:
+            self.live_tasks[plugin] += 1
+            self.created_tasks[plugin] += 1
+            task.add_done_callback(lambda _: self._task_done(plugin))
+            self._check(plugin, "tasks", self.live_tasks[plugin], self.task_threshold, "存活任务数", str)
+        return task
+
+    def _task_done(self, plugin: str) -> None:
+        self.live_tasks[plugin] -= 1
+
+    def _check(self, plugin: str, kind: str, value: int, threshold: int, label: str, fmt) -> None:
+        # 超过阈值时只告警一次，回落到阈值以下后重新计算
+        key = (plugin, kind)
+        if value > threshold and key not in self._alerted:
+            self._alerted.add(key)
+            logger.warning(
+                f"插件 {Colors.yellow}{plugin}{Colors.escape} 的{label} {Colors.red}{fmt(value)}{Colors.escape} 超过了阈值 {fmt(threshold)}",
+                extra={"handler": plugin, kind: value}
+            )
+        elif value <= threshold:
+            self._alerted.discard(key)
+
+    async def _sample_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            await loop.run_in_executor(None, self.sample)
+
+
+def _format_bytes(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
@@ -0,0 +1,285 @@
+import gc
+import io
+import os
+import sys
+import json
+import time
+import shlex
+import socket
+import asyncio
+import logging
+import resource
+import importlib
+from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from .manager import Colors, logger
+
+# 只用于注解，避免与 launcher 循环导入
+if TYPE_CHECKING:
+    from launcher import BotHost
+
+
+# 每个请求/响应占一行
+_LINE_LIMIT = 1024 * 1024
+
+Command = Callable[..., Awaitable[Any]]
+
+
+class AdminConsole:
+    """本机管理控制台，通过 Unix socket 查看和调整运行中的机器人，不需要重启
+
+    每个请求是一行以空格分隔的命令，如 `stats`、`timeout Echo 5`，每个响应是一行 JSON：
+    成功时为 `{"ok": true, "result": ...}`，失败时为 `{"ok": false, "error": ...}`。
+    可以使用 `python launcher.py --admin <命令>` 发送命令，所有命令见 `help`。
+
+    命令在事件循环中执行，查询类命令只读取内存中的统计，不会阻塞事件循环；
+    `gc`、`reload` 需要在事件循环中同步执行，会造成与其耗时相同的停顿，`profile` 的结果在线程池中整理。
+    socket 文件只有当前用户可以读写。
+
+    Args:
+        host (BotHost): 运行机器人的宿主
+        path (Union[str, Path]): socket 文件路径
+        profile_dir (Union[str, Path]): `profile` 命令保存结果的文件夹
+    """
+
+    def __init__(self, host: "BotHost", path: Union[str, Path], profile_dir: Union[str, Path] = "logs") -> None:
+        self.host: BotHost = host
+        self.path: Path = Path(path)
+        self.profile_dir: Path = Path(profile_dir)
+        self.requests: int = 0
+        self.errors: int = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._profiling: bool = False
+        self.commands: Dict[str, Command] = {
+            "help": self.help,
+            "plugins": self.plugins,
+            "chains": self.chains,
+            "stats": self.stats,
+            "loglevel": self.loglevel,
+            "timeout": self.timeout,
+            "gc": self.collect,
+            "profile": self.profile,
+            "reload": self.reload,
+        }
+
+    def __repr__(self) -> str:
+        return f"AdminConsole(path={str(self.path)!r}, serving={self._server is not None})"
+
+    async def start(self) -> None:
+        """开始监听，需要在事件循环中调用"""
+        if self._server is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 上次异常退出时残留的 socket 文件
+        self.path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # 创建时就只允许当前用户读写，不留下其他用户可以连接的时间窗口
+        umask = os.umask(0o177)
+        try:
+            sock.bind(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        self._server = await asyncio.start_unix_server(self._handle, sock=sock, limit=_LINE_LIMIT)
+        logger.info(f"管理控制台已启动: {Colors.light_blue}{self.path}{Colors.escape}")
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self._server = None
+        self.path.unlink(missing_ok=True)
+
+    async def execute(self, line: str) -> Dict[str, Any]:
+        """执行一行命令，返回响应"""
+        self.requests += 1
+        try:
+            args = shlex.split(line)
+            if not args:
+                return {"ok": True, "result": None}
+            command = self.commands.get(args[0])
+            if command is None:
+                raise ValueError(f"未知的命令: {args[0]}，可以使用 help 查看所有命令")
+            return {"ok": True, "result": await command(*args[1:])}
+        except Exception as e:
+            self.errors += 1
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def help(self) -> Dict[str, str]:
+        """help: 列出所有命令"""
+        return {name: command.__doc__.splitlines()[0] for name, command in self.commands.items()}
+
+    async def plugins(self) -> Dict[str, Dict[str, Any]]:
+        """plugins: 列出各机器人加载的插件、响应的事件、初始化状态与超时时间"""
+        result = {}
+        for client in self.host.clients:
+            result[client.name] = {
+                name: {
+                    "priority": handler.priority,
+                    "ready": name in client._plugin_ready and client._plugin_ready[name].is_set(),
+                    "dependencies": list(client.dependencies.get(name, ())),
+                    "events": [api for api, handlers in client.handlers.items() if any(item[1] == name for item in handlers)],
+                    "batch": [api + "_batch" for api, batchers in client.batchers.items() if any(batcher.name == f"{name}.{api}_batch" for batcher in batchers)],
+                    "timeout": client.handler_timeouts.get(name),
+                }
+                for name, handler in client.plugins.items()
+            }
+        return result
+
+    async def chains(self, event: Optional[str] = None, guild_id: Optional[str] = None) -> Dict[str, Dict[str, List[str]]]:
+        """chains [事件名称] [频道id]: 列出各事件按优先级排列的响应器，指定频道时只列出在该频道启用的响应器"""
+        result = {}
+        for client in self.host.clients:
+            apis = [event] if event is not None else client.all_apis
+            result[client.name] = {
+                api: [f"{handler[0]}:{handler[1]}" for handler in client.guild_plugins.chain(api, guild_id)]
+                for api in apis
+                if client.handlers[api]
+            }
+        return result
+
+    async def stats(self) -> Dict[str, Any]:
+        """stats: 各机器人的队列长度、限流、准入、缓存、存储等运行统计"""
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "process": {
+                "tasks": len(asyncio.all_tasks()),
+                "max_rss": usage.ru_maxrss * 1024 if sys.platform != "darwin" else usage.ru_maxrss,
+                "cpu_time": usage.ru_utime + usage.ru_stime,
+                "gc_counts": gc.get_count(),
+            },
+            "admin": {"requests": self.requests, "errors": self.errors},
+            **await self.host.stats(),
+        }
+
+    async def loglevel(self, level: Optional[str] = None) -> str:
+        """loglevel [级别]: 查看或修改日志级别，如 DEBUG、INFO、WARNING"""
+        if level is not None:
+            logger.setLevel(level.upper())
+            logger.info(f"日志级别已修改为 {Colors.light_blue}{level.upper()}{Colors.escape}")
+        return logging.getLevelName(logger.level)
+
+    async def timeout(self, plugin: Optional[str] = None, seconds: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """timeout [插件名称] [秒数|off]: 查看或修改插件响应器处理单个事件的超时时间，超时后交给下一个响应器"""
+        for client in self.host.clients:
+            if plugin is None or seconds is None:
+                continue
+            if seconds == "off":
+                client.handler_timeouts.pop(plugin, None)
+            else:
+                value = float(seconds)
+                if value <= 0:
+                    raise ValueError("超时时间需要大于 0")
+                client.handler_timeouts[plugin] = value
+        return {client.name: dict(client.handler_timeouts) for client in self.host.clients}
+
+    async def collect(self, generation: str = "2") -> Dict[str, Any]:
+        """gc [代数]: 立即执行一次垃圾回收，返回回收的对象数与停顿时间"""
+        start = time.perf_counter()
+        collected = gc.collect(int(generation))
+        return {
+            "collected": collected,
+            "pause": time.perf_counter() - start,
+            "garbage": len(gc.garbage),
+            "counts": gc.get_count(),
+        }
+
+    async def profile(self, seconds: str = "10", limit: str = "30") -> Dict[str, Any]:
+        """profile [秒数] [行数]: 在事件循环线程中采样指定的时间，保存 .prof 文件并返回累计耗时最多的函数"""
+        import cProfile
+
+        if self._profiling:
+            raise RuntimeError("已经有正在进行的采样")
+        self._profiling = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await asyncio.sleep(float(seconds))
+            profiler.disable()
+        finally:
+            self._profiling = False
+        path = self.profile_dir / time.strftime("profile-%Y%m%d-%H%M%S.prof")
+        top = await asyncio.get_running_loop().run_in_executor(None, _dump_profile, profiler, path, int(limit))
+        return {"path": str(path), "top": top}
+
+    async def reload(self, name: str) -> List[str]:
+        """reload <插件名称>: 重新导入插件模块，调用旧响应器的 on_shutdown 后注册新的响应器并执行 on_ready"""
+        clients = [client for client in self.host.clients if name in client.plugins]
+        if not clients:
+            raise ValueError(f"没有找到插件: {name}")
+        module = _plugin_module(clients[0].plugins[name])
+        if module is None:
+            raise ValueError(f"没有找到插件 {name} 所在的模块")
+        # 先重新导入子模块，插件包重新执行时导入的就是新的代码
+        for submodule in sorted((key for key in sys.modules if key.startswith(module.__name__ + ".")), reverse=True):
+            importlib.reload(sys.modules[submodule])
+        module = importlib.reload(module)
+        handler = getattr(module, "__handler__", None)
+        if handler is None:
+            raise ValueError(f'模块 "{module.__name__}" 没有设置 __handler__')
+        for client in clients:
+            await client.reload_plugin(name, handler() if isinstance(handler, type) else handler)
+        logger.info(f'{Colors.green}成功重新加载插件{Colors.escape} "{Colors.light_blue}{name}{Colors.escape}"!')
+        return [client.name for client in clients]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while line := await reader.readline():
+                response = await self.execute(line.decode().strip())
+                writer.write(json.dumps(response, ensure_ascii=False, default=str).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+
+def admin_request(path: Union[str, Path], command: str, timeout: Optional[float] = 60.0) -> Dict[str, Any]:
+    """连接管理控制台并发送一条命令，返回响应
+
+    Args:
+        path (Union[str, Path]): socket 文件路径
+        command (str): 命令，如 `stats`
+        timeout (Optional[float]): 等待响应的最长时间（秒）
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(path))
+        sock.sendall(command.encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def _plugin_module(handler: Any) -> Optional[ModuleType]:
+    """查找 `__handler__` 为该响应器（或它的类）的模块"""
+    for module in list(sys.modules.values()):
+        if getattr(module, "__handler__", None) in (handler, type(handler)):
+            return module
+    return None
+
+
+def _dump_profile(profiler: Any, path: Path, limit: int) -> str:
+    import pstats
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path))
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
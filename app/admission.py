@@ -0,0 +1,256 @@
+import time
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .manager import Colors, logger
+
+
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+CLASS_NAMES = ("interactive", "normal", "background")
+
+ADMIT = "admit"
+DELAY = "delay"
+SHED = "shed"
+
+# 用户在等待回应的事件不会被丢弃，其余事件在过载时按类别依次延迟或丢弃
+EVENT_CLASSES: Dict[str, int] = {
+    "on_ready": INTERACTIVE,
+    "on_resumed": INTERACTIVE,
+    "on_at_message_create": INTERACTIVE,
+    "on_message_create": INTERACTIVE,
+    "on_direct_message_create": INTERACTIVE,
+    "on_interaction_create": INTERACTIVE,
+    # 音频事件数量很少，丢弃或延迟会让 client.audio 中的状态与实际不符
+    "on_audio_start": INTERACTIVE,
+    "on_audio_finish": INTERACTIVE,
+    "on_audio_on_mic": INTERACTIVE,
+    "on_audio_off_mic": INTERACTIVE,
+
+    "on_guild_create": NORMAL,
+    "on_guild_update": NORMAL,
+    "on_guild_delete": NORMAL,
+    "on_channel_create": NORMAL,
+    "on_channel_update": NORMAL,
+    "on_channel_delete": NORMAL,
+    "on_message_audit_pass": NORMAL,
+    "on_message_audit_reject": NORMAL,
+    "on_forum_thread_create": NORMAL,
+    "on_forum_post_create": NORMAL,
+    "on_forum_reply_create": NORMAL,
+    "on_forum_publish_audit_result": NORMAL,
+
+    "on_public_message_delete": BACKGROUND,
+    "on_message_delete": BACKGROUND,
+    "on_direct_message_delete": BACKGROUND,
+    "on_message_reaction_add": BACKGROUND,
+    "on_message_reaction_remove": BACKGROUND,
+    "on_guild_member_add": BACKGROUND,
+    "on_guild_member_update": BACKGROUND,
+    "on_guild_member_remove": BACKGROUND,
+    "on_forum_thread_update": BACKGROUND,
+    "on_forum_thread_delete": BACKGROUND,
+    "on_forum_post_delete": BACKGROUND,
+    "on_forum_reply_delete": BACKGROUND,
+}
+
+
+class LagMonitor:
+    """持续测量事件循环延迟的后台任务
+
+    同一事件循环中的准入控制器共用一个，每次测量完成后唤醒等待中的延迟事件。
+
+    Args:
+        interval (float): 测量的间隔（秒）
+        timer (Callable[[], float]): 计时函数
+    """
+
+    def __init__(self, interval: float = 0.05, timer: Callable[[], float] = time.monotonic) -> None:
+        self.interval: float = interval
+        self.timer: Callable[[], float] = timer
+        self.lag: float = 0.0
+
+        self._task: Optional[asyncio.Task] = None
+        self._measured: asyncio.Event = asyncio.Event()
+
+    def __repr__(self) -> str:
+        return f"LagMonitor(interval={self.interval}, running={self.running})"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """启动后台任务，需要在事件循环中调用"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._measure())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # 唤醒正在等待的事件，之后改为各自计时
+            self._wake()
+
+    async def measured(self) -> None:
+        """等待下一次测量完成，没有运行时等待一个测量间隔"""
+        if self._task is None:
+            await asyncio.sleep(self.interval)
+        else:
+            await self._measured.wait()
+
+    async def _measure(self) -> None:
+        while True:
+            start = self.timer()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self.timer() - start - self.interval)
+            # 延迟上升时立即生效，下降时平滑处理，避免在阈值附近反复切换
+            self.lag = lag if lag > self.lag else self.lag * 0.8 + lag * 0.2
+            self._wake()
+
+    def _wake(self) -> None:
+        measured, self._measured = self._measured, asyncio.Event()
+        measured.set()
+
+
+class AdmissionController:
+    """按事件类别进行准入控制
+
+    `LagMonitor` 持续测量事件循环的延迟，结合待处理事件数计算负载：
+    - 负载未超过阈值时所有事件正常处理
+    - 超过阈值时丢弃 background 类事件，normal 类事件延迟处理，等待负载下降
+    - 超过阈值两倍时 normal 类事件也会被丢弃
+
+    interactive 类事件始终正常处理。延迟的事件最多等待 `max_delay` 秒，超时后丢弃。
+    延迟的事件不会各自轮询，而是一起等待 `LagMonitor` 每次测量完成后统一唤醒并重新判断。
+
+    Args:
+        lag_threshold (float): 事件循环延迟阈值（秒）
+        depth_threshold (int): 待处理事件数阈值
+        max_delay (float): 事件最多延迟的时间（秒）
+        interval (float): 测量事件循环延迟的间隔（秒），指定 `monitor` 时不使用
+        classes (Optional[Mapping[str, int]]): 事件类别，默认为 `EVENT_CLASSES`，未列出的事件视为 normal
+        timer (Callable[[], float]): 计时函数
+        monitor (Optional[LagMonitor]): 共用的延迟测量任务，由创建者启动与关闭；为 None 时自己创建一个
+    """
+
+    def __init__(
+            self,
+            lag_threshold: float = 0.1,
+            depth_threshold: int = 200,
+            max_delay: float = 2.0,
+            interval: float = 0.05,
+            classes: Optional[Mapping[str, int]] = None,
+            timer: Callable[[], float] = time.monotonic,
+            monitor: Optional[LagMonitor] = None
+    ) -> None:
+        self.lag_threshold: float = lag_threshold
+        self.depth_threshold: int = depth_threshold
+        self.max_delay: float = max_delay
+        self.classes: Dict[str, int] = dict(EVENT_CLASSES if classes is None else classes)
+        self.timer: Callable[[], float] = timer
+
+        self.monitor: LagMonitor = LagMonitor(interval, timer) if monitor is None else monitor
+        self.depth: int = 0
+        self.waiting: int = 0
+        self._own_monitor: bool = monitor is None
+        self._level: int = 0
+
+        self.admitted: Counter = Counter()
+        self.delayed: Counter = Counter()
+        self.shed: Counter = Counter()
+
+    def __repr__(self) -> str:
+        return f"AdmissionController(lag_threshold={self.lag_threshold}, depth_threshold={self.depth_threshold})"
+
+    @property
+    def lag(self) -> float:
+        return self.monitor.lag
+
+    def start(self) -> None:
+        """启动自己创建的延迟测量任务，需要在事件循环中调用"""
+        if self._own_monitor:
+            self.monitor.start()
+
+    def close(self) -> None:
+        if self._own_monitor:
+            self.monitor.close()
+
+    def level(self, depth: int) -> int:
+        """返回当前的过载等级，0 为正常，1 为过载，2 为严重过载"""
+        self.depth = depth
+        pressure = max(self.lag / self.lag_threshold, depth / self.depth_threshold)
+        level = 0 if pressure < 1 else 1 if pressure < 2 else 2
+        if level != self._level:
+            if level > self._level:
+                logger.warning(
+                    f"{Colors.red}事件处理过载{Colors.escape} (等级: {level}, 循环延迟: {self.lag * 1000:.1f} ms, 待处理事件: {depth})"
+                )
+            else:
+                logger.info(f"事件处理负载下降 (等级: {level})")
+            self._level = level
+        return level
+
+    def decide(self, event_name: str, depth: int) -> str:
+        """判断事件应该立即处理、延迟还是丢弃
+
+        Args:
+            event_name (str): 事件名称，如 `on_at_message_create`
+            depth (int): 当前待处理的事件数
+
+        Returns:
+            (str): `ADMIT`、`DELAY` 或 `SHED`
+        """
+        event_class = self.classes.get(event_name, NORMAL)
+        decision = self._decide(event_class, self.level(depth))
+        counter = self.admitted if decision is ADMIT else self.delayed if decision is DELAY else self.shed
+        counter[CLASS_NAMES[event_class]] += 1
+        return decision
+
+    async def wait(self, event_name: str, depth: Callable[[], int]) -> bool:
+        """等待负载下降后处理被延迟的事件
+
+        Args:
+            event_name (str): 事件名称
+            depth (Callable[[], int]): 返回当前待处理事件数的函数，不需要计入正在等待的事件
+
+        Returns:
+            (bool): 是否可以处理，超时或负载继续上升时返回 False
+        """
+        event_class = self.classes.get(event_name, NORMAL)
+        deadline = self.timer() + self.max_delay
+        self.waiting += 1
+        try:
+            while self.timer() < deadline:
+                await self.monitor.measured()
+                decision = self._decide(event_class, self.level(depth()))
+                if decision is ADMIT:
+                    return True
+                if decision is SHED:
+                    break
+        finally:
+            self.waiting -= 1
+        self.shed[CLASS_NAMES[event_class]] += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """返回准入控制统计信息，计数按事件类别统计，延迟后又被丢弃的事件同时计入 delayed 与 shed"""
+        return {
+            "lag": self.lag,
+            "depth": self.depth,
+            "level": self._level,
+            "waiting": self.waiting,
+            "admitted": dict(self.admitted),
+            "delayed": dict(self.delayed),
+            "shed": dict(self.shed),
+        }
+
+    @staticmethod
+    def _decide(event_class: int, level: int) -> str:
+        if event_class == INTERACTIVE or level == 0:
+            return ADMIT
+        if event_class == BACKGROUND or level == 2:
+            return SHED
+        return DELAY
@@ -0,0 +1,222 @@
+import time
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .accounting import current_plugin
+
+
+# 由音频事件推导出的状态变化
+PLAYBACK_STARTED = "playback_started"      # 子频道开始播放
+TRACK_CHANGED = "track_changed"            # 播放中切换到了新的音频
+PLAYBACK_FINISHED = "playback_finished"    # 一段音频播放结束
+QUEUE_EMPTY = "queue_empty"                # 播放结束后 queue_grace 秒内没有开始播放新的音频
+MIC_ON = "mic_on"                          # 机器人上麦
+MIC_OFF = "mic_off"                        # 机器人下麦
+MIC_IDLE = "mic_idle"                      # 上麦但 mic_idle_timeout 秒内没有播放
+TRANSITIONS = (PLAYBACK_STARTED, TRACK_CHANGED, PLAYBACK_FINISHED, QUEUE_EMPTY, MIC_ON, MIC_OFF, MIC_IDLE)
+
+AUDIO_EVENTS = ("on_audio_start", "on_audio_finish", "on_audio_on_mic", "on_audio_off_mic")
+
+AudioCallback = Callable[[Any, "AudioSession"], Awaitable[Any]]
+
+
+class AudioSession:
+    """单个子频道的音频状态"""
+
+    __slots__ = (
+        "channel_id", "guild_id", "playing", "on_mic", "audio_url", "text",
+        "started_at", "finished_at", "mic_since", "tracks", "_queue_timer", "_idle_timer"
+    )
+
+    def __init__(self, channel_id: str, guild_id: Optional[str]) -> None:
+        self.channel_id: str = channel_id
+        self.guild_id: Optional[str] = guild_id
+        self.playing: bool = False
+        self.on_mic: bool = False
+        self.audio_url: Optional[str] = None
+        self.text: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.mic_since: Optional[float] = None
+        self.tracks: int = 0
+        self._queue_timer: Optional[asyncio.TimerHandle] = None
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"AudioSession(channel_id={self.channel_id!r}, playing={self.playing}, "
+            f"on_mic={self.on_mic}, audio_url={self.audio_url!r}, tracks={self.tracks})"
+        )
+
+    @property
+    def idle(self) -> bool:
+        """既没有播放也没有上麦"""
+        return not self.playing and not self.on_mic
+
+
+class AudioTracker:
+    """按子频道维护音频播放与上下麦状态
+
+    框架在分发 `on_audio_start`、`on_audio_finish`、`on_audio_on_mic`、`on_audio_off_mic` 之前更新状态，
+    插件可以直接查询某个子频道的状态，不需要自己记录或调用接口查询；也可以订阅由事件推导出的状态变化，
+    如队列播放完毕（`QUEUE_EMPTY`）、上麦后长时间没有播放（`MIC_IDLE`）：
+
+    ```python
+    client.audio.subscribe(QUEUE_EMPTY, self.play_next)
+    session = client.audio.get(channel_id)
+    ```
+    回调的参数为 `async def callback(client, session)`。既没有播放也没有上麦的子频道不会保存记录。
+
+    Args:
+        notify (Callable[[str, AudioSession], None]): 发生状态变化时调用，参数为状态变化名称与子频道状态
+        queue_grace (float): 播放结束后等待多久（秒）没有开始新的音频时视为队列播放完毕
+        mic_idle_timeout (float): 上麦后多久（秒）没有播放时视为空闲
+        timer (Callable[[], float]): 计时函数，用于记录时间
+    """
+
+    def __init__(
+            self,
+            notify: Callable[[str, AudioSession], None],
+            queue_grace: float = 1.0,
+            mic_idle_timeout: float = 300.0,
+            timer: Callable[[], float] = time.time
+    ) -> None:
+        self.notify: Callable[[str, AudioSession], None] = notify
+        self.queue_grace: float = queue_grace
+        self.mic_idle_timeout: float = mic_idle_timeout
+        self.timer: Callable[[], float] = timer
+
+        self.sessions: Dict[str, AudioSession] = {}
+        self.playing: Set[str] = set()
+        self.transitions: Counter = Counter()
+        self._subscribers: Dict[str, List[Tuple[AudioCallback, Optional[str]]]] = {name: [] for name in TRANSITIONS}
+
+    def __repr__(self) -> str:
+        return f"AudioTracker(channels={len(self.sessions)}, playing={len(self.playing)})"
+
+    def get(self, channel_id: str) -> Optional[AudioSession]:
+        """返回子频道的音频状态，没有播放也没有上麦时返回 None"""
+        return self.sessions.get(channel_id)
+
+    def is_playing(self, channel_id: str) -> bool:
+        return channel_id in self.playing
+
+    def is_on_mic(self, channel_id: str) -> bool:
+        session = self.sessions.get(channel_id)
+        return session is not None and session.on_mic
+
+    def subscribe(self, transition: str, callback: AudioCallback, plugin: Optional[str] = None) -> None:
+        """订阅状态变化
+
+        Args:
+            transition (str): 状态变化名称，见 `TRANSITIONS`
+            callback (AudioCallback): 回调函数
+            plugin (Optional[str]): 所属插件名称，默认为当前正在执行的插件
+        """
+        if transition not in self._subscribers:
+            raise ValueError(f"未知的音频状态变化: {transition}")
+        self._subscribers[transition].append((callback, plugin or current_plugin.get()))
+
+    def unsubscribe_plugin(self, plugin: str) -> None:
+        """取消插件订阅的所有状态变化"""
+        for transition, subscribers in self._subscribers.items():
+            self._subscribers[transition] = [item for item in subscribers if item[1] != plugin]
+
+    def subscribers(self, transition: str) -> List[Tuple[AudioCallback, Optional[str]]]:
+        return self._subscribers[transition]
+
+    def update(self, event_name: str, audio: Any) -> List[str]:
+        """根据音频事件更新状态，返回发生的状态变化，需要在事件循环中调用
+
+        Args:
+            event_name (str): 事件名称，见 `AUDIO_EVENTS`
+            audio (Audio): 音频事件对象
+        """
+        channel_id = getattr(audio, "channel_id", None)
+        if event_name not in AUDIO_EVENTS or channel_id is None:
+            return []
+        session = self.sessions.get(channel_id)
+        if session is None:
+            session = self.sessions[channel_id] = AudioSession(channel_id, getattr(audio, "guild_id", None))
+        now = self.timer()
+        transitions = []
+
+        if event_name == "on_audio_start":
+            _cancel(session, "_queue_timer")
+            _cancel(session, "_idle_timer")
+            if session.playing and audio.audio_url != session.audio_url:
+                transitions.append(TRACK_CHANGED)
+            elif not session.playing:
+                transitions.append(PLAYBACK_STARTED)
+            session.playing = True
+            session.audio_url = audio.audio_url
+            session.text = audio.text
+            session.started_at = now
+            session.tracks += 1
+            self.playing.add(channel_id)
+        elif event_name == "on_audio_finish":
+            if session.playing:
+                transitions.append(PLAYBACK_FINISHED)
+                session.playing = False
+                session.finished_at = now
+                self.playing.discard(channel_id)
+                self._arm(session, "_queue_timer", self.queue_grace, QUEUE_EMPTY)
+                self._arm_idle(session)
+        elif event_name == "on_audio_on_mic":
+            if not session.on_mic:
+                transitions.append(MIC_ON)
+                session.on_mic = True
+                session.mic_since = now
+                self._arm_idle(session)
+        elif session.on_mic:
+            transitions.append(MIC_OFF)
+            session.on_mic = False
+            session.mic_since = None
+            _cancel(session, "_idle_timer")
+
+        for transition in transitions:
+            self._emit(transition, session)
+        if session.idle and session._queue_timer is None:
+            del self.sessions[channel_id]
+        return transitions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self.sessions),
+            "playing": len(self.playing),
+            "on_mic": sum(session.on_mic for session in self.sessions.values()),
+            "transitions": dict(self.transitions),
+        }
+
+    def close(self) -> None:
+        """取消所有等待中的状态变化"""
+        for session in self.sessions.values():
+            _cancel(session, "_queue_timer")
+            _cancel(session, "_idle_timer")
+
+    def _arm_idle(self, session: AudioSession) -> None:
+        if session.on_mic and not session.playing:
+            self._arm(session, "_idle_timer", self.mic_idle_timeout, MIC_IDLE)
+
+    def _arm(self, session: AudioSession, slot: str, delay: float, transition: str) -> None:
+        _cancel(session, slot)
+        setattr(session, slot, asyncio.get_running_loop().call_later(delay, self._fire, session, slot, transition))
+
+    def _fire(self, session: AudioSession, slot: str, transition: str) -> None:
+        setattr(session, slot, None)
+        self._emit(transition, session)
+        if session.idle and session._queue_timer is None and self.sessions.get(session.channel_id) is session:
+            del self.sessions[session.channel_id]
+
+    def _emit(self, transition: str, session: AudioSession) -> None:
+        self.transitions[transition] += 1
+        if self._subscribers[transition]:
+            self.notify(transition, session)
+
+
+def _cancel(session: AudioSession, slot: str) -> None:
+    timer = getattr(session, slot)
+    if timer is not None:
+        timer.cancel()
+        setattr(session, slot, None)
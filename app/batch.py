@@ -0,0 +1,107 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .manager import Colors, logger
+
+
+class MicroBatcher:
+    """将逐个到达的事件攒成小批量后再处理
+
+    攒够 `max_size` 个事件，或第一个事件已经等待了 `max_latency` 秒时调用一次 `flush`。
+    同一时间只有一批在处理，处理较慢时新的事件会继续攒在缓冲区中，处理完成后立即开始下一批，
+    因此处理速度跟不上时批量会自动变大（每批仍不超过 `max_size` 个）。
+
+    Args:
+        flush (Callable[[List[Any]], Awaitable[None]]): 处理一批事件的协程函数
+        max_size (int): 每批最多的事件数
+        max_latency (float): 事件最多等待多久（秒）
+        name (str): 名称，用来记录日志
+    """
+
+    def __init__(
+            self,
+            flush: Callable[[List[Any]], Awaitable[None]],
+            max_size: int = 100,
+            max_latency: float = 1.0,
+            name: str = "batch"
+    ) -> None:
+        self.flush: Callable[[List[Any]], Awaitable[None]] = flush
+        self.max_size: int = max_size
+        self.max_latency: float = max_latency
+        self.name: str = name
+
+        self.items: int = 0
+        self.batches: int = 0
+        self.largest: int = 0
+        self.failures: int = 0
+        self.total_time: float = 0.0
+        self.closed: bool = False
+
+        self._buffer: List[Any] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._due: bool = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self) -> str:
+        return f"MicroBatcher(name={self.name!r}, max_size={self.max_size}, max_latency={self.max_latency}, pending={len(self._buffer)})"
+
+    def add(self, item: Any) -> None:
+        """添加一个事件，需要在事件循环中调用"""
+        self._buffer.append(item)
+        self.items += 1
+        if len(self._buffer) >= self.max_size:
+            self._due = True
+        elif self._timer is None and not self._due:
+            self._timer = asyncio.get_running_loop().call_later(self.max_latency, self._expire)
+        self._maybe_flush()
+
+    async def close(self) -> None:
+        """立即处理缓冲区中剩余的事件，并等待所有批次处理完成，之后添加的事件也会立即处理"""
+        self.closed = True
+        self._maybe_flush()
+        while self._task is not None:
+            await asyncio.shield(self._task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "largest": self.largest,
+            "failures": self.failures,
+            "average_size": self.items / self.batches if self.batches else None,
+            "average_time": self.total_time / self.batches if self.batches else None,
+            "pending": len(self._buffer),
+        }
+
+    def _expire(self) -> None:
+        self._timer = None
+        self._due = True
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if not (self._due or self.closed) or self._task is not None or not self._buffer:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._buffer = self._buffer[:self.max_size], self._buffer[self.max_size:]
+        self._due = len(self._buffer) >= self.max_size
+        self._task = asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Any]) -> None:
+        start = time.perf_counter()
+        try:
+            await self.flush(batch)
+        except Exception:
+            self.failures += 1
+            logger.exception(f"{Colors.yellow}{self.name}{Colors.escape} 批量处理 {len(batch)} 个事件{Colors.red}失败！{Colors.escape}")
+        finally:
+            self.batches += 1
+            self.largest = max(self.largest, len(batch))
+            self.total_time += time.perf_counter() - start
+            self._task = None
+            # 处理期间攒下的事件：已经到期的立即处理，否则重新开始计时
+            if self._buffer and not self._due and self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.max_latency, self._expire)
+            self._maybe_flush()
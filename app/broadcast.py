@@ -0,0 +1,225 @@
+import time
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Union
+
+from botpy.api import BotAPI
+from botpy.errors import SequenceNumberError, ServerError
+
+from .http import response_status
+from .storage import Namespace
+from .throttle import TokenBucket
+
+
+ChannelSource = Union[Iterable[str], AsyncIterable[str]]
+
+
+class BroadcastResult(NamedTuple):
+    """单个子频道的发送结果"""
+    index: int
+    channel_id: str
+    ok: bool
+    error: Optional[str]
+
+
+class Broadcaster:
+    """向大量子频道群发消息
+
+    按固定并发数发送，并对每种 API 路由分别使用令牌桶限速，遇到 429 或 5xx 错误时退避重试，
+    其他错误与请求超时直接记为失败（超时的请求可能已经送达，重试可能重复发送）。
+    发送进度以“连续完成的序号 + 之后零散完成的序号”的形式保存到存储中，
+    进程重启后使用相同的 broadcast_id 再次调用，会跳过已经发送过的子频道。
+
+    Args:
+        api (BotAPI): 机器人 api
+        checkpoints (Namespace): 保存发送进度的存储空间
+        concurrency (int): 每次群发的最大并发数
+        rate (float): 每种路由每秒允许的请求数
+        burst (int): 每种路由允许的突发请求数
+        retries (int): 被限速或服务端出错时的最大重试次数
+    """
+
+    def __init__(
+            self,
+            api: BotAPI,
+            checkpoints: Namespace,
+            concurrency: int = 8,
+            rate: float = 5.0,
+            burst: int = 5,
+            retries: int = 3
+    ) -> None:
+        self.api: BotAPI = api
+        self.checkpoints: Namespace = checkpoints
+        self.concurrency: int = concurrency
+        self.rate: float = rate
+        self.burst: int = burst
+        self.retries: int = retries
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._running: Set[str] = set()
+        self._stopping: bool = False
+
+        self.sent: int = 0
+        self.failed: int = 0
+        self.retried: int = 0
+
+    def __repr__(self) -> str:
+        return f"Broadcaster(concurrency={self.concurrency}, rate={self.rate}, running={sorted(self._running)})"
+
+    async def broadcast(
+            self,
+            broadcast_id: str,
+            payload: Dict[str, Any],
+            channel_ids: ChannelSource,
+            route: str = "post_message"
+    ) -> AsyncIterator[BroadcastResult]:
+        """群发消息，按完成顺序逐个返回发送结果
+
+        ```python
+        async for result in client.broadcaster.broadcast("notice-0601", {"content": "公告"}, channel_ids):
+            if not result.ok:
+                logger.error(f"{result.channel_id} 发送失败: {result.error}")
+        ```
+        提前结束迭代时请使用 `contextlib.aclosing` 或调用 `aclose()`，以便立即停止发送。
+
+        Args:
+            broadcast_id (str): 群发任务id，用于断点续发，请保证不同的群发任务使用不同的id
+            payload (Dict[str, Any]): 传给发送接口的参数，不包含 channel_id
+            channel_ids (ChannelSource): 子频道id的可迭代对象或异步迭代器，断点续发时需要保证顺序不变
+            route (str): 使用的 `BotAPI` 方法名
+
+        Returns:
+            (AsyncIterator[BroadcastResult]): 发送结果
+        """
+        if broadcast_id in self._running:
+            raise RuntimeError(f"群发任务 {broadcast_id} 正在进行中！")
+        checkpoint = await self.checkpoints.get(broadcast_id, {"done": 0, "extra": [], "finished": False})
+        if checkpoint["finished"]:
+            return
+        self._running.add(broadcast_id)
+
+        send = getattr(self.api, route)
+        done: int = checkpoint["done"]
+        extra: Set[int] = set(checkpoint["extra"])
+        jobs: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        # 读取子频道id或保存进度时出错，处理完已经派发的任务后在调用方抛出
+        errors: List[BaseException] = []
+
+        async def produce() -> None:
+            try:
+                async for index, channel_id in _enumerate(channel_ids):
+                    if self._stopping:
+                        break
+                    if index < done or index in extra:
+                        continue
+                    await jobs.put((index, channel_id))
+            except Exception as e:
+                errors.append(e)
+            # 出错时也要通知所有发送任务结束；被取消时（调用方已经结束迭代）不再等待队列
+            for _ in range(self.concurrency):
+                await jobs.put(None)
+
+        async def work() -> None:
+            nonlocal done
+            try:
+                while (job := await jobs.get()) is not None:
+                    # 停止后队列中剩余的任务不再发送，只取出直到结束标记
+                    if self._stopping:
+                        continue
+                    index, channel_id = job
+                    error = await self._send(send, route, channel_id, payload)
+                    # 在发送完成时立即记录进度，即使调用方暂时没有读取结果也不会重复发送
+                    extra.add(index)
+                    while done in extra:
+                        extra.remove(done)
+                        done += 1
+                    await self.checkpoints.put(
+                        broadcast_id, {"done": done, "extra": sorted(extra), "finished": False}
+                    )
+                    await results.put(BroadcastResult(index, channel_id, error is None, error))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                await results.put(None)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        finished_workers = 0
+        try:
+            while finished_workers < self.concurrency:
+                result = await results.get()
+                if result is None:
+                    finished_workers += 1
+                    continue
+                yield result
+            if errors:
+                raise errors[0]
+            if not self._stopping:
+                await self.checkpoints.put(broadcast_id, {"done": done, "extra": [], "finished": True})
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._running.discard(broadcast_id)
+
+    async def forget(self, broadcast_id: str) -> None:
+        """删除群发任务的进度，之后可以用相同的id重新群发"""
+        await self.checkpoints.delete(broadcast_id)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """停止派发新的发送任务，等待正在发送的消息完成并保存进度"""
+        self._stopping = True
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回群发统计信息"""
+        return {
+            "running": sorted(self._running),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+    async def _send(self, send, route: str, channel_id: str, payload: Dict[str, Any]) -> Optional[str]:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = TokenBucket(self.rate, self.burst, time.monotonic())
+        for attempt in range(self.retries + 1):
+            while not bucket.consume(time.monotonic()):
+                await asyncio.sleep(bucket.delay(time.monotonic()))
+            response_status.set(None)
+            try:
+                result = await send(channel_id=channel_id, **payload)
+            except (SequenceNumberError, ServerError) as e:
+                status = response_status.get()
+                # 状态码未知时（没有使用 PooledHttp）按服务端错误处理
+                if attempt == self.retries or (status is not None and status != 429 and status < 500):
+                    self.failed += 1
+                    return str(e) if status is None else f"HTTP {status}: {e}"
+                self.retried += 1
+                await asyncio.sleep(2 ** attempt / self.rate)
+            except Exception as e:
+                self.failed += 1
+                return f"{type(e).__name__}: {e}"
+            else:
+                if result is None and response_status.get() == 0:
+                    # botpy 在请求超时或连接断开时只记录日志并返回 None
+                    self.failed += 1
+                    return "请求超时或连接断开"
+                self.sent += 1
+                return None
+
+
+async def _enumerate(source: ChannelSource) -> AsyncIterator:
+    index = 0
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield index, item
+            index += 1
+    else:
+        for item in source:
+            yield index, item
+            index += 1
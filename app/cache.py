@@ -0,0 +1,493 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import fnmatch
+from abc import ABCMeta, abstractmethod
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Set, Union
+
+from .lru import ExpiringLRU
+from .manager import Colors, logger
+
+
+_MISSING = object()
+# 每个请求/响应占一行 JSON，缓存的值可能比较大
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class CacheBackend(metaclass=ABCMeta):
+    """缓存后端接口
+
+    框架缓存（如 `client.cached_api`）与插件数据都通过这个接口读写，键为字符串，
+    值需要能被 JSON 序列化，以便在多个进程之间共享。缓存只是尽力而为：后端出错时读取视为未命中，写入被忽略。
+
+    必须实现 `get`、`set`、`delete`、`clear` 与 `memory`，命中率由基类统计。
+    """
+
+    kind: str = "base"
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+
+    @abstractmethod
+    async def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，不存在或已过期时返回 default"""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存，ttl 为 None 时使用后端的默认存活时间"""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    async def memory(self) -> Dict[str, int]:
+        """返回后端保存的条目数 `size` 与占用的内存字节数 `bytes`（估算值）"""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息，命中率只统计当前进程的读取"""
+        lookups = self.hits + self.misses
+        try:
+            memory = await self.memory()
+        except Exception:
+            memory = {"size": None, "bytes": None}
+        return {
+            "backend": self.kind,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "errors": self.errors,
+            **memory,
+        }
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+class LocalCache(CacheBackend):
+    """进程内缓存，使用定长的 `ExpiringLRU` 保存
+
+    Args:
+        maxsize (int): 最多保存的条目数
+        ttl (float): 默认存活时间（秒）
+    """
+
+    kind = "local"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300) -> None:
+        super().__init__()
+        self._data: ExpiringLRU = ExpiringLRU(maxsize, ttl)
+
+    def __repr__(self) -> str:
+        return f"LocalCache(size={len(self._data)}, maxsize={self._data.maxsize}, ttl={self._data.ttl})"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        self._record(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._data.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    async def memory(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "bytes": sum(_sizeof(key) + _sizeof(value) for key, value in self._data.items()),
+        }
+
+
+class SocketCache(CacheBackend):
+    """通过 Unix socket 在同一台机器的多个进程之间共享的缓存
+
+    第一个启动的进程持有文件锁并在 `path` 上提供缓存服务，数据保存在它的内存中，
+    其他进程连接这个 socket 读写。持有缓存的进程退出后，下一次读写时会由其他进程接替，缓存内容从空开始。
+
+    Args:
+        path (Union[str, Path]): Unix socket 路径
+        maxsize (int): 最多保存的条目数
+        ttl (float): 默认存活时间（秒）
+        timeout (float): 单次请求的超时时间（秒）
+    """
+
+    kind = "socket"
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            maxsize: int = 10000,
+            ttl: float = 300,
+            timeout: float = 1.0
+    ) -> None:
+        super().__init__()
+        self.path: Path = Path(path)
+        self.timeout: float = timeout
+        self.owner: bool = False
+
+        self._local: LocalCache = LocalCache(maxsize, ttl)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._lock_file = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._counter: int = 0
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    def __repr__(self) -> str:
+        return f"SocketCache(path={str(self.path)!r}, owner={self.owner})"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        response = await self._request({"op": "get", "key": key})
+        hit = response is not None and response.get("hit", False)
+        self._record(hit)
+        return response["value"] if hit else default
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self._request({"op": "set", "key": key, "value": value, "ttl": ttl})
+
+    async def delete(self, key: str) -> None:
+        await self._request({"op": "delete", "key": key})
+
+    async def clear(self) -> None:
+        await self._request({"op": "clear"})
+
+    async def memory(self) -> Dict[str, int]:
+        response = await self._request({"op": "memory"})
+        if response is None:
+            return {"size": None, "bytes": None}
+        return response["value"]
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._server is not None:
+            self._server.close()
+            for task in self._connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            self._server = None
+            self.path.unlink(missing_ok=True)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.owner = False
+
+    async def _request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            await self._ensure()
+            if self.owner:
+                return await self._execute(request)
+            self._counter += 1
+            request["id"] = self._counter
+            future = asyncio.get_running_loop().create_future()
+            self._pending[self._counter] = future
+            try:
+                self._writer.write(json.dumps(request, ensure_ascii=False).encode() + b"\n")
+                await self._writer.drain()
+                return await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._pending.pop(request["id"], None)
+        except (OSError, ConnectionError, asyncio.TimeoutError, TypeError, ValueError) as e:
+            self.errors += 1
+            logger.debug(f"共享缓存请求失败: {e!r}")
+            return None
+
+    async def _ensure(self) -> None:
+        if self.owner or self._writer is not None:
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.owner or self._writer is not None:
+                return
+            if self._acquire():
+                await self._serve()
+                return
+            # 其他进程持有锁，但可能还没有开始监听，稍后重试
+            for _ in range(10):
+                try:
+                    self._reader, self._writer = await asyncio.open_unix_connection(str(self.path), limit=_LINE_LIMIT)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    await asyncio.sleep(0.05)
+            else:
+                raise ConnectionError(f"无法连接到共享缓存 {self.path}")
+            self._receiver = asyncio.get_running_loop().create_task(self._receive(self._reader))
+
+    def _acquire(self) -> bool:
+        import fcntl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _serve(self) -> None:
+        # 持有锁说明之前的服务进程已经退出，可以放心删除残留的 socket 文件
+        self.path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # 创建时就只允许当前用户读写，缓存中可能有接口返回的用户数据
+        umask = os.umask(0o177)
+        try:
+            sock.bind(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        self._server = await asyncio.start_unix_server(self._handle, sock=sock, limit=_LINE_LIMIT)
+        self.owner = True
+        logger.info(f"共享缓存服务已启动: {Colors.light_blue}{self.path}{Colors.escape}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                response = await self._execute(request)
+                response["id"] = request["id"]
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request["op"]
+        if op == "get":
+            value = self._local._data.get(request["key"], _MISSING)
+            return {"hit": value is not _MISSING, "value": None if value is _MISSING else value}
+        if op == "set":
+            # 与通过 socket 写入的行为保持一致，只保存能被 JSON 序列化的值
+            json.dumps(request["value"])
+            await self._local.set(request["key"], request["value"], request["ttl"])
+        elif op == "delete":
+            await self._local.delete(request["key"])
+        elif op == "clear":
+            await self._local.clear()
+        elif op == "memory":
+            return {"value": await self._local.memory()}
+        return {}
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                response = json.loads(line)
+                future = self._pending.get(response.pop("id"))
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            # 服务进程退出或本进程关闭连接，下一次请求时重新连接或接替服务
+            logger.debug("与共享缓存的连接已断开")
+            self._writer = None
+            self._receiver = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("共享缓存连接已断开"))
+
+
+class RedisCache(CacheBackend):
+    """使用 Redis（或兼容 Redis 协议的服务）的缓存，可以在多台机器之间共享
+
+    需要安装 `redis` 包；也可以通过 client 传入任何实现了 `get`、`set`、`delete`、`scan_iter` 与 `info`
+    的异步客户端，例如测试时使用的 `LocalRedis`。
+
+    Args:
+        url (str): Redis 地址
+        ttl (float): 默认存活时间（秒）
+        prefix (str): 键的前缀，用来与其他程序的数据区分
+        client (Any): 已经创建好的异步客户端，设置后忽略 url
+    """
+
+    kind = "redis"
+
+    def __init__(
+            self,
+            url: str = "redis://localhost:6379/0",
+            ttl: float = 300,
+            prefix: str = "botpy:",
+            client: Any = None
+    ) -> None:
+        super().__init__()
+        self.ttl: float = ttl
+        self.prefix: str = prefix
+        self._owns_client: bool = client is None
+        if client is None:
+            try:
+                from redis import asyncio as aioredis
+            except ImportError:
+                raise RuntimeError("使用 Redis 缓存需要先安装 redis: pip install redis") from None
+            client = aioredis.from_url(url)
+        self.client = client
+
+    def __repr__(self) -> str:
+        return f"RedisCache(prefix={self.prefix!r}, ttl={self.ttl})"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = await self.client.get(self.prefix + key)
+            value = _MISSING if raw is None else json.loads(raw)
+        except Exception as e:
+            # redis 的连接错误不继承内置的 ConnectionError，损坏的值同样按未命中处理
+            self.errors += 1
+            logger.debug(f"Redis 缓存读取失败: {e!r}")
+            value = _MISSING
+        self._record(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            await self.client.set(
+                self.prefix + key,
+                json.dumps(value, ensure_ascii=False),
+                px=int(ttl * 1000) if ttl != float("inf") else None,
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis 缓存写入失败: {e!r}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis 缓存删除失败: {e!r}")
+
+    async def clear(self) -> None:
+        try:
+            keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+            if keys:
+                await self.client.delete(*keys)
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis 缓存清空失败: {e!r}")
+
+    async def memory(self) -> Dict[str, int]:
+        info = await self.client.info("memory")
+        size = 0
+        async for _ in self.client.scan_iter(match=self.prefix + "*"):
+            size += 1
+        # used_memory 是整个 Redis 实例占用的内存
+        return {"size": size, "bytes": info["used_memory"]}
+
+    async def close(self) -> None:
+        if self._owns_client:
+            close = getattr(self.client, "aclose", None) or self.client.close
+            await close()
+
+
+class LocalRedis:
+    """在进程内模拟 `RedisCache` 用到的 Redis 命令，用于测试或没有 Redis 服务的开发环境"""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, tuple] = {}
+
+    def __repr__(self) -> str:
+        return f"LocalRedis(size={len(self._data)})"
+
+    async def get(self, name: str) -> Optional[bytes]:
+        item = self._data.get(name)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self._data[name]
+            return None
+        return item[0]
+
+    async def set(self, name: str, value: Union[str, bytes], px: Optional[int] = None, ex: Optional[int] = None) -> bool:
+        ttl = px / 1000 if px is not None else ex
+        value = value.encode() if isinstance(value, str) else value
+        self._data[name] = (value, None if ttl is None else time.monotonic() + ttl)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._data.pop(name, None) is not None for name in names)
+
+    async def scan_iter(self, match: str = "*") -> AsyncIterator[str]:
+        for name in list(self._data):
+            if fnmatch.fnmatchcase(name, match) and await self.get(name) is not None:
+                yield name
+
+    async def info(self, section: str = "memory") -> Dict[str, int]:
+        return {"used_memory": sum(sys.getsizeof(name) + sys.getsizeof(value) for name, (value, _) in self._data.items())}
+
+    async def close(self) -> None:
+        pass
+
+
+def create_cache(
+        backend: str,
+        maxsize: int = 10000,
+        ttl: float = 300,
+        socket_path: Union[str, Path] = "cache.sock",
+        redis_url: str = "redis://localhost:6379/0"
+) -> CacheBackend:
+    """按名称创建缓存后端
+
+    Args:
+        backend (str): `local`、`socket`、`redis`，或使用进程内模拟 Redis 的 `redis-local`
+        maxsize (int): 最多保存的条目数（local/socket）
+        ttl (float): 默认存活时间（秒）
+        socket_path (Union[str, Path]): socket 后端的 Unix socket 路径
+        redis_url (str): redis 后端的地址
+    """
+    if backend == "local":
+        return LocalCache(maxsize, ttl)
+    if backend == "socket":
+        return SocketCache(socket_path, maxsize, ttl)
+    if backend == "redis":
+        return RedisCache(redis_url, ttl)
+    if backend == "redis-local":
+        return RedisCache(ttl=ttl, client=LocalRedis())
+    raise ValueError(f"未知的缓存后端: {backend}")
+
+
+def _sizeof(value: Any) -> int:
+    """估算对象占用的内存，只展开 dict/list/tuple"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    return size
@@ -0,0 +1,172 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+def _get(obj: Any, *path: str) -> Any:
+    """依次读取属性或字典键，论坛帖子与评论事件是字典，其余事件是对象"""
+    for name in path:
+        if obj is None:
+            return None
+        obj = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return obj
+
+
+# 合并后的事件名称 -> {原事件名称: 计算实体id的函数}，同一个实体的事件会合并成一批
+DEBOUNCE_GROUPS: Dict[str, Dict[str, Callable[[Any], Optional[Hashable]]]] = {
+    "on_forum_debounced": {
+        "on_forum_thread_create": lambda thread: _get(thread, "thread_info", "thread_id"),
+        "on_forum_thread_update": lambda thread: _get(thread, "thread_info", "thread_id"),
+        "on_forum_thread_delete": lambda thread: _get(thread, "thread_info", "thread_id"),
+        "on_forum_post_create": lambda post: _get(post, "post_info", "thread_id"),
+        "on_forum_post_delete": lambda post: _get(post, "post_info", "thread_id"),
+        "on_forum_reply_create": lambda reply: _get(reply, "reply_info", "thread_id"),
+        "on_forum_reply_delete": lambda reply: _get(reply, "reply_info", "thread_id"),
+    },
+    "on_guild_update_debounced": {
+        "on_guild_update": lambda guild: _get(guild, "id"),
+    },
+    "on_channel_update_debounced": {
+        "on_channel_update": lambda channel: _get(channel, "id"),
+    },
+    "on_guild_member_update_debounced": {
+        "on_guild_member_update": lambda member: (_get(member, "guild_id"), _get(member, "user", "id")),
+    },
+}
+
+
+class EventBatch:
+    """同一个实体在一段时间内收到的事件
+
+    Attributes:
+        key (Hashable): 实体id，如论坛主题id、子频道id
+        events (List[Tuple[str, Any]]): 按收到顺序排列的 (事件名称, 事件对象)
+    """
+
+    __slots__ = ("key", "events", "first_at", "last_at")
+
+    def __init__(self, key: Hashable, now: float) -> None:
+        self.key: Hashable = key
+        self.events: List[Tuple[str, Any]] = []
+        self.first_at: float = now
+        self.last_at: float = now
+
+    def __repr__(self) -> str:
+        return f"EventBatch(key={self.key!r}, events={[name for name, _ in self.events]})"
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def latest(self) -> Any:
+        """最后收到的事件对象，一般已经包含实体的最新状态"""
+        return self.events[-1][1]
+
+    def of(self, event_name: str) -> List[Any]:
+        """返回某一种事件的所有事件对象"""
+        return [event for name, event in self.events if name == event_name]
+
+
+class Debouncer:
+    """将同一实体的连续更新事件合并后再交给响应器
+
+    实体收到第一个事件后开始计时，`window` 秒内没有新的事件，或者距第一个事件已经 `max_wait` 秒时，
+    把这段时间内收到的所有事件作为一个 `EventBatch` 交给 `flush`。
+    只会合并 `enable` 开启的事件组，原本的逐个事件的响应器不受影响。
+
+    Args:
+        flush (Callable[[str, EventBatch], None]): 批次到期时调用，参数为合并后的事件名称与批次
+        window (float): 实体没有新事件多久后处理（秒）
+        max_wait (float): 实体持续收到事件时最多等待多久（秒）
+        groups (Dict): 事件组，默认为 `DEBOUNCE_GROUPS`
+    """
+
+    def __init__(
+            self,
+            flush: Callable[[str, EventBatch], None],
+            window: float = 2.0,
+            max_wait: float = 10.0,
+            groups: Dict[str, Dict[str, Callable[[Any], Optional[Hashable]]]] = None
+    ) -> None:
+        self.flush: Callable[[str, EventBatch], None] = flush
+        self.window: float = window
+        self.max_wait: float = max_wait
+        self.groups = DEBOUNCE_GROUPS if groups is None else groups
+
+        self.events: int = 0
+        self.batches: int = 0
+        self.closed: bool = False
+
+        self._routes: Dict[str, Tuple[str, Callable[[Any], Optional[Hashable]]]] = {}
+        self._pending: Dict[Tuple[str, Hashable], EventBatch] = {}
+
+    def __repr__(self) -> str:
+        return f"Debouncer(groups={sorted({group for group, _ in self._routes.values()})}, pending={len(self._pending)})"
+
+    def enable(self, groups: Iterable[str]) -> None:
+        """设置开启的事件组，一般只开启有响应器需要的事件组，不在其中的事件组会被关闭，已经在合并中的批次仍然会按时处理"""
+        self._routes = {
+            event_name: (group, key_fn)
+            for group in groups
+            for event_name, key_fn in self.groups[group].items()
+        }
+
+    def add(self, event_name: str, event: Any) -> bool:
+        """记录一个事件，事件不属于开启的事件组或没有实体id时返回 False"""
+        route = self._routes.get(event_name)
+        if route is None:
+            return False
+        group, key_fn = route
+        key = key_fn(event)
+        if key is None:
+            return False
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.events += 1
+        batch = self._pending.get((group, key))
+        if batch is None:
+            batch = EventBatch(key, now)
+            if not self.closed:
+                self._pending[(group, key)] = batch
+                loop.call_at(now + self.window, self._expire, group, key)
+        batch.events.append((event_name, event))
+        batch.last_at = now
+        if self.closed:
+            # 关闭后不再等待，每个事件单独处理
+            self._emit(group, batch)
+        return True
+
+    def flush_all(self) -> None:
+        """立即处理所有等待中的批次"""
+        for (group, _), batch in list(self._pending.items()):
+            self._emit(group, batch)
+        self._pending.clear()
+
+    def close(self) -> None:
+        """处理所有等待中的批次，之后收到的事件不再合并"""
+        self.closed = True
+        self.flush_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "collapsed": self.events - self.batches - sum(len(batch) for batch in self._pending.values()),
+            "pending": len(self._pending),
+        }
+
+    def _expire(self, group: str, key: Hashable) -> None:
+        batch = self._pending.get((group, key))
+        if batch is None:
+            return
+        # 每个实体只有一个定时器，收到新事件时不重新设置，到期时再检查是否需要继续等待
+        due = min(batch.last_at + self.window, batch.first_at + self.max_wait)
+        loop = asyncio.get_running_loop()
+        if due > loop.time():
+            loop.call_at(due, self._expire, group, key)
+            return
+        del self._pending[(group, key)]
+        self._emit(group, batch)
+
+    def _emit(self, group: str, batch: EventBatch) -> None:
+        self.batches += 1
+        self.flush(group, batch)
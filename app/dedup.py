@@ -0,0 +1,124 @@
+import math
+import hashlib
+from typing import Any, Dict, Optional
+
+from .lru import ExpiringLRU
+
+
+class RotatingBloomFilter:
+    """分代轮换的布隆过滤器
+
+    当前代写满 `capacity` 个元素后整体降为旧代，并换上一个新的空过滤器，
+    查询时同时检查两代，因此内存固定，且至少能记住最近 `capacity` 个元素。
+
+    Args:
+        capacity (int): 每一代容纳的元素数
+        error_rate (float): 每一代的期望误判率
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.bits: int = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes: int = max(1, round(self.bits / capacity * math.log(2)))
+        self._current: bytearray = bytearray((self.bits + 7) // 8)
+        self._previous: bytearray = bytearray((self.bits + 7) // 8)
+        self._count: int = 0
+        self.rotations: int = 0
+
+    def __repr__(self) -> str:
+        return f"RotatingBloomFilter(capacity={self.capacity}, bits={self.bits}, hashes={self.hashes})"
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        return self._test(self._current, positions) or self._test(self._previous, positions)
+
+    def add(self, key: str) -> None:
+        if self._count >= self.capacity:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self._count = 0
+            self.rotations += 1
+        for pos in self._positions(key):
+            self._current[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _test(bits: bytearray, positions) -> bool:
+        for pos in positions:
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class EventDeduplicator:
+    """网关事件幂等保护
+
+    断线重连（resume）后平台可能重新下发已经处理过的事件，这里记录最近见过的事件id，
+    重复的事件在进入响应器链之前就被丢弃。
+    布隆过滤器负责快速判定“一定没见过”，命中后再用精确的 `ExpiringLRU` 确认，避免误判丢弃事件。
+
+    Args:
+        capacity (int): 精确记录的事件id数量，布隆过滤器每一代也使用该容量
+        ttl (float): 事件id的记录时间（秒）
+        error_rate (float): 布隆过滤器的误判率
+    """
+
+    def __init__(self, capacity: int = 100000, ttl: float = 3600, error_rate: float = 0.001) -> None:
+        self._bloom: RotatingBloomFilter = RotatingBloomFilter(capacity, error_rate)
+        self._exact: ExpiringLRU = ExpiringLRU(capacity, ttl)
+
+        self.seen: int = 0
+        self.duplicates: int = 0
+        # 布隆过滤器命中但精确记录中没有的次数，即误判或已超出精确记录范围的事件
+        self.unconfirmed: int = 0
+
+    def __repr__(self) -> str:
+        return f"EventDeduplicator(bloom={self._bloom!r}, exact={self._exact!r})"
+
+    @staticmethod
+    def event_key(func_name: str, event: Any) -> Optional[str]:
+        """根据事件对象的 event_id 生成去重键，没有 event_id 时返回None
+
+        不能退回使用 `id`：频道、子频道、消息等对象的 `id` 是实体本身的id，
+        同一实体之后的每次变更都会被误判为重复事件
+        """
+        event_id = getattr(event, "event_id", None)
+        if event_id is None:
+            return None
+        return f"{func_name}:{event_id}"
+
+    def is_duplicate(self, key: str) -> bool:
+        """判断事件是否已经处理过，没有处理过则记录下来
+
+        Args:
+            key (str): 由 `event_key` 生成的去重键
+
+        Returns:
+            (bool): 重复事件为True
+        """
+        self.seen += 1
+        if key in self._bloom:
+            if key in self._exact:
+                self.duplicates += 1
+                return True
+            self.unconfirmed += 1
+        self._bloom.add(key)
+        self._exact.set(key, True)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """返回去重统计信息"""
+        return {
+            "seen": self.seen,
+            "duplicates": self.duplicates,
+            "unconfirmed": self.unconfirmed,
+            "tracked": len(self._exact),
+            "bloom_rotations": self._bloom.rotations,
+        }
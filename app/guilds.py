@@ -0,0 +1,150 @@
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from .storage import Namespace
+
+
+# 事件对象本身就是频道的事件，频道id为事件的 id，其余事件读取 guild_id
+_GUILD_EVENTS = frozenset(("on_guild_create", "on_guild_update", "on_guild_delete"))
+
+Handler = Tuple[int, str, Any]
+Chains = Dict[str, Tuple[Handler, ...]]
+
+
+def guild_of(func_name: str, event: Any) -> Optional[str]:
+    """返回事件所属的频道id，论坛帖子与评论事件是字典，其余事件是对象
+
+    Args:
+        func_name (str): 事件名称
+        event: 事件对象
+    """
+    key = "id" if func_name in _GUILD_EVENTS else "guild_id"
+    if isinstance(event, dict):
+        return event.get(key)
+    return getattr(event, key, None)
+
+
+class GuildPlugins:
+    """按频道启用或停用插件
+
+    每个频道只记录停用的插件，没有记录的频道启用所有插件，新加入的插件默认在所有频道启用。
+    停用插件相同的频道共用一组预先过滤好的响应器列表，分发事件时按频道id查表即可得到需要调用的响应器，
+    停用的插件不会被调用，响应器中也不需要再判断：
+
+    ```python
+    await client.guild_plugins.disable(guild_id, "Echo")
+    await client.guild_plugins.enable(guild_id, "Echo")
+    ```
+    修改会保存在插件存储中，重启后仍然有效。
+
+    Args:
+        handlers (Dict[str, List[Handler]]): 按事件名称排列的所有响应器，即 `BotClient.handlers`
+        store (Optional[Namespace]): 保存各频道设置的存储空间，为 None 时不保存
+        defaults (Optional[Mapping[str, Iterable[str]]]): 频道id -> 默认停用的插件名称，存储中的设置优先
+    """
+
+    def __init__(
+            self,
+            handlers: Dict[str, List[Handler]],
+            store: Optional[Namespace] = None,
+            defaults: Optional[Mapping[str, Iterable[str]]] = None
+    ) -> None:
+        self.handlers: Dict[str, List[Handler]] = handlers
+        self.store: Optional[Namespace] = store
+
+        self._disabled: Dict[str, FrozenSet[str]] = {}
+        self._guild_chains: Dict[str, Chains] = {}
+        self._chains: Dict[FrozenSet[str], Chains] = {}
+        self._users: Counter = Counter()
+        # 有默认设置的频道，启用所有插件时也需要保存空的设置，否则重启后会恢复为默认设置
+        self._defaults: FrozenSet[str] = frozenset(str(guild_id) for guild_id in (defaults or {}))
+        for guild_id, plugins in (defaults or {}).items():
+            self._assign(str(guild_id), frozenset(plugins))
+
+    def __repr__(self) -> str:
+        return f"GuildPlugins(guilds={len(self._disabled)}, chains={len(self._chains)})"
+
+    def chain(self, func_name: str, guild_id: Optional[str]) -> Iterable[Handler]:
+        """返回频道中需要调用的响应器，按优先级排列
+
+        Args:
+            func_name (str): 事件名称
+            guild_id (Optional[str]): 频道id，为 None 时返回所有响应器
+        """
+        chains = self._guild_chains.get(guild_id)
+        if chains is None:
+            return self.handlers[func_name]
+        return chains[func_name]
+
+    def enabled(self, guild_id: Optional[str], plugin: Optional[str]) -> bool:
+        """插件在频道中是否启用"""
+        disabled = self._disabled.get(guild_id)
+        return disabled is None or plugin not in disabled
+
+    def disabled(self, guild_id: str) -> FrozenSet[str]:
+        """返回频道中停用的插件"""
+        return self._disabled.get(guild_id, frozenset())
+
+    async def disable(self, guild_id: str, *plugins: str) -> None:
+        """在频道中停用插件"""
+        await self.set(guild_id, self.disabled(guild_id).union(plugins))
+
+    async def enable(self, guild_id: str, *plugins: str) -> None:
+        """在频道中重新启用插件"""
+        await self.set(guild_id, self.disabled(guild_id).difference(plugins))
+
+    async def set(self, guild_id: str, disabled: Iterable[str]) -> None:
+        """设置频道中停用的插件，为空时启用所有插件（即使频道有默认停用的插件）
+
+        Args:
+            guild_id (str): 频道id
+            disabled (Iterable[str]): 停用的插件名称
+        """
+        disabled = frozenset(disabled)
+        self._assign(guild_id, disabled)
+        if self.store is not None:
+            if disabled or guild_id in self._defaults:
+                await self.store.put(guild_id, sorted(disabled))
+            else:
+                await self.store.delete(guild_id)
+
+    async def load(self) -> None:
+        """从存储中读取各频道的设置"""
+        if self.store is None:
+            return
+        for guild_id, disabled in await self.store.scan():
+            self._assign(guild_id, frozenset(disabled))
+
+    def rebuild(self) -> None:
+        """响应器有变化（如排序、重新加载插件）后重新生成各组响应器列表"""
+        self._chains.clear()
+        self._guild_chains = {guild_id: self._chains_for(disabled) for guild_id, disabled in self._disabled.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "guilds": len(self._disabled),
+            "chains": len(self._chains),
+            "disabled": dict(Counter(plugin for disabled in self._disabled.values() for plugin in disabled)),
+        }
+
+    def _assign(self, guild_id: str, disabled: FrozenSet[str]) -> None:
+        old = self._disabled.pop(guild_id, None)
+        self._guild_chains.pop(guild_id, None)
+        if old is not None:
+            self._users[old] -= 1
+            if self._users[old] <= 0:
+                del self._users[old]
+                self._chains.pop(old, None)
+        if disabled:
+            self._disabled[guild_id] = disabled
+            self._users[disabled] += 1
+            self._guild_chains[guild_id] = self._chains_for(disabled)
+
+    def _chains_for(self, disabled: FrozenSet[str]) -> Chains:
+        chains = self._chains.get(disabled)
+        if chains is None:
+            chains = self._chains[disabled] = {
+                func_name: tuple(handler for handler in handlers if handler[1] not in disabled)
+                for func_name, handlers in self.handlers.items()
+            }
+        return chains
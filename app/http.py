@@ -0,0 +1,194 @@
+import time
+from contextvars import ContextVar
+from ssl import CERT_NONE, PROTOCOL_TLS_CLIENT, SSLContext
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+from aiohttp import TCPConnector
+from botpy.http import BotHttp
+
+
+# 当前任务中最近一次请求的状态码，请求出错（如超时、连接断开）时为 0，没有经过 `PooledHttp` 时为 None。
+# botpy 对不认识的状态码（包括 4xx）都抛出 ServerError，超时时只记录日志并返回 None，调用方可以据此区分
+response_status: ContextVar[Optional[int]] = ContextVar("response_status", default=None)
+
+
+class ConnectionPool:
+    """可以由多个 `PooledHttp` 共用的连接池，在同一进程中运行多个机器人时共用连接与 DNS 缓存
+
+    Args:
+        limit (int): 连接池的最大连接数
+        limit_per_host (int): 每个主机的最大连接数，为 0 时不限制
+        keepalive_timeout (float): 空闲连接的保持时间（秒）
+        dns_cache_ttl (int): DNS 缓存时间（秒）
+    """
+
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            keepalive_timeout: float = 30,
+            dns_cache_ttl: int = 300
+    ) -> None:
+        self.limit: int = limit
+        self.limit_per_host: int = limit_per_host
+        self.keepalive_timeout: float = keepalive_timeout
+        self.dns_cache_ttl: int = dns_cache_ttl
+        self._connector: Optional[TCPConnector] = None
+
+    def __repr__(self) -> str:
+        return f"ConnectionPool(limit={self.limit}, keepalive_timeout={self.keepalive_timeout})"
+
+    def connector(self) -> TCPConnector:
+        """返回共用的连接器，第一次调用时创建，需要在事件循环中调用"""
+        if self._connector is None or self._connector.closed:
+            self._connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                ssl=_ssl_context(),
+            )
+        return self._connector
+
+    async def close(self) -> None:
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+
+class PooledHttp(BotHttp):
+    """使用可配置连接池的 BotHttp
+
+    botpy 默认的连接器设置了 `force_close=True`，每个请求都会重新建立 TCP/TLS 连接。
+    这里改为保持长连接并缓存 DNS 解析结果，同时通过 aiohttp 的 TraceConfig 统计连接池的使用情况。
+    aiohttp 不支持 HTTP/2，连接复用依赖 HTTP/1.1 keep-alive。
+
+    Args:
+        timeout (int): 请求超时时间（秒）
+        is_sandbox (bool): 是否使用沙盒环境
+        limit (int): 连接池的最大连接数
+        limit_per_host (int): 每个主机的最大连接数，为 0 时不限制
+        keepalive_timeout (float): 空闲连接的保持时间（秒）
+        dns_cache_ttl (int): DNS 缓存时间（秒）
+        pool (Optional[ConnectionPool]): 与其他会话共用的连接池，设置后忽略以上连接池参数，关闭会话时也不会关闭连接池
+        trace_configs (Iterable[aiohttp.TraceConfig]): 额外的 TraceConfig，如 `Tracer.trace_config()`
+    """
+
+    def __init__(
+            self,
+            timeout: int,
+            is_sandbox: bool = False,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            keepalive_timeout: float = 30,
+            dns_cache_ttl: int = 300,
+            pool: Optional[ConnectionPool] = None,
+            trace_configs: Iterable[aiohttp.TraceConfig] = ()
+    ) -> None:
+        super().__init__(timeout=timeout, is_sandbox=is_sandbox)
+        self.shared: bool = pool is not None
+        self.trace_configs: List[aiohttp.TraceConfig] = list(trace_configs)
+        self.pool: ConnectionPool = pool or ConnectionPool(limit, limit_per_host, keepalive_timeout, dns_cache_ttl)
+
+        self.requests: int = 0
+        self.in_flight: int = 0
+        self.peak_in_flight: int = 0
+        self.connections_created: int = 0
+        self.connections_reused: int = 0
+        self.queued: int = 0
+        self.queued_seconds: float = 0.0
+        self.dns_hits: int = 0
+        self.dns_misses: int = 0
+
+    def __repr__(self) -> str:
+        return f"PooledHttp(pool={self.pool!r}, shared={self.shared})"
+
+    async def check_session(self) -> None:
+        # 先创建好自己的会话，父类发现会话可用就不会再创建默认的会话
+        if not self._session or self._session.closed:
+            self._session = self.create_session()
+        await super().check_session()
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """创建带连接池设置与统计的 ClientSession"""
+        return aiohttp.ClientSession(
+            connector=self.pool.connector(),
+            connector_owner=not self.shared,
+            trace_configs=[self.trace_config(), *self.trace_configs],
+        )
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """统计连接池使用情况的 TraceConfig，也可以用在插件自己创建的会话上"""
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_connection_queued_start.append(self._on_queued_start)
+        trace.on_connection_queued_end.append(self._on_queued_end)
+        trace.on_connection_create_end.append(self._on_connection_create)
+        trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace.on_dns_cache_hit.append(self._on_dns_hit)
+        trace.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace
+
+    def stats(self) -> Dict[str, Any]:
+        """返回连接池统计信息
+
+        - `saturation`: 同时进行的请求数峰值与连接池大小之比，接近 1 说明连接池不够用
+        - `reuse_ratio`: 复用已有连接的请求比例
+        """
+        connections = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "saturation": self.peak_in_flight / self.pool.limit if self.pool.limit else 0.0,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": self.connections_reused / connections if connections else 0.0,
+            "queued": self.queued,
+            "queued_seconds": self.queued_seconds,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+        }
+
+    async def _on_request_start(self, session, context, params) -> None:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def _on_request_end(self, session, context, params) -> None:
+        self.in_flight -= 1
+        response_status.set(params.response.status)
+
+    async def _on_request_exception(self, session, context, params) -> None:
+        self.in_flight -= 1
+        response_status.set(0)
+
+    async def _on_queued_start(self, session, context, params) -> None:
+        self.queued += 1
+        context.queued_at = time.perf_counter()
+
+    async def _on_queued_end(self, session, context, params) -> None:
+        self.queued_seconds += time.perf_counter() - getattr(context, "queued_at", time.perf_counter())
+
+    async def _on_connection_create(self, session, context, params) -> None:
+        self.connections_created += 1
+
+    async def _on_connection_reuse(self, session, context, params) -> None:
+        self.connections_reused += 1
+
+    async def _on_dns_hit(self, session, context, params) -> None:
+        self.dns_hits += 1
+
+    async def _on_dns_miss(self, session, context, params) -> None:
+        self.dns_misses += 1
+
+
+def _ssl_context() -> SSLContext:
+    # 与 botpy 默认连接器使用的 SSLContext() 行为一致（不校验证书），但不触发弃用警告
+    context = SSLContext(PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = CERT_NONE
+    return context
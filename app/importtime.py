@@ -0,0 +1,104 @@
+import sys
+import subprocess
+from collections import Counter
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+
+class ImportRecord(NamedTuple):
+    """`-X importtime` 输出中的一行，时间单位为微秒"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """解析 `python -X importtime` 输出到 stderr 的内容
+
+    Args:
+        output (str): 子进程的 stderr 输出
+
+    Returns:
+        (List[ImportRecord]): 按输出顺序排列的导入记录
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            record = ImportRecord(
+                name=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            )
+        except ValueError:
+            # 表头 "self [us] | cumulative | imported package"
+            continue
+        records.append(record)
+    return records
+
+
+def format_import_report(
+        records: Iterable[ImportRecord],
+        plugin_packages: Iterable[str] = (),
+        top: int = 10
+) -> str:
+    """生成按插件和框架模块汇总的导入耗时报告
+
+    Args:
+        records (Iterable[ImportRecord]): 导入记录
+        plugin_packages (Iterable[str]): 存放插件的包名，如 `app.plugins`，其下一级模块视为插件
+        top (int): 每一项最多列出的条数
+    """
+    records = list(records)
+    prefixes = tuple(package + "." for package in plugin_packages)
+    total = sum(record.self_us for record in records)
+
+    lines = [f"启动导入耗时: {total / 1000:.1f} ms, 共 {len(records)} 个模块", "", "插件 (累计耗时):"]
+    plugins = [record for record in records if _is_plugin(record.name, prefixes)]
+    for record in sorted(plugins, key=lambda x: x.cumulative_us, reverse=True):
+        lines.append(f"  {record.cumulative_us / 1000:>8.1f} ms  {record.name}")
+    if not plugins:
+        lines.append("  (没有导入任何插件)")
+
+    packages: Counter = Counter()
+    for record in records:
+        packages[record.name.split(".", 1)[0]] += record.self_us
+    lines += ["", "框架与依赖 (按顶层包汇总自身耗时):"]
+    for name, us in packages.most_common(top):
+        lines.append(f"  {us / 1000:>8.1f} ms  {name}")
+
+    lines += ["", "最慢的模块 (累计耗时):"]
+    for record in sorted(records, key=lambda x: x.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {record.cumulative_us / 1000:>8.1f} ms  {record.name}")
+    return "\n".join(lines)
+
+
+def profile_imports(
+        script: str,
+        plugin_packages: Iterable[str] = (),
+        args: Optional[List[str]] = None
+) -> str:
+    """在 `-X importtime` 模式下运行子进程并生成导入耗时报告
+
+    Args:
+        script (str): 子进程运行的脚本，需要完成启动过程中的所有导入后退出
+        plugin_packages (Iterable[str]): 存放插件的包名
+        args (Optional[List[str]]): 传给脚本的参数
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", script] + (args or []),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return format_import_report(parse_importtime(result.stderr), plugin_packages)
+
+
+def _is_plugin(name: str, prefixes: Tuple[str, ...]) -> bool:
+    for prefix in prefixes:
+        if name.startswith(prefix) and "." not in name[len(prefix):]:
+            return True
+    return False
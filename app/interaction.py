@@ -0,0 +1,202 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from .accounting import current_plugin
+
+
+InteractionCallback = Callable[[Any, Any], Awaitable[Any]]
+
+
+class TimerWheel:
+    """时间轮，用于批量淘汰到期的条目
+
+    每个条目按到期时间放进环形数组的一个槽里，时间前进一格时只检查当前槽，
+    添加、删除都是 O(1)，不需要为每个条目创建定时器，也不需要维护堆。
+    超过一圈的条目会记录剩余圈数，转到时减一。
+
+    Args:
+        tick (float): 每一格代表的时间（秒）
+        slots (int): 槽的数量
+        timer (Callable[[], float]): 计时函数
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512, timer: Callable[[], float] = time.monotonic) -> None:
+        self.tick: float = tick
+        self.timer: Callable[[], float] = timer
+        self._slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._where: Dict[Hashable, int] = {}
+        self._cursor: int = 0
+        self._last: float = timer()
+
+    def __repr__(self) -> str:
+        return f"TimerWheel(tick={self.tick}, slots={len(self._slots)}, entries={len(self._where)})"
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def add(self, key: Hashable, ttl: float) -> None:
+        """添加条目，已经存在时更新到期时间"""
+        self.remove(key)
+        ticks = max(1, int(ttl / self.tick + 0.999999))
+        rounds, offset = divmod(ticks, len(self._slots))
+        if offset == 0:
+            rounds, offset = rounds - 1, len(self._slots)
+        slot = (self._cursor + offset) % len(self._slots)
+        self._slots[slot][key] = rounds
+        self._where[key] = slot
+
+    def remove(self, key: Hashable) -> None:
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self) -> List[Hashable]:
+        """按照经过的时间转动时间轮，返回到期的条目"""
+        now = self.timer()
+        ticks = int((now - self._last) / self.tick)
+        if ticks <= 0:
+            return []
+        self._last += ticks * self.tick
+        expired = []
+        # 长时间没有转动时最多检查一圈：每个槽按它在这段时间里被经过的次数一次性扣减圈数
+        size = len(self._slots)
+        revolutions, remainder = divmod(ticks, size)
+        for offset in range(1, min(ticks, size) + 1):
+            slot = self._slots[(self._cursor + offset) % size]
+            if not slot:
+                continue
+            passes = revolutions + (offset <= remainder)
+            for key, rounds in list(slot.items()):
+                if rounds >= passes:
+                    slot[key] = rounds - passes
+                else:
+                    del slot[key]
+                    del self._where[key]
+                    expired.append(key)
+        self._cursor = (self._cursor + ticks) % size
+        return expired
+
+
+class Route(NamedTuple):
+    """按钮对应的回调"""
+    callback: InteractionCallback
+    plugin: Optional[str]
+
+
+class InteractionRouter:
+    """按钮回调路由
+
+    插件注册按钮id（或id前缀）对应的回调后，`on_interaction_create` 事件会通过哈希查找直接交给对应的回调，
+    不再依次询问每个插件。临时回调（如某条消息上的按钮）在 ttl 秒后由时间轮淘汰，
+    因此即使发出了大量按钮，占用的内存也只与仍在有效期内的按钮数量有关。
+    没有匹配的按钮时，事件仍然按优先级交给各插件的 `on_interaction_create` 处理。
+
+    ```python
+    client.interactions.register("vote.yes", self.on_vote_yes)
+    client.interactions.register_prefix("shop.buy:", self.on_buy)
+    client.interactions.register_ephemeral(f"quiz:{message_id}:A", self.on_answer, ttl=300)
+    ```
+    回调的参数与返回值与响应器相同：`async def callback(client, interaction) -> bool`，
+    返回 True 时拦截事件，否则继续按优先级交给各插件的 `on_interaction_create` 处理。
+
+    Args:
+        tick (float): 临时回调淘汰的时间精度（秒）
+        slots (int): 时间轮的槽数量
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512) -> None:
+        self._exact: Dict[str, Route] = {}
+        self._prefixes: Dict[str, Route] = {}
+        self._prefix_lengths: List[int] = []
+        self._ephemeral: Dict[str, Route] = {}
+        self._wheel: TimerWheel = TimerWheel(tick, slots)
+
+        self.routed: int = 0
+        self.unrouted: int = 0
+        self.expired: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"InteractionRouter(exact={len(self._exact)}, prefixes={len(self._prefixes)}, "
+            f"ephemeral={len(self._ephemeral)})"
+        )
+
+    def register(self, button_id: str, callback: InteractionCallback, plugin: Optional[str] = None) -> None:
+        """注册按钮id对应的回调
+
+        Args:
+            button_id (str): 按钮id
+            callback (InteractionCallback): 回调函数
+            plugin (Optional[str]): 所属插件名称，默认为当前正在执行的插件
+        """
+        self._exact[button_id] = Route(callback, plugin or current_plugin.get())
+
+    def register_prefix(self, prefix: str, callback: InteractionCallback, plugin: Optional[str] = None) -> None:
+        """注册按钮id前缀对应的回调，多个前缀都匹配时使用最长的前缀，参数说明见 `register`"""
+        self._prefixes[prefix] = Route(callback, plugin or current_plugin.get())
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+
+    def register_ephemeral(
+            self,
+            button_id: str,
+            callback: InteractionCallback,
+            ttl: float,
+            plugin: Optional[str] = None
+    ) -> None:
+        """注册在 ttl 秒后失效的回调，参数说明见 `register`"""
+        self._evict()
+        self._ephemeral[button_id] = Route(callback, plugin or current_plugin.get())
+        self._wheel.add(button_id, ttl)
+
+    def unregister(self, button_id: str) -> None:
+        """删除按钮id（或前缀）对应的回调"""
+        self._exact.pop(button_id, None)
+        self._ephemeral.pop(button_id, None)
+        self._wheel.remove(button_id)
+        if self._prefixes.pop(button_id, None) is not None:
+            self._prefix_lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+
+    def unregister_plugin(self, plugin: str) -> int:
+        """删除插件注册的所有回调，返回删除的数量"""
+        removed = 0
+        for routes in (self._exact, self._prefixes, self._ephemeral):
+            for button_id in [button_id for button_id, route in routes.items() if route.plugin == plugin]:
+                del routes[button_id]
+                if routes is self._ephemeral:
+                    self._wheel.remove(button_id)
+                removed += 1
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+        return removed
+
+    def resolve(self, button_id: Optional[str]) -> Optional[Route]:
+        """查找按钮id对应的回调，依次查找临时回调、按钮id与前缀"""
+        self._evict()
+        if button_id is None:
+            return None
+        route = self._ephemeral.get(button_id) or self._exact.get(button_id)
+        if route is None:
+            # 不同长度的前缀一般只有几种，逐个长度截取后查表
+            for length in self._prefix_lengths:
+                route = self._prefixes.get(button_id[:length])
+                if route is not None:
+                    break
+        if route is None:
+            self.unrouted += 1
+        else:
+            self.routed += 1
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exact": len(self._exact),
+            "prefixes": len(self._prefixes),
+            "ephemeral": len(self._ephemeral),
+            "routed": self.routed,
+            "unrouted": self.unrouted,
+            "expired": self.expired,
+        }
+
+    def _evict(self) -> None:
+        for button_id in self._wheel.advance():
+            del self._ephemeral[button_id]
+            self.expired += 1
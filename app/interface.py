@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from typing import Iterable, Optional
 
 
 class HandlerInterface(metaclass=ABCMeta):
@@ -16,12 +17,39 @@ class HandlerInterface(metaclass=ABCMeta):
         # 返回事件响应器名称，用来记录日志
     ```
 
+    可以覆盖的内容：
+    ```python
+    @property
+    def dependencies(self) -> Iterable[str]:
+        # 返回依赖的其他事件响应器名称，它们的 on_ready 完成后才会执行本响应器的 on_ready
+        # 没有依赖关系的响应器会同时初始化，每个响应器在自己的 on_ready 完成前不会收到事件
+
+    @property
+    def batch_size(self) -> Optional[int]:
+        # 批量接口每批最多的事件数，默认为 Config.batch_max_size
+
+    @property
+    def batch_latency(self) -> Optional[float]:
+        # 批量接口中的事件最多等待多久（秒），默认为 Config.batch_max_latency
+    ```
+
+    批量接口：在任意事件接口名称后加上 `_batch`（如 `on_message_create_batch`），框架会把事件攒成小批量后一起交给响应器，
+    适合批量写入数据库、建立索引等场景。批量接口会收到所有（去重后的）事件，不受事件响应器优先级与返回值的影响，
+    与同一事件的逐个事件接口互不影响：
+    ```python
+    async def on_message_create_batch(self, client: botpy.Client, messages: List[Message]) -> None:
+        '''按收到顺序排列的一批消息'''
+    ```
+
     client (botpy.Client): 机器人端对象，用来调用机器人api
     可以使用的接口及其规范约定：
     ```python
     async def on_ready(self, client: botpy.Client) -> None:
         '''机器人准备好时调用'''
 
+    async def on_shutdown(self, client: botpy.Client) -> None:
+        '''机器人退出前调用，此时已不会再收到新的事件，可以在这里保存数据、释放资源'''
+
     #############################################
         client (botpy.Client): 机器人端对象，用来调用机器人api
     # 公域消息事件，需订阅事件 public_guild_messages
@@ -414,6 +442,30 @@ class HandlerInterface(metaclass=ABCMeta):
         Returns:
             (bool): 消息是否继续向之后的事件响应器传递, 是为False, 否为True
         '''
+
+    ####################################################################
+    # 合并事件，同一实体的连续事件会在一段时间后合并成一批，事件组见 app/debounce.py
+    ####################################################################
+
+    async def on_forum_debounced(self, client: botpy.Client, batch: EventBatch) -> bool:
+        '''同一个论坛主题的主题、帖子、评论事件
+
+        Args:
+            client (botpy.Client): 机器人端对象，用来调用机器人api
+            batch (EventBatch): 一批事件，batch.key 为主题id
+
+        Returns:
+            (bool): 消息是否继续向之后的事件响应器传递, 是为False, 否为True
+        '''
+
+    async def on_guild_update_debounced(self, client: botpy.Client, batch: EventBatch) -> bool:
+        '''同一个guild的资料变更事件，batch.key 为guild id，参数说明见 on_forum_debounced'''
+
+    async def on_channel_update_debounced(self, client: botpy.Client, batch: EventBatch) -> bool:
+        '''同一个子频道的更新事件，batch.key 为子频道id，参数说明见 on_forum_debounced'''
+
+    async def on_guild_member_update_debounced(self, client: botpy.Client, batch: EventBatch) -> bool:
+        '''同一个成员的资料变更事件，batch.key 为 (guild id, 用户id)，参数说明见 on_forum_debounced'''
     ```
     """
 
@@ -431,3 +483,18 @@ class HandlerInterface(metaclass=ABCMeta):
     def name(self) -> str:
         """返回事件响应器名称，用来记录日志"""
         pass
+
+    @property
+    def dependencies(self) -> Iterable[str]:
+        """返回依赖的其他事件响应器名称，默认没有依赖"""
+        return ()
+
+    @property
+    def batch_size(self) -> Optional[int]:
+        """返回批量接口每批最多的事件数，默认使用配置中的值"""
+        return None
+
+    @property
+    def batch_latency(self) -> Optional[float]:
+        """返回批量接口中的事件最多等待多久（秒），默认使用配置中的值"""
+        return None
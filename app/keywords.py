@@ -0,0 +1,222 @@
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class KeywordMatcher:
+    """基于 Aho-Corasick 自动机的关键词匹配器
+
+    无论有多少关键词，匹配一条消息只需要扫描一遍文本，适合审核插件检查大量违禁词。
+    增删关键词时只修改字典树，但失配指针不是增量维护的：下一次匹配时会对整个字典树重新计算一遍，
+    耗时与节点总数成正比，因此应当批量修改关键词（如 `update`、`replace`），连续修改多个关键词只会重新计算一次。
+    删除的关键词较多时会重新构建整个字典树以释放节点。
+    忽略大小写时逐个字符转换为小写，转换后长度会变化的字符（如 'İ'）保持不变，以保证匹配位置与原文一致。
+
+    Args:
+        keywords (Iterable[str]): 初始的关键词
+        ignore_case (bool): 是否忽略大小写
+    """
+
+    def __init__(self, keywords: Iterable[str] = (), ignore_case: bool = True) -> None:
+        self.ignore_case: bool = ignore_case
+        self.keywords: Set[str] = set()
+        self.rebuilds: int = 0
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[Optional[str]] = [None]
+        self._output: List[Tuple[str, ...]] = [()]
+        self._dirty: bool = False
+        self._removed: int = 0
+        self.update(keywords)
+
+    def __repr__(self) -> str:
+        return f"KeywordMatcher(keywords={len(self.keywords)}, nodes={len(self._goto)})"
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def __contains__(self, keyword: str) -> bool:
+        return self._normalize(keyword) in self.keywords
+
+    def add(self, keyword: str) -> None:
+        """添加关键词，空字符串会被忽略"""
+        keyword = self._normalize(keyword)
+        if not keyword or keyword in self.keywords:
+            return
+        self.keywords.add(keyword)
+        goto, node = self._goto, 0
+        for char in keyword:
+            child = goto[node].get(char)
+            if child is None:
+                child = goto[node][char] = len(goto)
+                goto.append({})
+                self._fail.append(0)
+                self._terminal.append(None)
+                self._output.append(())
+            node = child
+        self._terminal[node] = keyword
+        self._dirty = True
+
+    def remove(self, keyword: str) -> None:
+        """删除关键词，不存在时忽略"""
+        keyword = self._normalize(keyword)
+        if keyword not in self.keywords:
+            return
+        self.keywords.remove(keyword)
+        node = 0
+        for char in keyword:
+            node = self._goto[node][char]
+        self._terminal[node] = None
+        self._removed += 1
+        self._dirty = True
+
+    def update(self, keywords: Iterable[str]) -> None:
+        """批量添加关键词"""
+        for keyword in keywords:
+            self.add(keyword)
+
+    def replace(self, keywords: Iterable[str]) -> None:
+        """将关键词替换为新的列表，只增删有变化的关键词"""
+        keywords = {self._normalize(keyword) for keyword in keywords} - {""}
+        for keyword in self.keywords - keywords:
+            self.remove(keyword)
+        for keyword in keywords - self.keywords:
+            self.add(keyword)
+
+    def search(self, text: str) -> List[Tuple[int, str]]:
+        """找出文本中出现的所有关键词（包括互相重叠的）
+
+        Returns:
+            (List[Tuple[int, str]]): 按结束位置排列的 (起始位置, 关键词)
+        """
+        return [
+            (end - len(keyword) + 1, keyword)
+            for end, keywords in self._scan(text)
+            for keyword in keywords
+        ]
+
+    def first(self, text: str) -> Optional[str]:
+        """返回文本中最先出现的关键词，没有时返回 None"""
+        for _, keywords in self._scan(text):
+            return keywords[0]
+        return None
+
+    def contains(self, text: str) -> bool:
+        """文本中是否出现了任意一个关键词"""
+        return self.first(text) is not None
+
+    def mask(self, text: str, char: str = "*") -> str:
+        """将文本中出现的关键词替换为 char"""
+        masked = list(text)
+        for start, keyword in self.search(text):
+            masked[start:start + len(keyword)] = char * len(keyword)
+        return "".join(masked)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keywords": len(self.keywords), "nodes": len(self._goto), "rebuilds": self.rebuilds}
+
+    def _normalize(self, text: str) -> str:
+        if not self.ignore_case:
+            return text
+        if text.isascii():
+            return text.lower()
+        return "".join(_fold(char) for char in text)
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        if self._dirty:
+            self._build()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for i, char in enumerate(self._normalize(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield i, output[state]
+
+    def _build(self) -> None:
+        if self._removed > len(self.keywords):
+            self._compact()
+        goto, fail, terminal, output = self._goto, self._fail, self._terminal, self._output
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            output[child] = (terminal[child],) if terminal[child] else ()
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                # 输出包括失配指针指向的节点的输出，匹配时不需要再沿失配指针查找
+                output[child] = ((terminal[child],) if terminal[child] else ()) + output[fail[child]]
+                queue.append(child)
+        self._dirty = False
+        self.rebuilds += 1
+
+    def _compact(self) -> None:
+        keywords = self.keywords
+        self.keywords = set()
+        self._goto, self._fail, self._terminal, self._output = [{}], [0], [None], [()]
+        self._removed = 0
+        for keyword in keywords:
+            self.add(keyword)
+
+
+def _fold(char: str) -> str:
+    lower = char.lower()
+    return lower if len(lower) == 1 else char
+
+
+class KeywordRegistry:
+    """按名称管理多个关键词匹配器，所有插件与机器人共用
+
+    ```python
+    client.keywords.set("moderation.banned", banned_words)
+    if client.keywords.contains("moderation.banned", message.content):
+        ...
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._matchers: Dict[str, KeywordMatcher] = {}
+
+    def __repr__(self) -> str:
+        return f"KeywordRegistry(lists={sorted(self._matchers)})"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._matchers
+
+    def get(self, name: str, ignore_case: Optional[bool] = None) -> KeywordMatcher:
+        """获取关键词列表对应的匹配器，不存在时创建一个空的匹配器
+
+        Args:
+            name (str): 关键词列表名称
+            ignore_case (Optional[bool]): 是否忽略大小写，为 None 时沿用已有的设置，创建时默认忽略大小写
+
+        Raises:
+            ValueError: 与已经存在的匹配器的 ignore_case 设置不一致
+        """
+        matcher = self._matchers.get(name)
+        if matcher is None:
+            matcher = self._matchers[name] = KeywordMatcher(ignore_case=True if ignore_case is None else ignore_case)
+        elif ignore_case is not None and ignore_case != matcher.ignore_case:
+            raise ValueError(f"关键词列表 {name} 已经设置为 ignore_case={matcher.ignore_case}")
+        return matcher
+
+    def set(self, name: str, keywords: Iterable[str], ignore_case: Optional[bool] = None) -> KeywordMatcher:
+        """设置关键词列表，已经存在时只增删有变化的关键词，参数说明见 `get`"""
+        matcher = self.get(name, ignore_case)
+        matcher.replace(keywords)
+        return matcher
+
+    def search(self, name: str, text: str) -> List[Tuple[int, str]]:
+        return self.get(name).search(text)
+
+    def contains(self, name: str, text: str) -> bool:
+        return self.get(name).contains(text)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: matcher.stats() for name, matcher in self._matchers.items()}
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import queue
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+_ANSI_ESCAPE = re.compile(r"\033\[[0-9;]*m")
+_STOP = object()
+# LogRecord 自带的属性，其余属性都视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class _EnqueueHandler(logging.Handler):
+    """只负责把日志记录放进队列的 Handler，格式化与写入都交给后台线程"""
+
+    def __init__(self, sink: "AsyncLogSink") -> None:
+        super().__init__()
+        self.sink: AsyncLogSink = sink
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            # 参数和异常信息需要在当前线程中求值，之后对象可能已经改变
+            record.message = record.getMessage()
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.msg, record.args, record.exc_info = record.message, None, None
+            self.sink.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+class AsyncLogSink:
+    """异步日志写入器
+
+    事件循环中只把日志记录放进队列，由后台线程批量写成 JSON Lines 文件，
+    文件超过 `max_bytes` 后轮换，旧文件可选用 gzip 压缩，最多保留 `backup_count` 个。
+    每行记录会去掉消息中的颜色代码，并带上通过 `extra` 传入的结构化字段，例如：
+    ```python
+    logger.info("...", extra={"event": "on_at_message_create", "handler": "Echo"})
+    ```
+
+    Args:
+        path (Union[str, Path]): 日志文件路径
+        max_bytes (int): 单个日志文件的最大字节数
+        backup_count (int): 保留的旧日志文件数量
+        compress (bool): 是否压缩旧日志文件
+        batch_size (int): 每次最多合并写入的记录数
+    """
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            max_bytes: int = 10 * 1024 * 1024,
+            backup_count: int = 5,
+            compress: bool = True,
+            batch_size: int = 512
+    ) -> None:
+        self.path: Path = Path(path)
+        self.max_bytes: int = max_bytes
+        self.backup_count: int = backup_count
+        self.compress: bool = compress
+        self.batch_size: int = batch_size
+
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler: _EnqueueHandler = _EnqueueHandler(self)
+        self._thread: Optional[threading.Thread] = None
+        self._loggers: List[logging.Logger] = []
+
+        self.written: int = 0
+        self.rotations: int = 0
+
+    def __repr__(self) -> str:
+        return f"AsyncLogSink(path={str(self.path)!r}, max_bytes={self.max_bytes})"
+
+    def install(self, logger: logging.Logger) -> None:
+        """将日志写入器挂载到 logger 上并启动后台线程"""
+        if logger not in self._loggers:
+            logger.addHandler(self.handler)
+            self._loggers.append(logger)
+        if self._thread is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """写完队列中剩余的记录并停止后台线程"""
+        for logger in self._loggers:
+            logger.removeHandler(self.handler)
+        self._loggers.clear()
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+        """将日志记录转换为写入文件的字典"""
+        data = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "func": record.funcName,
+            "message": _ANSI_ESCAPE.sub("", record.getMessage()),
+        }
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        return data
+
+    def _run(self) -> None:
+        stream = open(self.path, "a", encoding="utf-8")
+        try:
+            stopping = False
+            while not stopping:
+                records = [self.queue.get()]
+                while len(records) < self.batch_size:
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in records:
+                    stopping = True
+                    records = [record for record in records if record is not _STOP]
+                lines = [json.dumps(self.to_dict(record), ensure_ascii=False, default=str) for record in records]
+                if not lines:
+                    continue
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+                self.written += len(lines)
+                if stream.tell() >= self.max_bytes:
+                    stream.close()
+                    self._rotate()
+                    stream = open(self.path, "a", encoding="utf-8")
+        finally:
+            stream.close()
+
+    def _rotate(self) -> None:
+        suffix = ".gz" if self.compress else ""
+        for i in range(self.backup_count - 1, 0, -1):
+            source = Path(f"{self.path}.{i}{suffix}")
+            if source.exists():
+                os.replace(source, f"{self.path}.{i + 1}{suffix}")
+        if self.backup_count <= 0:
+            self.path.unlink()
+        elif self.compress:
+            import gzip
+
+            with open(self.path, "rb") as src, gzip.open(f"{self.path}.1.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        else:
+            os.replace(self.path, f"{self.path}.1")
+        self.rotations += 1
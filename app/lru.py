@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class ExpiringLRU:
+    """带过期时间的定长 LRU 表
+
+    条目数量超过 `maxsize` 时淘汰最久未访问的条目，条目超过 `ttl` 秒后视为不存在，
+    因此无论有多少不同的键，占用的内存都有上限。
+
+    Args:
+        maxsize (int): 最多保存的条目数
+        ttl (float): 条目的默认存活时间（秒）
+        timer (Callable[[], float]): 计时函数，默认为 `time.monotonic`
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self._timer: Callable[[], float] = timer
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def __repr__(self) -> str:
+        return f"ExpiringLRU(size={len(self._data)}, maxsize={self.maxsize}, ttl={self.ttl})"
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取条目，不存在或已过期时返回 default"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expire_at, value = item
+        if expire_at <= self._timer():
+            del self._data[key]
+            self.expirations += 1
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入条目并刷新其过期时间"""
+        now = self._timer()
+        self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        self._purge(now)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除条目并返回其值"""
+        item = self._data.pop(key, None)
+        if item is None or item[0] <= self._timer():
+            return default
+        return item[1]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """遍历未过期的条目，不改变访问顺序"""
+        now = self._timer()
+        for key, (expire_at, value) in list(self._data.items()):
+            if expire_at > now:
+                yield key, value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _purge(self, now: float) -> None:
+        data = self._data
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+        # 顺带清理队首已经过期的条目，其余的在访问时惰性删除
+        while data:
+            expire_at, _ = next(iter(data.values()))
+            if expire_at > now:
+                break
+            data.popitem(last=False)
+            self.expirations += 1
@@ -1,9 +1,10 @@
+import sys
 import pkgutil
-import importlib
 from botpy import Client, logging
 from traceback import print_exc
 from pathlib import Path
-from typing import Iterable, Optional, Set, Dict
+from types import ModuleType
+from typing import Iterable, List, Mapping, Optional, Set, Dict
 
 logger = logging.get_logger()
 
@@ -75,6 +76,45 @@ def load_all_plugins(
 
 
 
+def plugin_ready_waves(dependencies: Mapping[str, Iterable[str]]) -> List[List[str]]:
+    """
+    Split plugins into waves according to their dependencies:
+    every plugin only depends on plugins of earlier waves,
+    so plugins of the same wave can be initialized concurrently.
+    Unknown dependencies are ignored with an error log.
+    Plugins in a dependency cycle (or depending on one) can never be initialized,
+    they are left out of the waves with an error log.
+
+    Params:
+        dependencies: mapping from plugin name to the names it depends on
+    """
+    remaining: Dict[str, Set[str]] = {}
+    for name, depends in dependencies.items():
+        remaining[name] = set()
+        for depend in depends:
+            if depend not in dependencies:
+                logger.error(
+                    f'插件 "{Colors.light_blue}{name}{Colors.escape}" 依赖的插件 "{Colors.light_blue}{depend}{Colors.escape}" {Colors.red}不存在！{Colors.escape}'
+                )
+                continue
+            remaining[name].add(depend)
+
+    waves: List[List[str]] = []
+    while remaining:
+        wave = [name for name, depends in remaining.items() if not depends]
+        if not wave:
+            logger.error(
+                f"插件之间存在循环依赖，{Colors.red}无法加载{Colors.escape}: {', '.join(sorted(remaining))}"
+            )
+            break
+        for name in wave:
+            del remaining[name]
+        for depends in remaining.values():
+            depends.difference_update(wave)
+        waves.append(wave)
+    return waves
+
+
 def path_to_module_name(launcher_path: Path, path: Path) -> str:
     rel_path = path.resolve().relative_to(launcher_path)
     if rel_path.stem == "__init__":
@@ -87,6 +127,12 @@ def _module_name_to_plugin_name(module_name: str) -> str:
     return module_name.rsplit(".", 1)[-1]
 
 
+def _import_module(name: str) -> ModuleType:
+    # 使用 __import__ 而不是 importlib.import_module，这样 `-X importtime` 才能统计到插件模块本身
+    __import__(name)
+    return sys.modules[name]
+
+
 class PluginManager:
     """
     Plugin Manager for the flask application.
@@ -185,11 +231,11 @@ class PluginManager:
         """
         try:
             if name in self.plugins:
-                module = importlib.import_module(name)
+                module = _import_module(name)
             elif name in self._third_party_plugin_names:
-                module = importlib.import_module(self._third_party_plugin_names[name])
+                module = _import_module(self._third_party_plugin_names[name])
             elif name in self._searched_plugin_names:
-                module = importlib.import_module(
+                module = _import_module(
                     path_to_module_name(self.launcher_path, self._searched_plugin_names[name])
                 )
             else:
@@ -201,6 +247,9 @@ class PluginManager:
             if (handler := getattr(module, "__handler__", None)) is None:
                 logger.error(f'模块 "{Colors.light_blue}{name}{Colors.escape}" 并没有被加载成一个插件！')
                 logger.error(f'请确保 "{Colors.light_purple}__handler__{Colors.escape}" 变量设置正确！')
+            if isinstance(handler, type):
+                # 响应器类：每个机器人各自创建一个实例，互不共享状态
+                handler = handler()
             self.client.register(handler=handler)
                 
         except Exception as e:
@@ -15,12 +15,14 @@ class Echo(HandlerInterface):
         return "Echo"
     
     async def on_ready(self, client: Client):
+        # 机器人名称在运行期间不会改变，注册模板时提前填入
+        client.templates.register("echo.reply", "机器人{robot}收到你的私信了: {content}", robot=client.robot.name)
         logger.info(f'\t插件"{Colors.light_blue}echo{Colors.escape}"加载完成！')
     
     async def on_direct_message_create(self, client: Client, message: DirectMessage) -> bool:
         await client.api.post_dms(
             guild_id=message.guild_id,
-            content=f"机器人{client.robot.name}收到你的私信了: {message.content}",
+            content=client.templates.render("echo.reply", content=message.content),
             msg_id=message.id,
         )
         return True
\ No newline at end of file
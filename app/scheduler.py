@@ -0,0 +1,351 @@
+import time
+import heapq
+import random
+import asyncio
+import contextvars
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .accounting import current_plugin
+from .manager import Colors, logger
+
+
+JobFunc = Callable[..., Awaitable[Any]]
+
+
+class CronExpression:
+    """五段式 cron 表达式：分 时 日 月 星期
+
+    每一段支持 `*`、`*/n`、`a`、`a-b`、`a-b/n` 以及用逗号分隔的列表，星期中 0 和 7 都表示星期日。
+    与标准 cron 相同，日和星期同时被限制时，满足其一即可。
+
+    Args:
+        expression (str): cron 表达式，如 `"0 9 * * 1-5"` 表示工作日早上九点
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str) -> None:
+        self.expression: str = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式需要 5 段: {expression!r}")
+        minutes, hours, days, months, weekdays = (
+            self._parse(field, *bounds) for field, bounds in zip(fields, self._RANGES)
+        )
+        self.minutes: Set[int] = minutes
+        self.hours: Set[int] = hours
+        self.days: Set[int] = days
+        self.months: Set[int] = months
+        # datetime.weekday() 中星期一为 0，cron 中星期日为 0
+        self.weekdays: Set[int] = {(day - 1) % 7 for day in weekdays}
+        self._any_day: bool = fields[2] == "*"
+        self._any_weekday: bool = fields[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+    def next(self, after: datetime) -> datetime:
+        """返回 after 之后（不含）第一个满足表达式的时间"""
+        current = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = current + timedelta(days=366 * 5)
+        while current < limit:
+            if current.month not in self.months:
+                current = (current.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError(f"cron 表达式永远不会触发: {self.expression!r}")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = moment.weekday() in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            body, _, step = part.partition("/")
+            if body == "*":
+                start, end = low, high
+            elif "-" in body:
+                start, end = (int(x) for x in body.split("-", 1))
+            else:
+                start = end = int(body)
+                if step:
+                    end = high
+            if not low <= start <= end <= high:
+                raise ValueError(f"cron 表达式的取值超出范围 {low}-{high}: {field!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+
+class Job:
+    """定时任务，由 `Scheduler` 创建，记录运行统计
+
+    - `overruns`: 到达运行时间时仍有 `max_concurrency` 个实例在运行而被跳过的次数
+    - `max_lag`: 实际开始运行的时间比计划时间晚的最大值（秒）
+    """
+
+    def __init__(
+            self,
+            name: str,
+            func: JobFunc,
+            args: Tuple[Any, ...],
+            next_time: Callable[[float, bool], Optional[float]],
+            jitter: float,
+            max_concurrency: int
+    ) -> None:
+        self.name: str = name
+        self.func: JobFunc = func
+        self.args: Tuple[Any, ...] = args
+        self.next_time: Callable[[float, bool], Optional[float]] = next_time
+        self.jitter: float = jitter
+        self.max_concurrency: int = max_concurrency
+
+        self.next_run: Optional[float] = None
+        self.cancelled: bool = False
+        # 注册任务的插件，任务运行时沿用，以便资源统计归到对应的插件
+        self.plugin: Optional[str] = current_plugin.get()
+        self.tasks: Set[asyncio.Task] = set()
+
+        self.runs: int = 0
+        self.failures: int = 0
+        self.overruns: int = 0
+        self.total_time: float = 0.0
+        self.max_time: float = 0.0
+        self.last_time: float = 0.0
+        self.max_lag: float = 0.0
+
+    def __repr__(self) -> str:
+        return f"Job(name={self.name!r}, next_run={self.next_run}, running={len(self.tasks)})"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "next_run": self.next_run,
+            "running": len(self.tasks),
+            "runs": self.runs,
+            "failures": self.failures,
+            "overruns": self.overruns,
+            "avg_time": self.total_time / self.runs if self.runs else 0.0,
+            "max_time": self.max_time,
+            "last_time": self.last_time,
+            "max_lag": self.max_lag,
+        }
+
+
+class Scheduler:
+    """定时任务调度器
+
+    所有任务保存在同一个按运行时间排序的堆中，由一个后台任务等待最早到期的任务，而不是每个任务各自 sleep。
+    插件可以在 `on_ready` 中注册任务，退出时调度器会取消所有任务：
+    ```python
+    client.scheduler.every(600, self.refresh, client, name="weather.refresh", jitter=30)
+    client.scheduler.cron("0 9 * * *", self.post_digest, client, name="digest.daily")
+    client.scheduler.once(5, self.warm_up, client)
+    ```
+    同名任务会替换之前注册的任务，任务函数中抛出的异常会被记录到日志中。
+
+    Args:
+        timer (Callable[[], float]): 返回当前时间戳的函数
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.time) -> None:
+        self.timer: Callable[[], float] = timer
+        self.jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._counter: int = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __repr__(self) -> str:
+        return f"Scheduler(jobs={sorted(self.jobs)})"
+
+    def every(
+            self,
+            seconds: float,
+            func: JobFunc,
+            *args: Any,
+            name: Optional[str] = None,
+            jitter: float = 0.0,
+            max_concurrency: int = 1,
+            delay: Optional[float] = None
+    ) -> Job:
+        """注册按固定间隔运行的任务
+
+        Args:
+            seconds (float): 运行间隔（秒）
+            func (JobFunc): 异步任务函数
+            *args: 传给任务函数的参数
+            name (Optional[str]): 任务名称，默认为函数的限定名
+            jitter (float): 每次运行时间随机推迟 0 ~ jitter 秒，避免大量任务同时运行
+            max_concurrency (int): 允许同时运行的实例数
+            delay (Optional[float]): 第一次运行前等待的时间（秒），默认为 seconds
+
+        Returns:
+            (Job): 注册的任务
+        """
+        if seconds <= 0:
+            raise ValueError("任务的运行间隔必须大于 0")
+        first_delay = seconds if delay is None else delay
+
+        def next_time(previous: float, first: bool) -> float:
+            if first:
+                return previous + first_delay
+            # 按计划时间推进，落后太多时跳过错过的运行，而不是连续补跑
+            return max(previous + seconds, self.timer())
+
+        return self._add(name, func, args, next_time, jitter, max_concurrency)
+
+    def cron(
+            self,
+            expression: str,
+            func: JobFunc,
+            *args: Any,
+            name: Optional[str] = None,
+            jitter: float = 0.0,
+            max_concurrency: int = 1
+    ) -> Job:
+        """注册按 cron 表达式运行的任务，时间按本地时区计算，参数说明见 `every`"""
+        cron = CronExpression(expression)
+
+        def next_time(previous: float, first: bool) -> float:
+            after = max(previous, self.timer())
+            return cron.next(datetime.fromtimestamp(after)).timestamp()
+
+        return self._add(name, func, args, next_time, jitter, max_concurrency)
+
+    def once(
+            self,
+            delay: float,
+            func: JobFunc,
+            *args: Any,
+            name: Optional[str] = None,
+            jitter: float = 0.0
+    ) -> Job:
+        """注册在 delay 秒后运行一次的任务，参数说明见 `every`"""
+        def next_time(previous: float, first: bool) -> Optional[float]:
+            return previous + delay if first else None
+
+        return self._add(name, func, args, next_time, jitter, 1)
+
+    def cancel(self, name: str) -> bool:
+        """取消任务，正在运行的实例也会被取消，返回任务是否存在"""
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        for task in job.tasks:
+            task.cancel()
+        return True
+
+    def start(self) -> None:
+        """启动调度器，需要在事件循环中调用，启动前注册的任务从注册时开始计时"""
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """停止调度并取消所有正在运行的任务"""
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回各任务的运行统计"""
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+    def _add(
+            self,
+            name: Optional[str],
+            func: JobFunc,
+            args: Tuple[Any, ...],
+            next_time: Callable[[float, bool], Optional[float]],
+            jitter: float,
+            max_concurrency: int
+    ) -> Job:
+        name = name or getattr(func, "__qualname__", repr(func))
+        self.cancel(name)
+        job = Job(name, func, args, next_time, jitter, max_concurrency)
+        self.jobs[name] = job
+        self._schedule(job, self.timer(), True)
+        return job
+
+    def _schedule(self, job: Job, previous: float, first: bool = False) -> None:
+        when = job.next_time(previous, first)
+        if when is None:
+            # 一次性任务运行后不再保留
+            if self.jobs.get(job.name) is job:
+                del self.jobs[job.name]
+            job.next_run = None
+            return
+        job.next_run = when
+        self._counter += 1
+        heapq.heappush(self._heap, (when + random.uniform(0, job.jitter), self._counter, job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            # 跳过已经取消或被同名任务替换的任务
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            timeout = self._heap[0][0] - self.timer() if self._heap else None
+            if timeout is None or timeout > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, job = heapq.heappop(self._heap)
+            scheduled = job.next_run
+            self._schedule(job, scheduled)
+            if len(job.tasks) >= job.max_concurrency:
+                job.overruns += 1
+                logger.warning(
+                    f"定时任务 {Colors.yellow}{job.name}{Colors.escape} 的上一次运行尚未结束，{Colors.red}跳过本次运行{Colors.escape}",
+                    extra={"job": job.name}
+                )
+                continue
+            job.max_lag = max(job.max_lag, self.timer() - scheduled)
+            # 在设置好插件的上下文中创建任务，任务会复制这个上下文（create_task 的 context 参数需要 Python 3.11）
+            context = contextvars.copy_context()
+            context.run(current_plugin.set, job.plugin)
+            task = context.run(
+                asyncio.get_running_loop().create_task, self._execute(job), name=f"[scheduler] {job.name}"
+            )
+            job.tasks.add(task)
+            task.add_done_callback(job.tasks.discard)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job) -> None:
+        start = time.perf_counter()
+        try:
+            await job.func(*job.args)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            job.failures += 1
+            logger.exception(f"定时任务 {Colors.yellow}{job.name}{Colors.escape} {Colors.red}运行出错！{Colors.escape}", extra={"job": job.name})
+        finally:
+            elapsed = time.perf_counter() - start
+            job.runs += 1
+            job.total_time += elapsed
+            job.last_time = elapsed
+            job.max_time = max(job.max_time, elapsed)
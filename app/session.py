@@ -0,0 +1,102 @@
+import os
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from .manager import Colors, logger
+
+
+class SessionStore:
+    """网关会话持久化
+
+    将每个分片的 `session_id`、`last_seq` 与分片信息保存到本地文件，重启后可以用来 resume，
+    从而跳过 identify 的频率限制并收到停机期间的事件。
+    文件中不保存令牌，只记录 appid 与 intents 用来判断会话是否仍然可用。
+
+    Args:
+        path (Union[str, Path]): 会话文件路径
+        max_age (float): 会话的最长有效时间（秒），超过后不再尝试 resume
+    """
+
+    def __init__(self, path: Union[str, Path], max_age: float = 300) -> None:
+        self.path: Path = Path(path)
+        self.max_age: float = max_age
+        self._saved: Optional[Dict[str, Any]] = None
+
+    def __repr__(self) -> str:
+        return f"SessionStore(path={str(self.path)!r}, max_age={self.max_age})"
+
+    def save(self, appid: str, sessions: Iterable[Dict[str, Any]]) -> None:
+        """保存会话信息，先写入临时文件再替换，避免写到一半时退出导致文件损坏
+
+        Args:
+            appid (str): 机器人id
+            sessions (Iterable[Dict[str, Any]]): botpy 的会话对象
+        """
+        data = {
+            "appid": appid,
+            "saved_at": time.time(),
+            "sessions": [
+                {
+                    "session_id": session["session_id"],
+                    "last_seq": session["last_seq"],
+                    "intent": session["intent"],
+                    "shard_id": session["shards"]["shard_id"],
+                    "shard_count": session["shards"]["shard_count"],
+                }
+                for session in sessions if session["session_id"]
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def restore(self, appid: str, session: Dict[str, Any]) -> bool:
+        """用保存的会话信息填充 botpy 的会话对象
+
+        Args:
+            appid (str): 机器人id
+            session (Dict[str, Any]): 即将建立连接的 botpy 会话对象
+
+        Returns:
+            (bool): 找到可用的会话并完成填充为True
+        """
+        saved = self._load()
+        if saved is None or saved.get("appid") != appid:
+            return False
+        if time.time() - saved.get("saved_at", 0) > self.max_age:
+            return False
+        for item in saved.get("sessions", []):
+            # botpy identify 时会把为 0 的 intents 改为 1，保存的是修改后的值
+            if (
+                    item["shard_id"] == session["shards"]["shard_id"]
+                    and item["shard_count"] == session["shards"]["shard_count"]
+                    and (item["intent"] or 1) == (session["intent"] or 1)
+            ):
+                session["session_id"] = item["session_id"]
+                session["last_seq"] = item["last_seq"]
+                return True
+        return False
+
+    def clear(self) -> None:
+        """删除会话文件"""
+        self._saved = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if self._saved is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._saved = json.load(f)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                logger.error(f"{Colors.red}读取会话文件失败！{Colors.escape} {e}")
+                return None
+        return self._saved
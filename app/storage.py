@@ -0,0 +1,286 @@
+import json
+import queue
+import asyncio
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .lru import ExpiringLRU
+from .manager import Colors, logger
+
+# sqlite3 只在写线程中使用，推迟到第一次读写时再导入
+if TYPE_CHECKING:
+    import sqlite3
+
+
+_DELETED = object()
+_MISSING = object()
+_STOP = object()
+
+
+class Namespace:
+    """插件专属的存储空间，由 `Storage.namespace` 创建
+
+    Args:
+        storage (Storage): 所属的存储服务
+        name (str): 命名空间名称，一般为插件名称
+    """
+
+    def __init__(self, storage: "Storage", name: str) -> None:
+        self.storage: Storage = storage
+        self.name: str = name
+
+    def __repr__(self) -> str:
+        return f"Namespace(name={self.name!r})"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        return await self.storage.get(self.name, key, default)
+
+    async def put(self, key: str, value: Any) -> None:
+        await self.storage.put(self.name, key, value)
+
+    async def delete(self, key: str) -> None:
+        await self.storage.delete(self.name, key)
+
+    async def scan(self, prefix: str = "", limit: Optional[int] = None) -> List[Tuple[str, Any]]:
+        return await self.storage.scan(self.name, prefix, limit)
+
+
+class Storage:
+    """插件使用的异步键值存储服务
+
+    数据以 JSON 形式保存在 WAL 模式的 SQLite 数据库中，所有数据库操作都在一个专用线程中执行，
+    事件循环只读写内存：
+    - `put`/`delete` 只修改内存中的缓存和待写入表，由写线程定期合并成一个事务批量提交，
+      同一个键的多次修改只会写入最后一次的值。`put` 时立即序列化，不能序列化的值直接抛出 `TypeError`，
+      之后修改传入的对象也不会影响保存的值，读取到的总是 JSON 反序列化后的新对象
+    - `get` 优先读取缓存，未命中时才交给写线程查询
+    - `scan` 会先提交所有待写入的修改，再在写线程中查询
+
+    Args:
+        path (Union[str, Path]): 数据库文件路径
+        flush_interval (float): 批量提交的间隔时间（秒）
+        batch_size (int): 待写入的修改达到该数量时立即提交
+        cache_size (int): 缓存的最大条目数
+    """
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            flush_interval: float = 0.05,
+            batch_size: int = 1024,
+            cache_size: int = 10000
+    ) -> None:
+        self.path: Path = Path(path)
+        self.flush_interval: float = flush_interval
+        self.batch_size: int = batch_size
+
+        self._cache: ExpiringLRU = ExpiringLRU(cache_size, float("inf"))
+        # 缓存与待写入表中保存序列化后的字符串，删除的键为 _DELETED
+        self._dirty: Dict[Tuple[str, str], Any] = {}
+        self._dirty_lock: threading.Lock = threading.Lock()
+        self._tasks: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock: threading.Lock = threading.Lock()
+        self._namespaces: Dict[str, Namespace] = {}
+
+        self._version: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.commits: int = 0
+        self.written: int = 0
+
+    def __repr__(self) -> str:
+        return f"Storage(path={str(self.path)!r}, pending={len(self._dirty)})"
+
+    def namespace(self, name: str) -> Namespace:
+        """获取命名空间，同名的命名空间共用同一个对象
+
+        Args:
+            name (str): 命名空间名称，一般为插件名称
+        """
+        if name not in self._namespaces:
+            self._namespaces[name] = Namespace(self, name)
+        return self._namespaces[name]
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        item = (namespace, key)
+        value = self._dirty.get(item, _MISSING)
+        if value is _MISSING:
+            value = self._cache.get(item, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return default if value is _DELETED else json.loads(value)
+
+        self.misses += 1
+        version = self._version
+        row = await self._submit(lambda conn: conn.execute(
+            "SELECT value FROM kv WHERE ns = ? AND key = ?", item
+        ).fetchone())
+        value = _DELETED if row is None else row[0]
+        # 查询期间可能有新的写入，此时以写入的值为准
+        if version == self._version:
+            self._cache.set(item, value)
+        return default if value is _DELETED else json.loads(value)
+
+    async def put(self, namespace: str, key: str, value: Any) -> None:
+        """写入键值，值需要能被 JSON 序列化，否则抛出 `TypeError` 或 `ValueError`"""
+        self._write((namespace, key), json.dumps(value, ensure_ascii=False))
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._write((namespace, key), _DELETED)
+
+    async def scan(
+            self,
+            namespace: str,
+            prefix: str = "",
+            limit: Optional[int] = None
+    ) -> List[Tuple[str, Any]]:
+        """按键的顺序列出命名空间中以 prefix 开头的键值对"""
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = await self._submit(lambda conn: conn.execute(
+            "SELECT key, value FROM kv WHERE ns = ? AND key LIKE ? ESCAPE '\\' ORDER BY key LIMIT ?",
+            (namespace, pattern, -1 if limit is None else limit)
+        ).fetchall())
+        return [(key, json.loads(value)) for key, value in rows]
+
+    async def flush(self) -> None:
+        """等待所有待写入的修改提交到数据库"""
+        await self._submit(lambda conn: None)
+
+    async def close(self) -> None:
+        """提交所有修改并关闭写线程"""
+        with self._thread_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._tasks.put(_STOP)
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        with self._thread_lock:
+            if self._thread is thread:
+                self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """返回存储统计信息"""
+        return {
+            "pending": len(self._dirty),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "commits": self.commits,
+            "written": self.written,
+        }
+
+    def _write(self, item: Tuple[str, str], value: Any) -> None:
+        self._version += 1
+        with self._dirty_lock:
+            self._dirty[item] = value
+            pending = len(self._dirty)
+        self._cache.set(item, value)
+        with self._thread_lock:
+            self._ensure_started()
+            if pending == self.batch_size:
+                self._tasks.put(None)
+
+    def _submit(self, func: Callable[["sqlite3.Connection"], Any]) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._thread_lock:
+            self._ensure_started()
+            self._tasks.put((func, loop, future))
+        return future
+
+    def _ensure_started(self) -> None:
+        # 需要持有 _thread_lock
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(self._tasks,), name="storage-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self, tasks: queue.Queue) -> None:
+        import sqlite3
+
+        conn = None
+        try:
+            conn = sqlite3.connect(str(self.path))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (ns, key)"
+                ") WITHOUT ROWID"
+            )
+            while True:
+                try:
+                    task = tasks.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    task = None
+                try:
+                    self._commit(conn)
+                except Exception as e:
+                    logger.error(f"{Colors.red}存储写入失败！{Colors.escape} {e!r}")
+                if task is _STOP:
+                    break
+                if task is not None:
+                    _execute(conn, *task)
+            self._commit(conn)
+        except Exception as e:
+            # 写线程退出后下一次读写会重新启动，已经提交的请求不会一直等待
+            logger.exception(f"{Colors.red}存储写线程出错！{Colors.escape}")
+            with self._thread_lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            while True:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(task, tuple):
+                    task[1].call_soon_threadsafe(_set_exception, task[2], e)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _commit(self, conn: "sqlite3.Connection") -> None:
+        with self._dirty_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+        upserts = [(ns, key, value) for (ns, key), value in dirty.items() if value is not _DELETED]
+        deletes = [item for item, value in dirty.items() if value is _DELETED]
+        try:
+            with conn:
+                if upserts:
+                    conn.executemany("INSERT OR REPLACE INTO kv (ns, key, value) VALUES (?, ?, ?)", upserts)
+                if deletes:
+                    conn.executemany("DELETE FROM kv WHERE ns = ? AND key = ?", deletes)
+        except Exception:
+            # 提交失败时放回待写入表，期间产生的新修改优先
+            with self._dirty_lock:
+                for item, value in dirty.items():
+                    self._dirty.setdefault(item, value)
+            raise
+        self.commits += 1
+        self.written += len(dirty)
+
+
+def _execute(conn: "sqlite3.Connection", func: Callable, loop: asyncio.AbstractEventLoop, future: "asyncio.Future") -> None:
+    try:
+        result = func(conn)
+    except Exception as e:
+        loop.call_soon_threadsafe(_set_exception, future, e)
+    else:
+        loop.call_soon_threadsafe(_set_result, future, result)
+
+
+def _set_result(future: "asyncio.Future", result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: "asyncio.Future", exception: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exception)
@@ -0,0 +1,163 @@
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+
+_formatter = Formatter()
+
+Payload = Union[str, Dict[str, Any], List[Any]]
+
+
+class ReplyTemplate:
+    """预编译的回复模板
+
+    模板可以是字符串，也可以是 Ark/Embed/Markdown 等结构化消息的 dict/list，
+    其中的字符串使用 `str.format` 的语法声明变量，如 `"你好，{name}"`。
+    编译时会找出含有变量的位置，渲染时只重新生成从根到这些位置的路径，不含变量的子结构直接共用，
+    因此渲染结果中的静态部分请不要修改。
+    值恰好为单个变量（如 `"{count}"`）时会直接填入变量本身，而不会转换为字符串。
+
+    Args:
+        template (Payload): 模板内容
+    """
+
+    def __init__(self, template: Payload) -> None:
+        self.template: Payload = template
+        self.slots: Set[str] = set()
+        self._static, self._render = _compile(template, self.slots)
+
+    def __repr__(self) -> str:
+        return f"ReplyTemplate(slots={sorted(self.slots)})"
+
+    def render(self, **values: Any) -> Payload:
+        """填入变量生成回复内容，缺少变量时抛出 KeyError"""
+        if self._static:
+            return self.template
+        return self._render(values)
+
+    def partial(self, **values: Any) -> "ReplyTemplate":
+        """提前填入部分变量，返回新的模板，适合填入机器人名称等长期不变的内容"""
+        return ReplyTemplate(_bind(self.template, values))
+
+
+class TemplateRegistry:
+    """回复模板注册表，插件在初始化时注册模板，之后按名称渲染"""
+
+    def __init__(self) -> None:
+        self._templates: Dict[str, ReplyTemplate] = {}
+
+    def __repr__(self) -> str:
+        return f"TemplateRegistry(templates={sorted(self._templates)})"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def register(self, name: str, template: Union[Payload, ReplyTemplate], **values: Any) -> ReplyTemplate:
+        """注册模板
+
+        Args:
+            name (str): 模板名称，建议以插件名称开头，如 `echo.reply`
+            template (Union[Payload, ReplyTemplate]): 模板内容
+            **values: 提前填入的变量
+
+        Returns:
+            (ReplyTemplate): 编译好的模板
+        """
+        if not isinstance(template, ReplyTemplate):
+            template = ReplyTemplate(template)
+        if values:
+            template = template.partial(**values)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> ReplyTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, **values: Any) -> Payload:
+        return self._templates[name].render(**values)
+
+
+def _fields(text: str) -> List[Tuple[str, str, str, str]]:
+    return list(_formatter.parse(text))
+
+
+def _compile(template: Any, slots: Set[str]) -> Tuple[bool, Callable[[Mapping[str, Any]], Any]]:
+    """编译模板，返回 (是否为静态内容, 渲染函数)
+
+    含有变量的部分会被生成为一个 Python 表达式，静态的部分作为常量引用，
+    渲染时只需要执行一次生成好的函数，开销与手写 dict 字面量相当。
+    """
+    constants: Dict[str, Any] = {}
+    expression = _expression(template, slots, constants)
+    if expression is None:
+        return True, lambda values: template
+    return False, eval(f"lambda v: {expression}", constants)
+
+
+def _expression(node: Any, slots: Set[str], constants: Dict[str, Any]) -> Optional[str]:
+    """生成渲染节点的表达式，节点为静态内容时返回None"""
+    if isinstance(node, str):
+        fields = [field for _, field, _, _ in _fields(node) if field is not None]
+        if not fields:
+            return None
+        slots.update(_root(field) for field in fields)
+        if len(fields) == 1 and node == "{" + fields[0] + "}" and fields[0].isidentifier():
+            return f"v[{fields[0]!r}]"
+        return f"{_constant(node.format_map, constants)}(v)"
+
+    if isinstance(node, (dict, list)):
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        parts = []
+        dynamic = False
+        for key, value in items:
+            expression = _expression(value, slots, constants)
+            if expression is None:
+                expression = _constant(value, constants)
+            else:
+                dynamic = True
+            if isinstance(node, dict):
+                expression = f"{_constant(key, constants)}: {expression}"
+            parts.append(expression)
+        if not dynamic:
+            return None
+        if isinstance(node, dict):
+            return "{" + ", ".join(parts) + "}"
+        return "[" + ", ".join(parts) + "]"
+
+    return None
+
+
+def _constant(value: Any, constants: Dict[str, Any]) -> str:
+    name = f"_c{len(constants)}"
+    constants[name] = value
+    return name
+
+
+def _bind(node: Any, values: Mapping[str, Any]) -> Any:
+    """填入已知的变量，未知的变量原样保留"""
+    if isinstance(node, str):
+        parts = []
+        for literal, field, spec, conversion in _fields(node):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if _root(field) in values:
+                if node == "{" + field + "}" and field.isidentifier():
+                    return values[field]
+                text = ("{" + field + ("!" + conversion if conversion else "") + ":" + spec + "}").format_map(values)
+                parts.append(text.replace("{", "{{").replace("}", "}}"))
+            else:
+                parts.append("{" + field + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+        return "".join(parts)
+    if isinstance(node, dict):
+        return {key: _bind(value, values) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_bind(value, values) for value in node]
+    return node
+
+
+def _root(field: str) -> str:
+    """`user.name`、`items[0]` 等字段对应的变量名"""
+    for i, char in enumerate(field):
+        if char in ".[":
+            return field[:i]
+    return field
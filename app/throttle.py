@@ -0,0 +1,128 @@
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+from .lru import ExpiringLRU
+
+
+class TokenBucket:
+    """令牌桶
+
+    Args:
+        rate (float): 每秒恢复的令牌数
+        burst (int): 令牌桶容量
+        now (float): 创建时的时间
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        self.rate: float = rate
+        self.burst: int = burst
+        self.tokens: float = float(burst)
+        self.updated: float = now
+
+    def consume(self, now: float, amount: float = 1.0) -> bool:
+        """尝试取出令牌，成功返回True"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def delay(self, now: float, amount: float = 1.0) -> float:
+        """距离能取出令牌还需要等待的秒数"""
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        if tokens >= amount:
+            return 0.0
+        return (amount - tokens) / self.rate
+
+
+class Throttle:
+    """事件限流与去重
+
+    以 `(author.id, guild_id, 响应器名称)` 为键，对每个响应器分别进行令牌桶限流，
+    并丢弃时间窗口内内容相同的重复消息。没有 `author` 的事件不受影响。
+    状态保存在 `ExpiringLRU` 中，内存占用不随用户数增长。
+
+    Args:
+        rate (float): 令牌恢复速度（个/秒），为 0 时不限流
+        burst (int): 令牌桶容量
+        dedup_window (float): 去重时间窗口（秒），为 0 时不去重
+        maxsize (int): 令牌桶和去重记录各自最多保存的条目数
+        timer (Callable[[], float]): 计时函数
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            dedup_window: float,
+            maxsize: int = 100000,
+            timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate: float = rate
+        self.burst: int = burst
+        self.dedup_window: float = dedup_window
+        self._timer: Callable[[], float] = timer
+        # 令牌桶回满之后与新建的桶没有区别，所以过期时间取回满所需的时间
+        self._buckets: ExpiringLRU = ExpiringLRU(maxsize, burst / rate if rate > 0 else 0, timer)
+        self._recent: ExpiringLRU = ExpiringLRU(maxsize, dedup_window, timer)
+
+        self.dropped: Counter = Counter()
+        self.dropped_by_handler: Counter = Counter()
+
+    def __repr__(self) -> str:
+        return f"Throttle(rate={self.rate}, burst={self.burst}, dedup_window={self.dedup_window})"
+
+    def allow(self, handler_name: str, event: Any, event_name: str = "") -> bool:
+        """判断事件是否可以交给响应器处理
+
+        Args:
+            handler_name (str): 响应器名称
+            event (Any): 事件对象
+            event_name (str): 事件名称，同一条消息以不同事件下发时不视为重复
+
+        Returns:
+            (bool): 可以处理为True，被限流或重复为False
+        """
+        author_id = getattr(getattr(event, "author", None), "id", None)
+        if author_id is None:
+            return True
+        key = (author_id, getattr(event, "guild_id", None), handler_name)
+        now = self._timer()
+
+        content = getattr(event, "content", None)
+        recent_key = None
+        if self.dedup_window > 0 and content:
+            recent_key = key + (event_name, hash(content))
+            if self._recent.get(recent_key) is not None:
+                return self._drop("duplicate", handler_name)
+
+        if self.rate > 0:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst, now)
+            if not bucket.consume(now):
+                return self._drop("cooldown", handler_name)
+            self._buckets.set(key, bucket)
+        # 只记录真正交给响应器处理的内容，被限流丢弃的消息不影响之后的去重
+        if recent_key is not None:
+            self._recent.set(recent_key, True)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """返回限流统计信息"""
+        return {
+            "dropped": dict(self.dropped),
+            "dropped_by_handler": dict(self.dropped_by_handler),
+            "buckets": len(self._buckets),
+            "recent": len(self._recent),
+            "evictions": self._buckets.evictions + self._recent.evictions,
+        }
+
+    def _drop(self, reason: str, handler_name: str) -> bool:
+        self.dropped[reason] += 1
+        self.dropped_by_handler[handler_name] += 1
+        return False
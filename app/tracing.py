@@ -0,0 +1,427 @@
+import os
+import json
+import time
+import random
+import asyncio
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import aiohttp
+
+from .manager import Colors, logger
+
+
+# OTLP 中的 SpanKind 与 StatusCode
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+PRODUCER = 4
+CONSUMER = 5
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """一段被追踪的操作，字段与 OpenTelemetry 的 Span 对应，导出为 OTLP 格式"""
+
+    __slots__ = (
+        "tracer", "name", "kind", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "attributes", "status", "message", "events"
+    )
+
+    recording = True
+
+    def __init__(
+            self,
+            tracer: "Tracer",
+            name: str,
+            kind: int,
+            trace_id: str,
+            parent_id: Optional[str],
+            attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.tracer: "Tracer" = tracer
+        self.name: str = name
+        self.kind: int = kind
+        self.trace_id: str = trace_id
+        self.span_id: str = os.urandom(8).hex()
+        self.parent_id: Optional[str] = parent_id
+        self.start_ns: int = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.status: int = STATUS_UNSET
+        self.message: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+
+    def __repr__(self) -> str:
+        return f"Span(name={self.name!r}, trace_id={self.trace_id}, span_id={self.span_id})"
+
+    @property
+    def traceparent(self) -> str:
+        """W3C Trace Context 的 traceparent 请求头"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status: int, message: Optional[str] = None) -> None:
+        self.status = status
+        self.message = message
+
+    def record_exception(self, exception: BaseException) -> None:
+        """记录异常并将状态设置为错误"""
+        self.events.append({
+            "name": "exception",
+            "time": time.time_ns(),
+            "attributes": {"exception.type": type(exception).__name__, "exception.message": str(exception)},
+        })
+        self.set_status(STATUS_ERROR, str(exception))
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.message:
+            span["status"]["message"] = self.message
+        if self.events:
+            span["events"] = [
+                {"name": event["name"], "timeUnixNano": str(event["time"]), "attributes": _otlp_attributes(event["attributes"])}
+                for event in self.events
+            ]
+        return span
+
+
+class _NonRecordingSpan:
+    """未被采样（或未开启追踪）时使用的空 Span，它的子 Span 也不会被采样"""
+
+    __slots__ = ()
+
+    recording = False
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_status(self, status: int, message: Optional[str] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+# 当前的 Span，asyncio 任务创建时会复制当前的上下文，因此事件处理中创建的任务也在同一个 trace 中
+current_span: ContextVar[Optional[Union[Span, _NonRecordingSpan]]] = ContextVar("current_span", default=None)
+
+
+class FileExporter:
+    """将 Span 以 OTLP/JSON 格式逐批写入文件，每行一个 ExportTraceServiceRequest，用于离线调试与测试
+
+    Args:
+        path (Union[str, Path]): 文件路径
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path: Path = Path(path)
+
+    def __repr__(self) -> str:
+        return f"FileExporter(path={str(self.path)!r})"
+
+    async def export(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False) + "\n"
+        await asyncio.get_running_loop().run_in_executor(None, self._write, line)
+
+    async def close(self) -> None:
+        pass
+
+    def _write(self, line: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write(line)
+
+
+class OtlpExporter:
+    """通过 OTLP/HTTP (JSON) 将 Span 发送给 OpenTelemetry Collector
+
+    Args:
+        endpoint (str): Collector 的 traces 接口，如 `http://localhost:4318/v1/traces`
+        headers (Optional[Dict[str, str]]): 额外的请求头
+        timeout (float): 请求超时时间（秒）
+    """
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0) -> None:
+        self.endpoint: str = endpoint
+        self.headers: Dict[str, str] = dict(headers or {})
+        self.timeout: float = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def __repr__(self) -> str:
+        return f"OtlpExporter(endpoint={self.endpoint!r})"
+
+    async def export(self, payload: Dict[str, Any]) -> None:
+        # 使用单独的会话，导出请求本身不会被追踪
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        async with self._session.post(self.endpoint, json=payload, headers=self.headers) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"Collector 返回 {response.status}: {await response.text()}")
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class Tracer:
+    """兼容 OpenTelemetry 的轻量追踪器
+
+    生成 W3C Trace Context 格式的 trace id 与 span id，按 `sample_ratio` 对根 Span 采样，子 Span 跟随父 Span 的采样结果。
+    结束的 Span 先放在内存中，由后台任务每 `flush_interval` 秒（或攒够 `batch_size` 个时）交给导出器，
+    缓冲区超过 `max_queue` 个时丢弃新的 Span。`exporter` 为 None 时不记录任何 Span。
+
+    ```python
+    with client.tracer.span("weather.fetch", attributes={"city": city}):
+        ...
+    ```
+
+    Args:
+        exporter (Optional[Union[FileExporter, OtlpExporter]]): 导出器
+        sample_ratio (float): 根 Span 的采样比例，0~1
+        service_name (str): 导出时的 service.name
+        batch_size (int): 每次导出的最多 Span 数
+        flush_interval (float): 导出间隔（秒）
+        max_queue (int): 等待导出的最多 Span 数
+    """
+
+    def __init__(
+            self,
+            exporter: Optional[Union[FileExporter, OtlpExporter]] = None,
+            sample_ratio: float = 1.0,
+            service_name: str = "qq-bot",
+            batch_size: int = 512,
+            flush_interval: float = 5.0,
+            max_queue: int = 10000
+    ) -> None:
+        self.exporter = exporter
+        self.sample_ratio: float = sample_ratio
+        self.service_name: str = service_name
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_queue: int = max_queue
+
+        self.started: int = 0
+        self.exported: int = 0
+        self.dropped: int = 0
+        self.failures: int = 0
+
+        self._buffer: List[Span] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __repr__(self) -> str:
+        return f"Tracer(exporter={self.exporter!r}, sample_ratio={self.sample_ratio})"
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_ratio > 0
+
+    def start_span(
+            self,
+            name: str,
+            kind: int = INTERNAL,
+            attributes: Optional[Dict[str, Any]] = None,
+            root: bool = False
+    ) -> Union[Span, _NonRecordingSpan]:
+        """创建 Span，父 Span 为当前上下文中的 Span，需要手动调用 `end`
+
+        Args:
+            name (str): 名称
+            kind (int): 类型，如 `SERVER`、`CLIENT`
+            attributes (Optional[Dict[str, Any]]): 属性
+            root (bool): 是否忽略当前上下文，开始一个新的 trace
+        """
+        if not self.enabled:
+            return NON_RECORDING_SPAN
+        parent = None if root else current_span.get()
+        if parent is None:
+            if self.sample_ratio < 1 and random.random() >= self.sample_ratio:
+                return NON_RECORDING_SPAN
+            trace_id, parent_id = os.urandom(16).hex(), None
+        elif not parent.recording:
+            return NON_RECORDING_SPAN
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        self.started += 1
+        return Span(self, name, kind, trace_id, parent_id, attributes)
+
+    @contextmanager
+    def span(
+            self,
+            name: str,
+            kind: int = INTERNAL,
+            attributes: Optional[Dict[str, Any]] = None,
+            root: bool = False
+    ) -> Iterator[Union[Span, _NonRecordingSpan]]:
+        """创建 Span 并设置为当前上下文中的 Span，退出时结束，参数说明见 `start_span`"""
+        span = self.start_span(name, kind, attributes, root)
+        token = current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """为每个 http 请求创建 CLIENT 类型的 Span，并通过 traceparent 请求头传递 trace"""
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        return trace
+
+    def start(self) -> None:
+        """启动定期导出的后台任务，需要在事件循环中调用"""
+        if self.enabled and self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_forever())
+
+    async def flush(self) -> None:
+        """立即导出所有结束的 Span"""
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            try:
+                await self.exporter.export(self._payload(batch))
+                self.exported += len(batch)
+            except Exception as e:
+                self.failures += 1
+                self.dropped += len(batch)
+                logger.warning(f"导出 {len(batch)} 个 Span {Colors.red}失败！{Colors.escape} {e}")
+
+    async def close(self) -> None:
+        """导出剩余的 Span 并关闭导出器"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self.exporter is not None:
+            await self.flush()
+            await self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "pending": len(self._buffer),
+        }
+
+    def _finish(self, span: Span) -> None:
+        if len(self._buffer) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _flush_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "qq-botpy-template"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    async def _on_request_start(self, session, ctx, params) -> None:
+        span = self.start_span(f"HTTP {params.method}", CLIENT, {
+            "http.request.method": params.method,
+            "url.full": str(params.url),
+            "server.address": params.url.host,
+        })
+        ctx.span = span
+        if span.recording:
+            params.headers["traceparent"] = span.traceparent
+
+    async def _on_request_end(self, session, ctx, params) -> None:
+        status = params.response.status
+        ctx.span.set_attribute("http.response.status_code", status)
+        if status >= 400:
+            ctx.span.set_status(STATUS_ERROR, f"HTTP {status}")
+        ctx.span.end()
+
+    async def _on_request_exception(self, session, ctx, params) -> None:
+        ctx.span.record_exception(params.exception)
+        ctx.span.end()
+
+
+def create_tracer(
+        exporter: str = "none",
+        file_path: Union[str, Path] = "logs/traces.jsonl",
+        endpoint: str = "http://localhost:4318/v1/traces",
+        **kwargs
+) -> Tracer:
+    """根据名称创建追踪器
+
+    Args:
+        exporter (str): `none`（不追踪）、`file`（写入文件）或 `otlp`（发送给 Collector）
+        file_path (Union[str, Path]): `file` 导出器的文件路径
+        endpoint (str): `otlp` 导出器的地址
+        **kwargs: 传给 `Tracer` 的其他参数
+    """
+    if exporter == "none":
+        return Tracer(None, **kwargs)
+    if exporter == "file":
+        return Tracer(FileExporter(file_path), **kwargs)
+    if exporter == "otlp":
+        return Tracer(OtlpExporter(endpoint), **kwargs)
+    raise ValueError(f"未知的追踪导出器: {exporter}")
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            result.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            result.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            result.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            result.append({"key": key, "value": {"stringValue": str(value)}})
+    return result
@@ -0,0 +1,309 @@
+"""事件分发基准测试
+
+不连接网关，直接构造 `BotClient` 与合成插件，测量：
+- 不同插件数量下各类事件的分发开销（所有响应器都处理 / 第一个响应器拦截事件）
+- `PluginManager.prepare_plugins` 与 `load_all_plugins` 在 10/100/1000 个合成插件时的耗时
+- `BotClient.register` 注册单个响应器的耗时与占用的内存
+
+日志级别会调到 WARNING，测量的是框架本身的开销。所有指标都是越小越好，
+结果可以保存为 JSON，并与之前保存的基准结果比较，变慢超过阈值时以非零状态码退出：
+
+    python -m benchmarks.dispatch --output bench.json
+    python -m benchmarks.dispatch --baseline bench.json --threshold 0.25
+
+每项取多次运行中最快的一次，比较结果时尽量在空闲的机器上运行，并使用同一台机器保存的基准结果。
+"""
+import gc
+import sys
+import json
+import time
+import types
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import botpy
+
+from config import Config
+
+
+DISPATCH_EVENTS = ("on_at_message_create", "on_guild_member_update", "on_interaction_create")
+PLUGIN_COUNTS = (1, 10, 100)
+LOAD_COUNTS = (10, 100, 1000)
+
+_PLUGIN_SOURCE = '''from app.interface import HandlerInterface
+
+
+class Handler(HandlerInterface):
+    priority = {priority}
+    name = "{name}"
+
+    async def on_at_message_create(self, client, message):
+        return False
+
+
+__handler__ = Handler
+'''
+
+
+class _Handler:
+    """合成响应器，`stop` 为 True 时拦截事件，不再向之后的响应器传递"""
+
+    dependencies = ()
+    batch_size = None
+    batch_latency = None
+
+    def __init__(self, name: str, priority: int, stop: bool = False) -> None:
+        self.name = name
+        self.priority = priority
+        self.stop = stop
+
+    async def _handle(self, client, event) -> bool:
+        return self.stop
+
+    on_at_message_create = _handle
+    on_guild_member_update = _handle
+    on_interaction_create = _handle
+
+
+def _event(i: int) -> types.SimpleNamespace:
+    # 包含去重、限流与按钮路由会读取的字段，每个事件的id与用户都不同
+    return types.SimpleNamespace(
+        id=f"message-{i}",
+        event_id=f"event-{i}",
+        author=types.SimpleNamespace(id=f"user-{i}"),
+        channel_id="channel",
+        guild_id="guild",
+        content=f"message {i}",
+        user=types.SimpleNamespace(id=f"user-{i}"),
+        data=types.SimpleNamespace(resolved=types.SimpleNamespace(button_id=None)),
+    )
+
+
+class _NoGC:
+    """计时期间关闭垃圾回收，与 timeit 相同，避免回收的时机影响结果"""
+
+    def __enter__(self) -> None:
+        gc.collect()
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc) -> None:
+        if self.enabled:
+            gc.enable()
+
+
+def _best(func: Callable[[], float], repeat: int) -> float:
+    return min(func() for _ in range(repeat))
+
+
+class Benchmark:
+    """在临时目录中运行所有基准测试，日志、存储与会话文件都写在临时目录中
+
+    运行期间修改的 `Config`、`sys.path` 与日志级别在结束后恢复，临时目录与合成插件模块会被删除，
+    因此可以在其他程序中导入并调用 `main`。
+
+    Args:
+        quick (bool): 减少迭代次数，用于快速检查
+    """
+
+    def __init__(self, quick: bool = False) -> None:
+        self.quick: bool = quick
+        self.events: int = 2000 if quick else 20000
+        self.repeat: int = 3 if quick else 5
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.root: Optional[Path] = None
+        self._packages: int = 0
+
+    def record(self, name: str, value: float, unit: str) -> None:
+        self.results[name] = {"value": value, "unit": unit}
+        print(f"{name:<52}{value:12.2f} {unit}")
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        from launcher import BotHost, logger
+        directory = tempfile.TemporaryDirectory(prefix="botpy-bench-")
+        self.root = Path(directory.name)
+        overrides = {
+            "log_path": str(self.root / "logs" / "botpy.jsonl"),
+            "storage_path": str(self.root / "storage.db"),
+            "session_path": str(self.root / "session.json"),
+            "cache_socket_path": str(self.root / "cache.sock"),
+            "cache_backend": "local",
+            "accounting_enabled": False,
+        }
+        config = {name: getattr(Config, name) for name in overrides}
+        path = list(sys.path)
+        level = logger.level
+        try:
+            for name, value in overrides.items():
+                setattr(Config, name, value)
+            sys.path.insert(0, str(self.root))
+            logger.setLevel(logging.WARNING)
+            self.host = BotHost([{"appid": "benchmark", "token": "benchmark"}], intents=botpy.Intents.none())
+            try:
+                await self.dispatch()
+                self.load()
+                self.register()
+                self.memory()
+            finally:
+                await self.host.storage.close()
+                await self.host.pool.close()
+                await self.host.cache.close()
+                self.host.log_sink.close()
+        finally:
+            for name, value in config.items():
+                setattr(Config, name, value)
+            sys.path[:] = path
+            sys.path_importer_cache.pop(str(self.root), None)
+            for name in [name for name in sys.modules if name.startswith("synthetic_")]:
+                del sys.modules[name]
+            logger.setLevel(level)
+            directory.cleanup()
+        return self.results
+
+    def client(self):
+        from launcher import BotClient
+        client = BotClient(intents=botpy.Intents.none(), host=self.host, name="benchmark")
+        client._connection = types.SimpleNamespace(state=types.SimpleNamespace(robot=types.SimpleNamespace(name="benchmark")))
+        return client
+
+    async def dispatch(self) -> None:
+        for count in PLUGIN_COUNTS:
+            for mode in ("all", "first"):
+                for event_name in DISPATCH_EVENTS:
+                    # 每项使用新的机器人，去重与限流的记录不会从上一项累积过来
+                    client = self.client()
+                    for i in range(count):
+                        client.register(_Handler(f"plugin{i}", priority=count - i, stop=mode == "first"))
+                    await client.on_ready()
+                    method = getattr(client, event_name)
+                    # 所有响应器都处理时耗时与插件数量成正比，相应减少事件数
+                    total = max(self.events // count, 200) if mode == "all" else self.events
+                    offset = 0
+
+                    async def once() -> float:
+                        nonlocal offset
+                        events = [_event(offset + i) for i in range(total)]
+                        offset += total
+                        with _NoGC():
+                            start = time.perf_counter()
+                            for event in events:
+                                await method(event)
+                            return (time.perf_counter() - start) / total
+
+                    best = min([await once() for _ in range(self.repeat)])
+                    self.record(f"dispatch.{event_name}.plugins={count}.{mode}", best * 1e6, "us/event")
+
+    def _synthetic_plugins(self, count: int) -> Path:
+        # 每次使用新的包名，避免命中已经导入的模块
+        self._packages += 1
+        package = self.root / f"synthetic_{count}_{self._packages}"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        for i in range(count):
+            (package / f"plugin{i}.py").write_text(_PLUGIN_SOURCE.format(priority=i, name=f"plugin{i}"))
+        return package
+
+    def load(self) -> None:
+        from app.manager import PluginManager
+        for count in LOAD_COUNTS:
+            prepare, load = [], []
+            for _ in range(1 if count >= 1000 and self.quick else self.repeat):
+                package = self._synthetic_plugins(count)
+                client = self.client()
+                with _NoGC():
+                    start = time.perf_counter()
+                    manager = PluginManager(client, self.root, plugins=None, search_path=[str(package)])
+                    prepare.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    manager.load_all_plugins()
+                    load.append(time.perf_counter() - start)
+                assert len(client.handlers["on_at_message_create"]) == count
+            self.record(f"plugins.prepare_plugins.plugins={count}", min(prepare) * 1000, "ms")
+            self.record(f"plugins.load_all_plugins.plugins={count}", min(load) * 1000, "ms")
+
+    def register(self) -> None:
+        count = 1000
+
+        def once() -> float:
+            client = self.client()
+            handlers = [_Handler(f"plugin{i}", priority=i) for i in range(count)]
+            with _NoGC():
+                start = time.perf_counter()
+                for handler in handlers:
+                    client.register(handler)
+                return (time.perf_counter() - start) / count
+
+        self.record("register.per_handler", _best(once, self.repeat) * 1e6, "us")
+
+    def memory(self) -> None:
+        count = 1000
+        client = self.client()
+        handlers = [_Handler(f"plugin{i}", priority=i) for i in range(count)]
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for handler in handlers:
+            client.register(handler)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        self.record("register.memory_per_handler", size / count, "bytes")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """与基准结果比较，返回变慢（或内存增加）超过阈值的指标
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): 本次结果
+        baseline (Dict[str, Dict[str, Any]]): 基准结果
+        threshold (float): 允许的相对增长，如 0.25 表示 25%
+    """
+    regressions = []
+    print(f"\n{'指标':<50}{'基准':>12}{'本次':>12}{'变化':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  <- 退化"
+        print(f"{name:<52}{old:12.2f}{new:12.2f}{change:+10.1%}{flag}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="事件分发基准测试")
+    parser.add_argument("--output", help="将结果保存为 JSON 文件")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的相对增长，超过时视为退化，默认 0.25")
+    parser.add_argument("--quick", action="store_true", help="减少迭代次数")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(Benchmark(args.quick).run())
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "quick": args.quick,
+            "results": results,
+        }, ensure_ascii=False, indent=2))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项指标退化超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""连接池基准测试
+
+在本地启动一个桩服务器，分别使用 botpy 默认的连接设置（每个请求新建连接）与 `PooledHttp` 的连接池发送请求，
+比较请求延迟与连接复用情况。
+
+    python -m benchmarks.http_pool [请求数] [并发数]
+"""
+import sys
+import time
+import asyncio
+import statistics
+
+import aiohttp
+from aiohttp import web, TCPConnector
+
+from app.http import PooledHttp
+
+
+async def _stub(request: web.Request) -> web.Response:
+    return web.json_response({"id": "1", "content": "ok"})
+
+
+async def _run(session: aiohttp.ClientSession, url: str, total: int, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            async with session.get(url) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def _summary(name: str, latencies: list) -> str:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return f"{name:<10} mean {statistics.mean(latencies) * 1000:7.3f} ms  p50 {p50:7.3f} ms  p99 {p99:7.3f} ms"
+
+
+async def main(total: int = 2000, concurrency: int = 20) -> None:
+    app = web.Application()
+    app.router.add_get("/", _stub)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    async with aiohttp.ClientSession(connector=TCPConnector(limit=500, force_close=True)) as session:
+        default = await _run(session, url, total, concurrency)
+    http = PooledHttp(timeout=5, limit=concurrency)
+    async with http.create_session() as session:
+        pooled = await _run(session, url, total, concurrency)
+    await runner.cleanup()
+
+    print(_summary("default", default))
+    print(_summary("pooled", pooled))
+    stats = http.stats()
+    print(
+        f"pooled: 新建连接 {stats['connections_created']}, 复用 {stats['connections_reused']}, "
+        f"复用率 {stats['reuse_ratio']:.1%}, 饱和度 {stats['saturation']:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*map(int, sys.argv[1:3])))
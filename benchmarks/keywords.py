@@ -0,0 +1,82 @@
+"""关键词匹配基准测试
+
+随机生成关键词与消息，比较逐个 `in` 检查、正则表达式多选与 `KeywordMatcher` 的匹配耗时，
+以及修改关键词后重新构建自动机的耗时。
+
+    python -m benchmarks.keywords [关键词数] [消息数]
+"""
+import re
+import sys
+import time
+import random
+
+from app.keywords import KeywordMatcher
+
+
+_CHARS = "的一是不了人我在有他这为之大来以个中上们到说国和地也子时道出而要于就下得可你年生" + "abcdefghijklmnopqrstuvwxyz"
+
+
+def _word(rng: random.Random, low: int, high: int) -> str:
+    return "".join(rng.choice(_CHARS) for _ in range(rng.randint(low, high)))
+
+
+def _timeit(func, messages: list) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return (time.perf_counter() - start) / len(messages)
+
+
+def main(total: int = 10000, count: int = 2000) -> None:
+    rng = random.Random(0)
+    keywords = list({_word(rng, 3, 8) for _ in range(total)})
+    messages = [_word(rng, 20, 200) for _ in range(count)]
+    # 一部分消息中插入关键词，保证两种结果都有
+    for i in range(0, count, 4):
+        position = rng.randint(0, len(messages[i]))
+        messages[i] = messages[i][:position] + rng.choice(keywords) + messages[i][position:]
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    matcher.contains("")
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    pattern = re.compile("|".join(map(re.escape, keywords)))
+    compile_regex = time.perf_counter() - start
+
+    lowered = [keyword.lower() for keyword in keywords]
+
+    def naive_contains(text: str) -> bool:
+        text = text.lower()
+        return any(keyword in text for keyword in lowered)
+
+    def naive_search(text: str) -> list:
+        text = text.lower()
+        return [keyword for keyword in lowered if keyword in text]
+
+    naive = _timeit(naive_contains, messages)
+    naive_all = _timeit(naive_search, messages)
+    regex = _timeit(lambda text: pattern.search(text) is not None, messages)
+    automaton = _timeit(matcher.contains, messages)
+    automaton_all = _timeit(matcher.search, messages)
+
+    assert all(
+        matcher.contains(text) == naive_contains(text) for text in messages
+    )
+
+    start = time.perf_counter()
+    matcher.replace(keywords[:-10] + [_word(rng, 3, 8) for _ in range(10)])
+    matcher.contains("")
+    rebuild = time.perf_counter() - start
+
+    print(f"{len(keywords)} 个关键词, {count} 条消息 (平均 {sum(map(len, messages)) / count:.0f} 字)")
+    print(f"构建自动机   {build * 1000:9.1f} ms    编译正则  {compile_regex * 1000:9.1f} ms")
+    print(f"修改 20 个关键词后重建 {rebuild * 1000:.1f} ms")
+    print(f"{'':<16}{'是否命中':>12}{'找出全部':>12}")
+    print(f"{'逐个 in 检查':<14}{naive * 1e6:10.1f} us{naive_all * 1e6:10.1f} us")
+    print(f"{'正则多选':<14}{regex * 1e6:10.1f} us{'-':>12}")
+    print(f"{'KeywordMatcher':<16}{automaton * 1e6:10.1f} us{automaton_all * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -18,3 +18,96 @@ class Config:
 
     appid = "your_id"                               # 机器人id
     token = "your_token"                            # 机器人令牌
+    # 在同一个进程中运行多个机器人时填写，如 [{"name": "bot1", "appid": "...", "token": "..."}]，为空时只运行上面的机器人
+    bots = []                                       # 机器人列表，所有机器人共用插件、存储与连接池
+
+    # 限流设置，以 (用户, 频道, 响应器) 为单位分别计算，默认关闭
+    cooldown_rate = 0                               # 令牌恢复速度（个/秒），为 0 时不限流，如 1.0
+    cooldown_burst = 5                              # 令牌桶容量，即允许连续发送的消息数
+    dedup_window = 0                                # 相同内容的消息在该时间窗口（秒）内只处理一次，为 0 时不去重，如 10.0
+    throttle_maxsize = 100000                       # 最多保存的限流记录数，超出后淘汰最久未活动的记录
+
+    # 事件去重设置，用于丢弃断线重连后平台重复下发的事件
+    dedup_capacity = 100000                         # 记录的最近事件id数量
+    dedup_ttl = 3600                                # 事件id的记录时间（秒）
+
+    # 插件存储设置，插件通过 client.storage.namespace(插件名称) 读写数据
+    storage_path = "data/storage.db"                # 数据库文件路径，相对于 launcher.py 所在的文件夹
+    storage_flush_interval = 0.05                   # 批量写入数据库的间隔时间（秒）
+
+    # 退出设置
+    shutdown_timeout = 10.0                         # 退出时等待正在处理的事件完成的最长时间（秒）
+
+    # 会话恢复设置，重启时使用上次保存的会话 resume，而不是重新 identify
+    session_path = "data/session.json"              # 会话文件路径，相对于 launcher.py 所在的文件夹
+    session_save_interval = 5.0                     # 定期保存会话的间隔时间（秒）
+    session_max_age = 300                           # 保存的会话超过该时间（秒）后不再尝试恢复
+
+    # 日志设置，日志在后台线程中以 JSON Lines 格式写入文件
+    log_path = "logs/botpy.jsonl"                   # 日志文件路径，相对于 launcher.py 所在的文件夹
+    log_max_bytes = 10 * 1024 * 1024                # 单个日志文件的最大字节数，超出后轮换
+    log_backup_count = 5                            # 保留的旧日志文件数量
+    log_compress = True                             # 是否使用 gzip 压缩旧日志文件
+
+    # 群发设置，插件通过 client.broadcaster.broadcast 向大量子频道发送消息
+    broadcast_concurrency = 8                       # 每个群发任务的最大并发数
+    broadcast_rate = 5.0                            # 每种接口每秒允许的请求数
+    broadcast_burst = 5                             # 每种接口允许的突发请求数
+
+    # http 连接池设置，所有 client.api 的请求共用同一个连接池
+    http_pool_limit = 100                           # 连接池的最大连接数
+    http_pool_limit_per_host = 0                    # 每个主机的最大连接数，为 0 时不限制
+    http_keepalive_timeout = 30                     # 空闲连接的保持时间（秒）
+    http_dns_cache_ttl = 300                        # DNS 缓存时间（秒）
+
+    # 准入控制设置，过载时优先保证 @机器人、私信、互动等需要回应的事件，事件类别见 app/admission.py
+    admission_lag_threshold = 0.1                   # 事件循环延迟阈值（秒），超过时视为过载
+    admission_depth_threshold = 200                 # 待处理事件数阈值，超过时视为过载
+    admission_max_delay = 2.0                       # 过载时普通事件最多延迟的时间（秒），超时后丢弃
+    admission_interval = 0.05                       # 测量事件循环延迟的间隔（秒）
+
+    # 缓存设置，框架缓存（如 client.cached_api）与插件数据通过 client.cache 读写
+    cache_backend = "local"                         # local: 进程内; socket: 同一台机器的多个进程共享; redis: 需要安装 redis
+    cache_maxsize = 10000                           # 最多缓存的条目数（local/socket）
+    cache_ttl = 300                                 # 默认缓存时间（秒）
+    cache_socket_path = "data/cache.sock"           # socket 缓存的路径，相对于 launcher.py 所在的文件夹
+    cache_redis_url = "redis://localhost:6379/0"    # redis 缓存的地址
+
+    # 资源统计设置，按插件统计创建的 asyncio 任务与未释放的内存，用于定位内存泄漏，统计结果见 client.host.accounting.stats()
+    accounting_enabled = False                      # 是否开启，开启后 tracemalloc 会明显降低运行速度
+    accounting_interval = 60.0                      # 内存采样间隔（秒）
+    accounting_frames = 10                          # tracemalloc 记录的调用栈深度
+    accounting_memory_threshold = 50 * 1024 * 1024  # 插件内存比第一次采样增长超过该值（字节）时告警
+    accounting_task_threshold = 1000                # 插件存活的任务数超过该值时告警
+
+    # 按钮回调设置，插件通过 client.interactions 注册按钮id对应的回调
+    interaction_tick = 1.0                          # 临时回调淘汰的时间精度（秒）
+    interaction_slots = 3600                        # 时间轮的槽数量，tick * slots 以内的有效期只需要检查一次
+
+    # 事件合并设置，响应器实现 on_forum_debounced 等方法时，同一实体的连续更新事件会合并成一批，事件组见 app/debounce.py
+    debounce_window = 2.0                           # 实体多久没有新事件后处理（秒）
+    debounce_max_wait = 10.0                        # 实体持续收到事件时最多等待多久（秒）
+
+    # 批量接口设置，响应器实现 on_message_create_batch 等批量接口时，事件攒够数量或等待超时后一起处理
+    batch_max_size = 100                            # 每批最多的事件数
+    batch_max_latency = 1.0                         # 事件最多等待多久（秒）
+
+    # 音频状态设置，框架根据音频事件维护 client.audio 中各子频道的播放与上下麦状态
+    audio_queue_grace = 1.0                         # 播放结束后多久（秒）没有开始新的音频时视为队列播放完毕
+    audio_mic_idle_timeout = 300.0                  # 上麦后多久（秒）没有播放时视为空闲
+
+    # 链路追踪设置，为每个事件、响应器与 api 请求记录 OpenTelemetry 兼容的 Span
+    tracing_exporter = "none"                       # none: 不追踪; file: 写入文件; otlp: 发送给 OpenTelemetry Collector
+    tracing_sample_ratio = 1.0                      # 事件的采样比例，0~1
+    tracing_file_path = "logs/traces.jsonl"         # file 导出器的文件路径，相对于 launcher.py 所在的文件夹
+    tracing_otlp_endpoint = "http://localhost:4318/v1/traces"  # otlp 导出器的地址 (OTLP/HTTP JSON)
+    tracing_service_name = "qq-bot"                 # 导出时的 service.name
+
+    # 频道插件设置，在指定的频道中停用插件，也可以在运行时通过 client.guild_plugins 修改（修改会保存在插件存储中）
+    guild_disabled_plugins = {}                     # 频道id -> 停用的插件名称列表，如 {"123456": ["Echo"]}
+
+    # 管理控制台设置，通过 Unix socket 查看统计、调整日志级别与超时时间、重新加载插件，使用 python launcher.py --admin help 查看命令
+    admin_enabled = False                           # 是否开启
+    admin_socket_path = "data/admin.sock"           # socket 文件路径，相对于 launcher.py 所在的文件夹
+    admin_profile_dir = "logs"                      # profile 命令保存结果的文件夹
+    handler_timeouts = {}                           # 插件名称 -> 响应器处理单个事件的超时时间（秒），如 {"Echo": 10}
@@ -1,37 +1,71 @@
+from __future__ import annotations
+
 import os
 import sys
+import time
 import botpy
+import signal
+import asyncio
 
 from pathlib import Path
+from functools import partial
+from contextlib import AsyncExitStack
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
 
-from botpy.message import Message, DirectMessage, MessageAudit
-from botpy.reaction import Reaction
-from botpy.guild import Guild
-from botpy.channel import Channel
-from botpy.user import Member
-from botpy.interaction import Interaction
-from botpy.forum import Thread
-from botpy.types.forum import Post, Reply, AuditResult
-from botpy.audio import Audio
+from botpy.api import BotAPI
 
 from config import Config
-from app import HandlerInterface, Colors, load_all_plugins
+from app import HandlerInterface, Colors, Throttle, EventDeduplicator, Storage, SessionStore, AsyncLogSink, TemplateRegistry, Broadcaster, PooledHttp, ConnectionPool, AdmissionController, LagMonitor, ADMIT, SHED, Scheduler, create_cache, KeywordRegistry, ResourceAccountant, InteractionRouter, Route, Debouncer, EventBatch, DEBOUNCE_GROUPS, MicroBatcher, AudioTracker, AudioSession, AUDIO_EVENTS, create_tracer, current_span, SERVER, CONSUMER, GuildPlugins, guild_of, AdminConsole, admin_request, current_plugin, load_all_plugins, plugin_ready_waves
+
+# 以下类型只用于注解，不在启动时导入
+if TYPE_CHECKING:
+    from botpy.message import Message, DirectMessage, MessageAudit
+    from botpy.reaction import Reaction
+    from botpy.guild import Guild
+    from botpy.channel import Channel
+    from botpy.user import Member
+    from botpy.interaction import Interaction
+    from botpy.forum import Thread
+    from botpy.types.forum import Post, Reply, AuditResult
+    from botpy.audio import Audio
 
 
 logger = botpy.logging.get_logger()
+launcher_path = Path(os.path.dirname(os.path.abspath(__file__))).resolve()
+# botpy 将上下麦事件分发为 on_on_mic / on_off_mic，与其他音频事件的命名不一致
+EVENT_ALIASES = {"on_mic": "audio_on_mic", "off_mic": "audio_off_mic"}
 
 
 class BotClient(botpy.Client):
-    """全局对象，用来管理所有插件的响应器
+    """单个机器人，用来管理所有插件的响应器
 
     Args:
         botpy (botpy.Client): Client基类
+        host (BotHost): 运行该机器人的宿主，提供共用的存储与连接池
+        name (str): 机器人名称，用来区分同一进程中的多个机器人
     """
 
-    def __init__(self, *args, **kwargs) -> None:
+    def __init__(self, *args, host: BotHost, name: str = "default", **kwargs) -> None:
+        # 不使用 botpy 默认的同步文件日志，改为由 AsyncLogSink 在后台线程写入
+        kwargs.setdefault("ext_handlers", False)
         super().__init__(*args, **kwargs)
+        self.host = host
+        self.name = name
+        self.tracer = host.tracer
+        # 替换 botpy 默认的 http 会话，使用长连接与所有机器人共用的连接池
+        self.http = PooledHttp(
+            timeout=self.http.timeout,
+            is_sandbox=self.http.is_sandbox,
+            pool=host.pool,
+            trace_configs=[self.tracer.trace_config()] if self.tracer.enabled else []
+        )
+        self.api = BotAPI(http=self.http)
+        # 多个机器人时，会话文件与群发进度按机器人名称分开保存
+        suffix = f".{name}" if len(host.bots) > 1 else ""
         self.all_apis = (
             "on_ready",
+            "on_shutdown",
             "on_at_message_create",
             "on_public_message_delete",
             "on_message_create",
@@ -63,11 +97,231 @@ class BotClient(botpy.Client):
             "on_audio_start",
             "on_audio_finish",
             "on_audio_on_mic",
-            "on_audio_off_mic"
+            "on_audio_off_mic",
+            *DEBOUNCE_GROUPS
         )
         self.handlers = {}
         for api in self.all_apis:
             self.handlers[api] = []
+        self.batchers = {}
+        self.plugins = {}
+        self.dependencies = {}
+        # 插件名称 -> 响应器处理单个事件的超时时间（秒），可以通过管理控制台在运行时修改
+        self.handler_timeouts = dict(Config.handler_timeouts)
+        self.timed_out = Counter()
+        self._plugin_ready = {}
+        self.throttle = Throttle(
+            rate=Config.cooldown_rate,
+            burst=Config.cooldown_burst,
+            dedup_window=Config.dedup_window,
+            maxsize=Config.throttle_maxsize
+        )
+        self.admission = AdmissionController(
+            lag_threshold=Config.admission_lag_threshold,
+            depth_threshold=Config.admission_depth_threshold,
+            max_delay=Config.admission_max_delay,
+            monitor=host.lag_monitor
+        )
+        self.dedup = EventDeduplicator(capacity=Config.dedup_capacity, ttl=Config.dedup_ttl)
+        self.storage = host.storage
+        self.cache = host.cache
+        self.keywords = host.keywords
+        self.templates = TemplateRegistry()
+        self.broadcaster = Broadcaster(
+            self.api,
+            self.storage.namespace("__broadcast__" + suffix),
+            concurrency=Config.broadcast_concurrency,
+            rate=Config.broadcast_rate,
+            burst=Config.broadcast_burst
+        )
+        self.guild_plugins = GuildPlugins(
+            self.handlers,
+            self.storage.namespace("__guild_plugins__" + suffix),
+            defaults=Config.guild_disabled_plugins
+        )
+        self.scheduler = Scheduler()
+        self.interactions = InteractionRouter(tick=Config.interaction_tick, slots=Config.interaction_slots)
+        self.audio = AudioTracker(
+            self._notify_audio,
+            queue_grace=Config.audio_queue_grace,
+            mic_idle_timeout=Config.audio_mic_idle_timeout
+        )
+        self.debouncer = Debouncer(self._flush_debounced, window=Config.debounce_window, max_wait=Config.debounce_max_wait)
+        session_path = launcher_path / Config.session_path
+        self.session_store = SessionStore(
+            session_path.with_name(session_path.stem + suffix + session_path.suffix),
+            max_age=Config.session_max_age
+        )
+        self.accepting = True
+        self.dropped_events = 0
+        self._initialized = False
+        self._sessions = {}
+        self._session_saver = None
+        self._inflight = set()
+
+    async def bot_connect(self, session) -> None:
+        """建立网关连接，分片第一次连接时尝试使用上次保存的会话 resume，失败时 botpy 会自动改为 identify"""
+        shard_id = session["shards"]["shard_id"]
+        if shard_id not in self._sessions:
+            self._sessions[shard_id] = session
+            if self.session_store.restore(session["token"].app_id, session):
+                logger.info(f"分片 {shard_id} 将尝试恢复上次的会话 (seq: {session['last_seq']})")
+        if self._session_saver is None:
+            self._session_saver = self.loop.create_task(self._persist_sessions())
+        self.scheduler.start()
+        await super().bot_connect(session)
+
+    def _save_sessions(self) -> None:
+        if not self._sessions:
+            return
+        try:
+            appid = next(iter(self._sessions.values()))["token"].app_id
+            self.session_store.save(appid, self._sessions.values())
+        except OSError as e:
+            logger.error(f"{Colors.red}保存会话失败！{Colors.escape} {e}")
+
+    async def _persist_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(Config.session_save_interval)
+            self._save_sessions()
+
+    def ws_dispatch(self, event: str, *args, **kwargs) -> None:
+        if not self.accepting:
+            self.dropped_events += 1
+            return
+        event = EVENT_ALIASES.get(event, event)
+        event_name = "on_" + event
+        # 事件的根 Span 从收到事件开始，到处理完成或被丢弃时结束，处理事件的任务会继承它
+        span = self.tracer.start_span(event_name, SERVER, {"bot.name": self.name, "bot.event": event_name}, root=True)
+        token = current_span.set(span)
+        try:
+            decision = self.admission.decide(event_name, self._queue_depth())
+            span.set_attribute("bot.admission", decision)
+            if decision is SHED:
+                logger.debug(f"负载过高，丢弃事件 {Colors.light_blue}{event_name}{Colors.escape}", extra={"event": event_name})
+                span.end()
+                return
+            if decision is not ADMIT:
+                task = self.loop.create_task(self._dispatch_later(event, *args, **kwargs))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+                return
+            self._ws_dispatch(event, span, *args, **kwargs)
+        finally:
+            current_span.reset(token)
+
+    async def _dispatch_later(self, event: str, *args, **kwargs) -> None:
+        event_name = "on_" + event
+        span = current_span.get()
+        if not await self.admission.wait(event_name, self._queue_depth):
+            logger.debug(f"负载过高，丢弃延迟的事件 {Colors.light_blue}{event_name}{Colors.escape}", extra={"event": event_name})
+            span.set_attribute("bot.admission", "shed")
+            span.end()
+        elif not self.accepting:
+            self.dropped_events += 1
+            span.end()
+        else:
+            self._ws_dispatch(event, span, *args, **kwargs)
+
+    def _ws_dispatch(self, event: str, span, *args, **kwargs) -> None:
+        # botpy 对没有对应方法的事件只记录日志，不会创建任务，根 Span 需要在这里结束
+        if not hasattr(self, "on_" + event):
+            span.set_attribute("bot.handled", False)
+            span.end()
+            return
+        super().ws_dispatch(event, *args, **kwargs)
+
+    def _queue_depth(self) -> int:
+        # 正在等待准入的事件不计入待处理事件数
+        return len(self._inflight) - self.admission.waiting
+
+    def _schedule_event(self, coro, event_name: str, *args, **kwargs) -> asyncio.Task:
+        task = super()._schedule_event(coro, event_name, *args, **kwargs)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        span = current_span.get()
+        if span is not None and span.recording:
+            task.add_done_callback(lambda _: span.end())
+        return task
+
+    async def shutdown(self, timeout: float = None) -> None:
+        """优雅退出：停止接收新事件并取消定时任务，在限定时间内等待正在处理的事件完成，
+        然后调用各插件的 `on_shutdown`，等待群发任务保存进度，最后关闭连接。
+        共用的插件存储与日志由 `BotHost.shutdown` 在所有机器人停止后关闭
+
+        Args:
+            timeout (float): 等待事件处理完成的最长时间（秒），默认为 `Config.shutdown_timeout`
+        """
+        timeout = Config.shutdown_timeout if timeout is None else timeout
+        start = time.perf_counter()
+        self.accepting = False
+        # 此时记录的 seq 之后的事件都没有处理，下次启动 resume 时会重新下发
+        self._save_sessions()
+        if self._session_saver is not None:
+            self._session_saver.cancel()
+        self.audio.close()
+        await self.scheduler.close()
+
+        # 等待合并的事件立即处理，之后处理完的事件不再合并
+        self.debouncer.close()
+
+        inflight = len(self._inflight)
+        # 等待期间完成的事件可能产生新的任务（如合并后的事件），直到没有任务或超时
+        while self._inflight:
+            remaining = timeout - (time.perf_counter() - start)
+            _, pending = await asyncio.wait(set(self._inflight), timeout=max(remaining, 0))
+            if pending:
+                for task in pending:
+                    task.cancel()
+                self.dropped_events += len(pending)
+                break
+        # 缓冲区中还没有处理的批量事件立即处理
+        batchers = [batcher for batchers in self.batchers.values() for batcher in batchers]
+        if batchers:
+            try:
+                remaining = timeout - (time.perf_counter() - start)
+                await asyncio.wait_for(asyncio.gather(*(batcher.close() for batcher in batchers)), timeout=max(remaining, 0))
+            except asyncio.TimeoutError:
+                logger.error(f"等待批量事件处理完成{Colors.red}超时！{Colors.escape}")
+        drained = time.perf_counter() - start
+
+        for handler in self.handlers["on_shutdown"]:
+            # 共用的响应器实例由最后一个退出的机器人调用 on_shutdown
+            if not self.host.release_handler(self.plugins[handler[1]]):
+                continue
+            try:
+                current_plugin.set(handler[1])
+                await asyncio.wait_for(handler[2](self), timeout=timeout)
+            except Exception:
+                logger.error(f"插件 {Colors.yellow}{handler[1]}{Colors.escape} 的 on_shutdown {Colors.red}执行失败！{Colors.escape}")
+        await self.broadcaster.close(timeout=timeout)
+
+        logger.info(
+            f"机器人 「{Colors.green}{self.name}{Colors.escape}」 已停止，用时 {Colors.green}{time.perf_counter() - start:.3f}{Colors.escape} 秒"
+            f" (等待 {inflight} 个事件处理完成用时 {drained:.3f} 秒)，"
+            f"丢弃事件 {Colors.red}{self.dropped_events}{Colors.escape} 个"
+        )
+        await self.close()
+
+    async def cached_api(self, route: str, ttl: float = None, **kwargs):
+        """调用 `client.api` 中的查询接口，并将结果保存在共用的缓存中，
+        配置了 socket 或 redis 缓存时，多个进程会共用查询结果
+
+        ```python
+        guild = await client.cached_api("get_guild", guild_id=message.guild_id)
+        ```
+
+        Args:
+            route (str): `BotAPI` 的方法名，如 `get_guild`、`get_channel`
+            ttl (float): 缓存时间（秒），默认为 `Config.cache_ttl`
+            **kwargs: 传给接口的参数
+        """
+        key = "api:" + route + ":" + ",".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+        result = await self.cache.get(key)
+        if result is None:
+            result = await getattr(self.api, route)(**kwargs)
+            await self.cache.set(key, result, ttl)
+        return result
 
     def register(self, handler: HandlerInterface) -> None:
         """注册响应器
@@ -77,16 +331,333 @@ class BotClient(botpy.Client):
         """
         for api in self.all_apis:
             if hasattr(handler, api):
-                self.handlers[api].append((handler.priority, handler.name, getattr(handler, api)))
+                # 替换而不是修改列表，正在分发的事件继续使用原来的列表
+                self.handlers[api] = [*self.handlers[api], (handler.priority, handler.name, getattr(handler, api))]
+            if hasattr(handler, api + "_batch"):
+                self.batchers.setdefault(api, []).append(MicroBatcher(
+                    partial(self._dispatch_batch, api, handler.name, getattr(handler, api + "_batch")),
+                    max_size=handler.batch_size or Config.batch_max_size,
+                    max_latency=handler.batch_latency or Config.batch_max_latency,
+                    name=f"{handler.name}.{api}_batch"
+                ))
+        self.plugins[handler.name] = handler
+        self.dependencies[handler.name] = tuple(handler.dependencies)
+        self.host.acquire_handler(handler)
+        if self.host.accounting is not None:
+            self.host.accounting.register(handler)
+        self._plugin_ready.setdefault(handler.name, asyncio.Event())
+
+    async def unregister(self, name: str, shutdown: bool = True) -> None:
+        """注销插件：不再向它分发事件，处理完缓冲区中的批量事件，
+        删除它注册的按钮回调、音频回调与定时任务，最后调用它的 `on_shutdown`
+
+        Args:
+            name (str): 插件名称
+            shutdown (bool): 是否调用 `on_shutdown`，没有初始化过的插件不需要
+        """
+        handler = self.plugins.pop(name, None)
+        if handler is None:
+            raise ValueError(f"没有找到插件: {name}")
+        for api in self.all_apis:
+            self.handlers[api] = [item for item in self.handlers[api] if item[1] != name]
+        self.guild_plugins.rebuild()
+        self.debouncer.enable(group for group in DEBOUNCE_GROUPS if self.handlers[group])
+        batchers = []
+        for api in list(self.batchers):
+            batchers += [batcher for batcher in self.batchers[api] if batcher.name == f"{name}.{api}_batch"]
+            self.batchers[api] = [batcher for batcher in self.batchers[api] if batcher.name != f"{name}.{api}_batch"]
+        await asyncio.gather(*(batcher.close() for batcher in batchers))
+        self.interactions.unregister_plugin(name)
+        self.audio.unsubscribe_plugin(name)
+        for job_name, job in list(self.scheduler.jobs.items()):
+            if job.plugin == name:
+                self.scheduler.cancel(job_name)
+        self.dependencies.pop(name, None)
+        ready = self._plugin_ready.pop(name, None)
+        if ready is not None:
+            # 唤醒还在等待它初始化的事件
+            ready.set()
+        if self.host.release_handler(handler) and shutdown and hasattr(handler, "on_shutdown"):
+            try:
+                current_plugin.set(name)
+                await asyncio.wait_for(handler.on_shutdown(self), timeout=Config.shutdown_timeout)
+            except Exception:
+                logger.error(f"插件 {Colors.yellow}{name}{Colors.escape} 的 on_shutdown {Colors.red}执行失败！{Colors.escape}")
+
+    async def reload_plugin(self, name: str, handler: HandlerInterface) -> None:
+        """运行时替换插件：注销旧的插件，注册新的响应器并执行它的 `on_ready`
+
+        Args:
+            name (str): 旧插件的名称
+            handler (HandlerInterface): 新的响应器
+        """
+        await self.unregister(name)
+        self.register(handler)
+        self._sort_handlers()
+        ready = next((item for item in self.handlers["on_ready"] if item[1] == handler.name), None)
+        await self._ready_plugin(handler.name, ready)
+
+    def _sort_handlers(self) -> None:
+        for api in self.all_apis:
+            self.handlers[api] = sorted(self.handlers[api], key=lambda x: x[0])
+        # 按排序后的响应器重新生成各频道的响应器列表
+        self.guild_plugins.rebuild()
+        self.debouncer.enable(group for group in DEBOUNCE_GROUPS if self.handlers[group])
+
+    def stats(self) -> Dict[str, Any]:
+        """返回各组件的运行统计"""
+        return {
+            "plugins": len(self.plugins),
+            "queue_depth": self._queue_depth(),
+            "inflight": len(self._inflight),
+            "dropped_events": self.dropped_events,
+            "timed_out": dict(self.timed_out),
+            "throttle": self.throttle.stats(),
+            "dedup": self.dedup.stats(),
+            "admission": self.admission.stats(),
+            "http": self.http.stats(),
+            "scheduler": self.scheduler.stats(),
+            "broadcaster": self.broadcaster.stats(),
+            "interactions": self.interactions.stats(),
+            "debouncer": self.debouncer.stats(),
+            "batchers": {batcher.name: batcher.stats() for batchers in self.batchers.values() for batcher in batchers},
+            "audio": self.audio.stats(),
+            "guild_plugins": self.guild_plugins.stats(),
+        }
 
     async def on_ready(self) -> None:
         """机器人准备好时调用"""
-        for api in self.all_apis:
-            self.handlers[api].sort(key=lambda x: x[0])
-        for handler in self.handlers["on_ready"]:
-            await handler[2](self)
+        waves = plugin_ready_waves(self.dependencies)
+        ordered = {name for wave in waves for name in wave}
+        for name in [name for name in self.plugins if name not in ordered]:
+            # 存在循环依赖的插件无法决定初始化顺序，不加载它们
+            await self.unregister(name, shutdown=False)
+        self._sort_handlers()
+        await self.guild_plugins.load()
+        ready_handlers = {handler[1]: handler for handler in self.handlers["on_ready"]}
+        for wave in waves:
+            await asyncio.gather(*(self._ready_plugin(name, ready_handlers.get(name)) for name in wave))
+        self._initialized = True
         logger.info(f"机器人 「{Colors.green}{self.robot.name}{Colors.escape}」 加载完成!")
 
+    async def on_resumed(self) -> None:
+        """会话恢复时调用，如果是启动后直接恢复了上次的会话，则不会收到 READY 事件，需要在这里完成初始化"""
+        if not self._initialized:
+            await self.on_ready()
+
+    async def _ready_plugin(self, name: str, handler) -> None:
+        """执行单个响应器的 on_ready，完成后（即使出错）才开始向它分发事件"""
+        try:
+            if handler is not None:
+                current_plugin.set(name)
+                # 共用的响应器实例也会对每个机器人执行一次，模板、定时任务等注册在各个机器人自己的组件中
+                await handler[2](self)
+        except Exception:
+            logger.exception(f"响应器 {Colors.yellow}{name}{Colors.escape} 初始化{Colors.red}失败！{Colors.escape}")
+        finally:
+            ready = self._plugin_ready.get(name)
+            if ready is not None:
+                ready.set()
+
+    async def _dispatch(self, func_name: str, event, route: Optional[Route] = None) -> None:
+        """将事件按优先级依次交给响应器处理
+
+        Args:
+            func_name (str): 事件名称
+            event: 事件对象
+            route (Optional[Route]): 按钮对应的回调，会在所有响应器之前处理
+        """
+        key = self.dedup.event_key(func_name, event)
+        if key is not None and self.dedup.is_duplicate(key):
+            logger.info(f"丢弃重复事件 {Colors.light_blue}{func_name}{Colors.escape} ({key})", extra={"event": func_name})
+            return
+        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!", extra={"event": func_name})
+        if func_name in AUDIO_EVENTS:
+            # 先更新音频状态，响应器中查询到的是事件之后的状态
+            self.audio.update(func_name, event)
+        self.debouncer.add(func_name, event)
+        for batcher in self.batchers.get(func_name, ()):
+            batcher.add(event)
+        if route is not None and await self._handle(func_name, event, route.plugin, route.callback):
+            return
+        # 只调用在事件所属频道中启用的插件
+        for handler in self.guild_plugins.chain(func_name, guild_of(func_name, event)):
+            if await self._handle(func_name, event, handler[1], handler[2], handler[0]):
+                break
+
+    async def _handle(self, func_name: str, event, name: Optional[str], method, priority: Optional[int] = None) -> bool:
+        """经过初始化等待、限流与超时控制后，将事件交给单个响应器或按钮回调处理
+
+        Args:
+            func_name (str): 事件名称
+            event: 事件对象
+            name (Optional[str]): 插件名称，不属于任何插件的按钮回调为 None
+            method: 响应器接口或按钮回调
+            priority (Optional[int]): 响应器优先级，按钮回调为 None
+
+        Returns:
+            (bool): 是否拦截事件，不再交给优先级更低的响应器
+        """
+        # 按钮回调不一定是插件实例的方法，只检查插件是否还在
+        if name is not None and not await self._wait_ready(name, method if priority is not None else None):
+            return False
+        if name is not None and not self.throttle.allow(name, event, func_name):
+            # 被限流的响应器视为拦截了事件，不会交给优先级更低的响应器
+            logger.debug(
+                f"事件被 {Colors.yellow}{name}{Colors.escape} 的限流规则丢弃",
+                extra={"event": func_name, "handler": name}
+            )
+            return True
+        if priority is None:
+            logger.info(
+                f"事件将被 {Colors.yellow}{name}{Colors.escape} 的按钮回调处理...",
+                extra={"event": func_name, "handler": name}
+            )
+        else:
+            logger.info(
+                f"事件将被 {Colors.yellow}{name}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{priority}{Colors.escape})...",
+                extra={"event": func_name, "handler": name, "priority": priority}
+            )
+        # 响应器中创建的任务会继承当前插件名，用于资源统计
+        current_plugin.set(name)
+        timeout = self.handler_timeouts.get(name)
+        attributes = {"bot.plugin": str(name)}
+        if priority is not None:
+            attributes["bot.priority"] = priority
+        with self.tracer.span(f"{name}.{func_name}", attributes=attributes) as span:
+            if timeout is None:
+                do_continue = await method(self, event)
+            else:
+                try:
+                    do_continue = await asyncio.wait_for(method(self, event), timeout)
+                except asyncio.TimeoutError:
+                    # 超时的响应器视为没有拦截事件，继续交给之后的响应器
+                    self.timed_out[name] += 1
+                    logger.error(
+                        f"{Colors.yellow}{name}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 处理超过 {timeout} 秒，{Colors.red}已取消！{Colors.escape}",
+                        extra={"event": func_name, "handler": name}
+                    )
+                    do_continue = False
+            span.set_attribute("bot.stop", bool(do_continue))
+        return bool(do_continue)
+
+    async def _wait_ready(self, name: str, method=None) -> bool:
+        """等待插件初始化完成，返回是否仍然可以调用它的响应器
+
+        事件开始分发时取得的响应器列表不会随注销或重新加载插件而改变，
+        插件已经注销，或 `method` 属于重新加载前的旧实例时返回 False，不再调用
+
+        Args:
+            name (str): 插件名称
+            method: 响应器接口，为 None 时只检查插件是否还在
+        """
+        ready = self._plugin_ready.get(name)
+        if ready is not None and not ready.is_set():
+            await ready.wait()
+        plugin = self.plugins.get(name)
+        return plugin is not None and (method is None or getattr(method, "__self__", plugin) is plugin)
+
+    async def _dispatch_batch(self, func_name: str, name: str, method, events: List) -> None:
+        """将一批事件交给响应器的批量接口处理，跳过插件停用的频道中的事件
+
+        Args:
+            func_name (str): 事件名称
+            name (str): 响应器名称
+            method: 响应器的批量接口，如 `on_message_create_batch`
+            events (List): 按收到顺序排列的事件对象
+        """
+        events = [event for event in events if self.guild_plugins.enabled(guild_of(func_name, event), name)]
+        if not events:
+            return
+        # 注销插件时会先处理完缓冲区中的事件，此时插件已经不在 plugins 中，不需要检查
+        ready = self._plugin_ready.get(name)
+        if ready is not None and not ready.is_set():
+            await ready.wait()
+        current_plugin.set(name)
+        logger.info(
+            f"{Colors.light_blue}{len(events)}{Colors.escape} 个事件将被 {Colors.yellow}{name}{Colors.escape}.{Colors.light_blue}{method.__name__}{Colors.escape} 批量处理",
+            extra={"handler": name, "batch": len(events)}
+        )
+        with self.tracer.span(f"{name}.{method.__name__}", CONSUMER, {"bot.plugin": name, "bot.batch_size": len(events)}, root=True):
+            await method(self, events)
+
+    def _notify_audio(self, transition: str, session: AudioSession) -> None:
+        task = self.loop.create_task(self._dispatch_audio(transition, session))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch_audio(self, transition: str, session: AudioSession) -> None:
+        """将音频状态变化交给订阅的回调处理
+
+        Args:
+            transition (str): 状态变化名称，如 `queue_empty`
+            session (AudioSession): 子频道的音频状态
+        """
+        logger.info(
+            f"子频道 {session.channel_id} 音频状态变化 {Colors.light_blue}{transition}{Colors.escape}",
+            extra={"event": transition}
+        )
+        for callback, plugin in self.audio.subscribers(transition):
+            if not self.guild_plugins.enabled(session.guild_id, plugin):
+                continue
+            if plugin is not None:
+                ready = self._plugin_ready.get(plugin)
+                if ready is not None and not ready.is_set():
+                    await ready.wait()
+                current_plugin.set(plugin)
+            try:
+                with self.tracer.span(f"{plugin}.{transition}", attributes={"bot.plugin": str(plugin), "bot.channel_id": session.channel_id}):
+                    await callback(self, session)
+            except Exception:
+                logger.exception(f"插件 {Colors.yellow}{plugin}{Colors.escape} 的 {transition} 回调{Colors.red}执行失败！{Colors.escape}")
+
+    def _flush_debounced(self, func_name: str, batch: EventBatch) -> None:
+        task = self.loop.create_task(self._dispatch_debounced(func_name, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch_debounced(self, func_name: str, batch: EventBatch) -> None:
+        """将合并后的事件按优先级依次交给响应器处理
+
+        Args:
+            func_name (str): 合并后的事件名称，如 `on_forum_debounced`
+            batch (EventBatch): 同一个实体的一批事件
+        """
+        logger.info(
+            f"收到合并后的事件 {Colors.light_blue}{func_name}{Colors.escape} ({batch.key}，共 {len(batch)} 个事件)",
+            extra={"event": func_name}
+        )
+        # 合并的事件属于同一个实体，按最后一个事件所属的频道选择响应器
+        for handler in self.guild_plugins.chain(func_name, guild_of(*batch.events[-1])):
+            if not await self._wait_ready(handler[1], handler[2]):
+                continue
+            current_plugin.set(handler[1])
+            try:
+                with self.tracer.span(f"{handler[1]}.{func_name}", CONSUMER, {"bot.plugin": handler[1], "bot.batch_size": len(batch)}, root=True):
+                    do_continue = await handler[2](self, batch)
+            except Exception:
+                logger.exception(f"插件 {Colors.yellow}{handler[1]}{Colors.escape} 的 {func_name} {Colors.red}执行失败！{Colors.escape}")
+                continue
+            if do_continue:
+                break
+
+    async def _dispatch_interaction(self, func_name: str, interaction: Interaction) -> None:
+        """按钮id注册了回调时先交给对应的回调处理，回调没有拦截时再按优先级交给各响应器
+
+        Args:
+            func_name (str): 事件名称
+            interaction (Interaction): 互动事件
+        """
+        resolved = getattr(interaction.data, "resolved", None)
+        route = self.interactions.resolve(getattr(resolved, "button_id", None))
+        # 回调所属的插件在该频道中停用时，与没有注册回调的按钮一样处理
+        if route is not None and not self.guild_plugins.enabled(getattr(interaction, "guild_id", None), route.plugin):
+            route = None
+        span = current_span.get()
+        if route is not None and span is not None:
+            span.set_attribute("bot.button_id", resolved.button_id)
+        await self._dispatch(func_name, interaction, route)
+
     #############################################
     # 公域消息事件，需订阅事件 public_guild_messages
     #############################################
@@ -97,13 +668,7 @@ class BotClient(botpy.Client):
         Args:
             message (Message): 消息对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     async def on_public_message_delete(self, message: Message):
         """频道的消息被删除公域事件
@@ -111,13 +676,7 @@ class BotClient(botpy.Client):
         Args:
             message (Message): 消息对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
         
     #######################################################
     # 私域消息事件，仅私域机器人可用，需订阅事件 guild_messages
@@ -129,13 +688,7 @@ class BotClient(botpy.Client):
         Args:
             message (Message): 消息对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     async def on_message_delete(self, message: Message):
         """删除（撤回）消息事件
@@ -143,13 +696,7 @@ class BotClient(botpy.Client):
         Args:
             message (Message): 消息对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     ###################################
     # 私信事件，需订阅事件 direct_message
@@ -161,13 +708,7 @@ class BotClient(botpy.Client):
         Args:
             message (DirectMessage): 私信会话对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     async def on_direct_message_delete(self, message: DirectMessage):
         """私信删除（撤回）消息事件
@@ -175,13 +716,7 @@ class BotClient(botpy.Client):
         Args:
             message (DirectMessage): 私信会话对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     ##################################################
     # 消息相关互动事件，需订阅事件 guild_message_reactions
@@ -193,13 +728,7 @@ class BotClient(botpy.Client):
         Args:
             reaction (Reaction): 表情表态对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, reaction)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, reaction)
 
     async def on_message_reaction_remove(self, reaction: Reaction):
         """为消息删除表情表态事件
@@ -207,13 +736,7 @@ class BotClient(botpy.Client):
         Args:
             reaction (Reaction): 表情表态对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, reaction)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, reaction)
 
     ###########################
     # 频道事件，需订阅事件 guilds
@@ -225,13 +748,7 @@ class BotClient(botpy.Client):
         Args:
             guild (Guild): 频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, guild)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, guild)
 
     async def on_guild_update(self, guild: Guild):
         """guild资料发生变更事件
@@ -239,13 +756,7 @@ class BotClient(botpy.Client):
         Args:
             guild (Guild): 频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, guild)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, guild)
 
     async def on_guild_delete(self, guild: Guild):
         """机器人退出guild事件
@@ -253,13 +764,7 @@ class BotClient(botpy.Client):
         Args:
             guild (Guild): 频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, guild)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, guild)
     
     async def on_channel_create(self, channel: Channel):
         """channel被创建事件
@@ -267,13 +772,7 @@ class BotClient(botpy.Client):
         Args:
             channel (Channel): 子频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, channel)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, channel)
 
     async def on_channel_update(self, channel: Channel):
         """channel被更新事件
@@ -281,13 +780,7 @@ class BotClient(botpy.Client):
         Args:
             channel (Channel): 子频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, channel)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, channel)
 
     async def on_channel_delete(self, channel: Channel):
         """channel被删除事件
@@ -295,13 +788,7 @@ class BotClient(botpy.Client):
         Args:
             channel (Channel): 子频道对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, channel)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, channel)
 
     #####################################
     # 频道成员事件，需订阅事件 guild_members
@@ -313,13 +800,7 @@ class BotClient(botpy.Client):
         Args:
             member (Member): 成员对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, member)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, member)
 
     async def on_guild_member_update(self, member: Member):
         """成员资料发生变更事件
@@ -327,13 +808,7 @@ class BotClient(botpy.Client):
         Args:
             member (Member): 成员对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, member)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, member)
 
     async def on_guild_member_remove(self, member: Member):
         """成员被移除事件
@@ -341,13 +816,7 @@ class BotClient(botpy.Client):
         Args:
             member (Member): 成员对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, member)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, member)
 
     ################################
     # 互动事件，需订阅事件 interaction
@@ -359,13 +828,7 @@ class BotClient(botpy.Client):
         Args:
             interaction (Interaction): 互动事件
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, interaction)
-            if do_continue:
-                break
+        await self._dispatch_interaction(sys._getframe().f_code.co_name, interaction)
 
     #####################################
     # 消息审核事件，需订阅事件 message_audit
@@ -377,13 +840,7 @@ class BotClient(botpy.Client):
         Args:
             message (MessageAudit): 消息审核事件
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     async def on_message_audit_reject(self, message: MessageAudit):
         """消息审核不通过事件
@@ -391,13 +848,7 @@ class BotClient(botpy.Client):
         Args:
             message (MessageAudit): 消息审核事件
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, message)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, message)
 
     ##########################################
     # 论坛事件，仅私域机器人可用，需订阅事件 forums
@@ -409,13 +860,7 @@ class BotClient(botpy.Client):
         Args:
             thread (Thread): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, thread)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, thread)
 
     async def on_forum_thread_update(self, thread: Thread):
         """用户更新主题事件
@@ -423,13 +868,7 @@ class BotClient(botpy.Client):
         Args:
             thread (Thread): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, thread)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, thread)
 
     async def on_forum_thread_delete(self, thread: Thread):
         """用户删除主题事件
@@ -437,13 +876,7 @@ class BotClient(botpy.Client):
         Args:
             thread (Thread): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, thread)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, thread)
 
     async def on_forum_post_create(self, post: Post):
         """用户创建帖子事件
@@ -451,13 +884,7 @@ class BotClient(botpy.Client):
         Args:
             post (Post): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, post)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, post)
 
     async def on_forum_post_delete(self, post: Post):
         """用户删除帖子事件
@@ -465,13 +892,7 @@ class BotClient(botpy.Client):
         Args:
             post (Post): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, post)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, post)
 
     async def on_forum_reply_create(self, reply: Reply):
         """用户回复评论事件
@@ -479,13 +900,7 @@ class BotClient(botpy.Client):
         Args:
             reply (Reply): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, reply)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, reply)
 
     async def on_forum_reply_delete(self, reply: Reply):
         """用户删除评论事件
@@ -493,13 +908,7 @@ class BotClient(botpy.Client):
         Args:
             reply (Reply): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, reply)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, reply)
 
     async def on_forum_publish_audit_result(self, auditresult: AuditResult):
         """用户发表审核通过事件
@@ -507,13 +916,7 @@ class BotClient(botpy.Client):
         Args:
             auditresult (AuditResult): 论坛对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, auditresult)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, auditresult)
 
     ##############################
     # 音频事件，需订阅 audio_action
@@ -525,13 +928,7 @@ class BotClient(botpy.Client):
         Args:
             audio (Audio): 音频对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, audio)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, audio)
 
     async def on_audio_finish(self, audio: Audio):
         """音频播放结束事件
@@ -539,13 +936,7 @@ class BotClient(botpy.Client):
         Args:
             audio (Audio): 音频对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, audio)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, audio)
 
     async def on_audio_on_mic(self, audio: Audio):
         """上麦事件
@@ -553,13 +944,7 @@ class BotClient(botpy.Client):
         Args:
             audio (Audio): 音频对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, audio)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, audio)
 
     async def on_audio_off_mic(self, audio: Audio):
         """下麦事件
@@ -567,24 +952,200 @@ class BotClient(botpy.Client):
         Args:
             audio (Audio): 音频对象
         """
-        func_name = sys._getframe().f_code.co_name
-        logger.info(f"收到事件 {Colors.light_blue}{func_name}{Colors.escape}!")
-        for handler in self.handlers[func_name]:
-            logger.info(f"事件将被 {Colors.yellow}{handler[1]}{Colors.escape}.{Colors.light_blue}{func_name}{Colors.escape} 响应器处理 (优先级：{Colors.green}{handler[0]}{Colors.escape})...")
-            do_continue = await handler[2](self, audio)
-            if do_continue:
-                break
+        await self._dispatch(sys._getframe().f_code.co_name, audio)
+
+
+class BotHost:
+    """在同一个进程与事件循环中运行多个机器人
+
+    导入的插件模块、日志写入器、插件存储、缓存、关键词列表与 http 连接池由所有机器人共用，
+    每个机器人只额外持有自己的网关连接、响应器列表，以及限流、去重、回复模板等运行状态。
+    插件的 `__handler__` 为响应器实例时所有机器人共用这个实例（只执行一次 `on_ready` 与 `on_shutdown`），为响应器类时每个机器人各自创建一个实例。
+
+    Args:
+        bots (Iterable[Dict[str, str]]): 机器人列表，每项包含 `appid`、`token` 以及可选的名称 `name`
+        intents (botpy.Intents): 监听的事件类型
+    """
+
+    def __init__(self, bots: Iterable[Dict[str, str]], intents: botpy.Intents) -> None:
+        self.bots: List[Dict[str, str]] = [dict(bot, name=bot.get("name") or bot["appid"]) for bot in bots]
+        self.log_sink = AsyncLogSink(
+            launcher_path / Config.log_path,
+            max_bytes=Config.log_max_bytes,
+            backup_count=Config.log_backup_count,
+            compress=Config.log_compress
+        )
+        self.log_sink.install(logger)
+        self.storage = Storage(
+            launcher_path / Config.storage_path,
+            flush_interval=Config.storage_flush_interval
+        )
+        self.pool = ConnectionPool(
+            limit=Config.http_pool_limit,
+            limit_per_host=Config.http_pool_limit_per_host,
+            keepalive_timeout=Config.http_keepalive_timeout,
+            dns_cache_ttl=Config.http_dns_cache_ttl
+        )
+        self.cache = create_cache(
+            Config.cache_backend,
+            maxsize=Config.cache_maxsize,
+            ttl=Config.cache_ttl,
+            socket_path=launcher_path / Config.cache_socket_path,
+            redis_url=Config.cache_redis_url
+        )
+        self.keywords = KeywordRegistry()
+        # 所有机器人的准入控制共用一个事件循环延迟测量任务
+        self.lag_monitor = LagMonitor(interval=Config.admission_interval)
+        self.tracer = create_tracer(
+            Config.tracing_exporter,
+            file_path=launcher_path / Config.tracing_file_path,
+            endpoint=Config.tracing_otlp_endpoint,
+            sample_ratio=Config.tracing_sample_ratio,
+            service_name=Config.tracing_service_name
+        )
+        self.admin = AdminConsole(
+            self,
+            launcher_path / Config.admin_socket_path,
+            profile_dir=launcher_path / Config.admin_profile_dir
+        ) if Config.admin_enabled else None
+        self.accounting = ResourceAccountant(
+            interval=Config.accounting_interval,
+            frames=Config.accounting_frames,
+            memory_threshold=Config.accounting_memory_threshold,
+            task_threshold=Config.accounting_task_threshold
+        ) if Config.accounting_enabled else None
+        # 共用的响应器实例 -> 持有它的机器人数，共用的实例只由最后一个退出的机器人执行 on_shutdown
+        self._handler_users: Counter = Counter()
+        self.clients: List[BotClient] = [BotClient(intents=intents, host=self, name=bot["name"]) for bot in self.bots]
+        self.loop = self.clients[0].loop
+        self._main_task = None
+        self._shutdown_task = None
+
+    def __repr__(self) -> str:
+        return f"BotHost(bots={[bot['name'] for bot in self.bots]})"
+
+    def run(self) -> None:
+        """启动所有机器人，收到 SIGINT/SIGTERM 时执行 `shutdown` 优雅退出"""
+
+        async def runner():
+            async with AsyncExitStack() as stack:
+                for client in self.clients:
+                    await stack.enter_async_context(client)
+                self._main_task = asyncio.current_task()
+                if self.accounting is not None:
+                    self.accounting.start()
+                self.lag_monitor.start()
+                self.tracer.start()
+                if self.admin is not None:
+                    await self.admin.start()
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    try:
+                        self.loop.add_signal_handler(sig, self._on_signal)
+                    except NotImplementedError:
+                        pass
+                try:
+                    await asyncio.gather(*(self._start(client, bot) for client, bot in zip(self.clients, self.bots)))
+                except asyncio.CancelledError:
+                    pass
+                finally:
+                    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            self.loop.run_until_complete(runner())
+        except KeyboardInterrupt:
+            return
+
+    async def _start(self, client: BotClient, bot: Dict[str, str]) -> None:
+        # 单个机器人登录失败或断开时不影响其他机器人
+        try:
+            await client.start(bot["appid"], bot["token"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"机器人 「{Colors.green}{client.name}{Colors.escape}」 {Colors.red}运行出错！{Colors.escape}")
+
+    def _on_signal(self) -> None:
+        if self._shutdown_task is None:
+            logger.info(f"{Colors.yellow}收到退出信号，正在停止机器人...{Colors.escape}")
+            self._shutdown_task = self.loop.create_task(self.shutdown())
+        elif self._main_task is not None:
+            logger.info(f"{Colors.red}再次收到退出信号，强制停止！{Colors.escape}")
+            self._main_task.cancel()
+
+    def acquire_handler(self, handler: HandlerInterface) -> None:
+        """机器人注册响应器时调用，记录持有这个实例的机器人数"""
+        self._handler_users[id(handler)] += 1
+
+    def release_handler(self, handler: HandlerInterface) -> bool:
+        """机器人注销响应器或退出时调用，返回它是否是最后一个持有这个实例的机器人，由最后一个执行 `on_shutdown`"""
+        key = id(handler)
+        self._handler_users[key] -= 1
+        if self._handler_users[key] > 0:
+            return False
+        # 实例释放后 id 可能被新的实例复用
+        del self._handler_users[key]
+        return True
+
+    async def stats(self) -> Dict[str, Any]:
+        """返回各机器人与共用组件的运行统计"""
+        return {
+            "bots": {client.name: client.stats() for client in self.clients},
+            "storage": self.storage.stats(),
+            "cache": await self.cache.stats(),
+            "keywords": self.keywords.stats(),
+            "tracer": self.tracer.stats(),
+            "accounting": self.accounting.stats() if self.accounting is not None else None,
+        }
+
+    async def shutdown(self, timeout: float = None) -> None:
+        """关闭管理控制台并同时停止所有机器人，然后导出剩余的追踪数据、写入插件存储、关闭连接池与日志
+
+        Args:
+            timeout (float): 每个机器人等待事件处理完成的最长时间（秒），默认为 `Config.shutdown_timeout`
+        """
+        if self.admin is not None:
+            await self.admin.close()
+        await asyncio.gather(*(client.shutdown(timeout) for client in self.clients))
+        self.lag_monitor.close()
+        await self.tracer.close()
+        await self.storage.close()
+        await self.pool.close()
+        await self.cache.close()
+        if self.accounting is not None:
+            self.accounting.close()
+        await self.loop.run_in_executor(None, self.log_sink.close)
+        if self._main_task is not None:
+            self._main_task.cancel()
 
 
 if __name__ == "__main__":
-    try:
-        os.remove(os.path.dirname(__file__) + "/botpy.log")
-    except FileNotFoundError:
-        pass
-    client = BotClient(intents=Config.intents)
-    load_all_plugins(
-        client,
-        launcher_path=Path(os.path.dirname(os.path.abspath(__file__))).resolve(),
-        plugin_dir=[os.path.dirname(__file__) + '/app/plugins']
-    )
-    client.run(appid=Config.appid, token=Config.token)
+    if "--admin" in sys.argv:
+        # 向运行中的机器人的管理控制台发送命令，如 `python launcher.py --admin stats`
+        import json
+        command = " ".join(sys.argv[sys.argv.index("--admin") + 1:]) or "help"
+        try:
+            response = admin_request(launcher_path / Config.admin_socket_path, command)
+        except (FileNotFoundError, ConnectionRefusedError):
+            print("无法连接到管理控制台，请确认机器人正在运行，并在 config.py 中开启了 admin_enabled")
+            sys.exit(1)
+        print(json.dumps(response.get("result", response), ensure_ascii=False, indent=2))
+        sys.exit(0 if response["ok"] else 1)
+    if "--importtime" in sys.argv:
+        # 启动性能分析模式：在子进程中完成启动过程中的所有导入，然后按插件和模块汇总耗时
+        from app.importtime import profile_imports
+        print(profile_imports(__file__, plugin_packages=["app.plugins"], args=["--import-only"]))
+        sys.exit(0)
+    host = BotHost(Config.bots or [{"appid": Config.appid, "token": Config.token}], intents=Config.intents)
+    # 插件模块只会导入一次，之后的机器人直接注册已经导入的响应器
+    for client in host.clients:
+        load_all_plugins(
+            client,
+            launcher_path=Path(os.path.dirname(os.path.abspath(__file__))).resolve(),
+            plugin_dir=[os.path.dirname(__file__) + '/app/plugins']
+        )
+    if "--import-only" in sys.argv:
+        sys.exit(0)
+    host.run()
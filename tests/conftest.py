@@ -0,0 +1,19 @@
+import pytest
+
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """所有测试的日志、存储、会话与 socket 文件都写在临时目录中"""
+    monkeypatch.setattr(Config, "log_path", str(tmp_path / "logs" / "botpy.jsonl"))
+    monkeypatch.setattr(Config, "storage_path", str(tmp_path / "data" / "storage.db"))
+    monkeypatch.setattr(Config, "session_path", str(tmp_path / "data" / "session.json"))
+    monkeypatch.setattr(Config, "cache_socket_path", str(tmp_path / "data" / "cache.sock"))
+    monkeypatch.setattr(Config, "admin_socket_path", str(tmp_path / "data" / "admin.sock"))
+    monkeypatch.setattr(Config, "tracing_file_path", str(tmp_path / "logs" / "traces.jsonl"))
+    monkeypatch.setattr(Config, "cache_backend", "local")
+    monkeypatch.setattr(Config, "accounting_enabled", False)
+    monkeypatch.setattr(Config, "admin_enabled", False)
+    monkeypatch.setattr(Config, "tracing_exporter", "none")
+    return tmp_path
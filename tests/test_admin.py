@@ -0,0 +1,36 @@
+import stat
+import asyncio
+
+from app.admin import AdminConsole, admin_request
+from tests.test_plugins import Plugin
+from tests.utils import close_host, create_host
+
+
+def test_admin_console(tmp_path):
+    path = tmp_path / "admin.sock"
+
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        client.register(Plugin("Echo"))
+        await client.on_ready()
+        console = AdminConsole(host, path, profile_dir=tmp_path)
+        await console.start()
+        mode = stat.S_IMODE(path.stat().st_mode)
+        loop = asyncio.get_running_loop()
+        responses = [
+            await loop.run_in_executor(None, admin_request, path, command, 5)
+            for command in ("plugins", "timeout Echo 2", "timeout Echo 0", "unknown")
+        ]
+        await console.close()
+        await close_host(host)
+        return mode, responses, console
+
+    mode, (plugins, timeout, invalid, unknown), console = asyncio.run(main())
+    assert mode == 0o600
+    assert plugins["result"]["test"]["Echo"]["ready"] is True
+    assert plugins["result"]["test"]["Echo"]["events"] == ["on_ready", "on_shutdown", "on_at_message_create"]
+    assert timeout == {"ok": True, "result": {"test": {"Echo": 2.0}}}
+    assert not invalid["ok"] and not unknown["ok"]
+    assert console.errors == 2
+    assert not path.exists()
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.admission import ADMIT, DELAY, SHED, AdmissionController, LagMonitor
+from app.audio import AUDIO_EVENTS
+
+
+def test_audio_events_are_never_shed():
+    controller = AdmissionController(lag_threshold=0.1, depth_threshold=10)
+    assert controller.decide("on_message_reaction_add", 20) is SHED
+    assert controller.decide("on_guild_update", 15) is DELAY
+    for event_name in AUDIO_EVENTS:
+        assert controller.decide(event_name, 100) is ADMIT
+
+
+def test_delayed_events_wake_on_measurement():
+    async def main():
+        controller = AdmissionController(depth_threshold=10, max_delay=5.0, interval=0.01)
+        depth = 15
+        controller.start()
+        waiters = [asyncio.create_task(controller.wait("on_guild_update", lambda: depth)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        assert controller.waiting == 50
+        assert not any(waiter.done() for waiter in waiters)
+        depth = 0
+        results = await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        controller.close()
+        return results, controller
+
+    results, controller = asyncio.run(main())
+    assert all(results)
+    assert controller.waiting == 0
+
+
+def test_close_releases_waiters():
+    async def main():
+        controller = AdmissionController(depth_threshold=10, max_delay=0.2, interval=0.01)
+        controller.start()
+        waiter = asyncio.create_task(controller.wait("on_guild_update", lambda: 15))
+        await asyncio.sleep(0.03)
+        controller.close()
+        return await asyncio.wait_for(waiter, 1), controller
+
+    admitted, controller = asyncio.run(main())
+    assert not admitted
+    assert controller.shed["normal"] == 1
+
+
+def test_shared_monitor():
+    async def main():
+        monitor = LagMonitor(interval=0.01)
+        controllers = [AdmissionController(monitor=monitor) for _ in range(3)]
+        for controller in controllers:
+            controller.start()
+        assert not monitor.running
+        monitor.start()
+        await asyncio.sleep(0.03)
+        for controller in controllers:
+            controller.close()
+        running = monitor.running
+        monitor.close()
+        return running, controllers
+
+    running, controllers = asyncio.run(main())
+    assert running
+    assert all(controller.monitor is controllers[0].monitor for controller in controllers)
@@ -0,0 +1,155 @@
+import time
+import asyncio
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from botpy.http import Route
+from botpy.robot import Token
+
+from app.broadcast import Broadcaster
+from app.http import PooledHttp
+
+
+class MemoryNamespace:
+    """内存中的存储空间，`fail` 为 True 时写入失败"""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.data = {}
+        self.fail = fail
+
+    async def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def put(self, key, value):
+        if self.fail:
+            raise OSError("disk full")
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeAPI:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def post_message(self, channel_id, **payload):
+        await asyncio.sleep(0.005)
+        self.sent.append(channel_id)
+
+
+def _broadcaster(checkpoints=None, api=None):
+    return Broadcaster(api or FakeAPI(), checkpoints or MemoryNamespace(), concurrency=2, rate=1000, burst=1000)
+
+
+async def _collect(broadcaster, broadcast_id, channel_ids):
+    return [result async for result in broadcaster.broadcast(broadcast_id, {"content": "hi"}, channel_ids)]
+
+
+def test_broadcast_resumes_from_checkpoint():
+    async def main():
+        checkpoints = MemoryNamespace()
+        checkpoints.data["notice"] = {"done": 2, "extra": [4], "finished": False}
+        api = FakeAPI()
+        results = await _collect(_broadcaster(checkpoints, api), "notice", [str(i) for i in range(6)])
+        return api.sent, results, checkpoints.data["notice"]
+
+    sent, results, checkpoint = asyncio.run(main())
+    assert sorted(sent) == ["2", "3", "5"]
+    assert all(result.ok for result in results)
+    assert checkpoint["finished"]
+
+
+def test_failing_channel_source_is_raised():
+    def channel_ids():
+        yield "a"
+        yield "b"
+        raise ValueError("source broke")
+
+    async def main():
+        broadcaster = _broadcaster()
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(_collect(broadcaster, "notice", channel_ids()), 5)
+        return broadcaster
+
+    assert asyncio.run(main()).stats()["running"] == []
+
+
+def test_failing_checkpoint_is_raised():
+    async def main():
+        with pytest.raises(OSError):
+            await asyncio.wait_for(_collect(_broadcaster(MemoryNamespace(fail=True)), "notice", ["a", "b", "c"]), 5)
+
+    asyncio.run(main())
+
+
+def test_close_stops_queued_jobs():
+    async def main():
+        api = FakeAPI()
+        broadcaster = _broadcaster(api=api)
+        task = asyncio.create_task(_collect(broadcaster, "notice", [str(i) for i in range(100)]))
+        await asyncio.sleep(0.02)
+        await broadcaster.close(timeout=2)
+        await task
+        return api.sent
+
+    assert len(asyncio.run(main())) < 20
+
+
+class LocalRoute(Route):
+    """指向本地测试服务的路由"""
+
+    base = ""
+
+    @property
+    def url(self):
+        return self.base + self.path
+
+
+class HttpAPI:
+    """通过 PooledHttp 请求本地服务的发送接口，子频道id决定服务的响应"""
+
+    def __init__(self, http) -> None:
+        self.http = http
+
+    async def post_message(self, channel_id, **payload):
+        return await self.http.request(LocalRoute("POST", f"/{channel_id}"), json=payload)
+
+
+def test_retry_policy_against_local_server():
+    attempts = Counter()
+
+    async def handler(request):
+        channel_id = request.match_info["channel_id"]
+        attempts[channel_id] += 1
+        if channel_id == "slow":
+            await asyncio.sleep(1)
+        status = {"bad": 400, "down": 500, "limited": 429}.get(channel_id, 200)
+        return web.json_response({"message": channel_id, "id": "1"}, status=status)
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/{channel_id}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        LocalRoute.base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        http = PooledHttp(timeout=0.2)
+        http._token = Token("app", "secret")
+        http._token.access_token, http._token.expires_in = "token", time.time() + 3600
+        broadcaster = Broadcaster(HttpAPI(http), MemoryNamespace(), concurrency=5, rate=1000, burst=1000, retries=2)
+        results = await _collect(broadcaster, "notice", ["ok", "bad", "down", "limited", "slow"])
+        await http.close()
+        await http.pool.close()
+        await runner.cleanup()
+        return {result.channel_id: result for result in results}, broadcaster.stats()
+
+    results, stats = asyncio.run(main())
+    assert results["ok"].ok
+    assert {name for name, result in results.items() if not result.ok} == {"bad", "down", "limited", "slow"}
+    # 4xx 与超时不重试，5xx 与 429 重试到次数用完
+    assert attempts == Counter({"ok": 1, "bad": 1, "slow": 1, "down": 3, "limited": 3})
+    assert results["bad"].error.startswith("HTTP 400")
+    assert stats["sent"] == 1 and stats["failed"] == 4 and stats["retried"] == 4
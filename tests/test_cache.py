@@ -0,0 +1,111 @@
+import stat
+import asyncio
+
+import pytest
+
+from app.cache import LocalRedis, RedisCache, SocketCache, create_cache
+
+
+class BrokenRedis(LocalRedis):
+    """所有命令都失败的 Redis 客户端，模拟服务不可用"""
+
+    async def get(self, name):
+        raise OSError("connection refused")
+
+    async def set(self, name, value, px=None, ex=None):
+        raise OSError("connection refused")
+
+    async def delete(self, *names):
+        raise OSError("connection refused")
+
+    async def scan_iter(self, match="*"):
+        raise OSError("connection refused")
+        yield
+
+
+@pytest.mark.parametrize("backend", ["local", "redis-local"])
+def test_backend_roundtrip(backend):
+    async def main():
+        cache = create_cache(backend, ttl=60)
+        assert await cache.get("missing", "default") == "default"
+        await cache.set("a", {"value": [1, 2]})
+        await cache.set("b", "short", ttl=0.01)
+        await cache.set("c", 3)
+        assert await cache.get("a") == {"value": [1, 2]}
+        await asyncio.sleep(0.02)
+        assert await cache.get("b") is None
+        await cache.delete("a")
+        assert await cache.get("a") is None
+        await cache.clear()
+        assert await cache.get("c") is None
+        stats = await cache.stats()
+        await cache.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["backend"] == backend.split("-")[0]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["size"] == 0
+
+
+def test_redis_prefix_isolation():
+    async def main():
+        client = LocalRedis()
+        first = RedisCache(prefix="first:", client=client)
+        second = RedisCache(prefix="second:", client=client)
+        await first.set("key", 1)
+        await second.set("key", 2)
+        await first.clear()
+        return await first.get("key"), await second.get("key")
+
+    assert asyncio.run(main()) == (None, 2)
+
+
+def test_redis_errors_are_best_effort():
+    async def main():
+        cache = RedisCache(client=BrokenRedis())
+        await cache.set("key", 1)
+        value = await cache.get("key", "default")
+        await cache.delete("key")
+        await cache.clear()
+        return value, await cache.stats()
+
+    value, stats = asyncio.run(main())
+    assert value == "default"
+    assert stats["errors"] == 4
+    assert stats["size"] is None
+
+
+def test_redis_corrupt_value_is_a_miss():
+    async def main():
+        client = LocalRedis()
+        cache = RedisCache(prefix="bot:", client=client)
+        await client.set("bot:key", b"{not json")
+        value = await cache.get("key", "default")
+        return value, await cache.stats()
+
+    value, stats = asyncio.run(main())
+    assert value == "default"
+    assert stats["misses"] == 1 and stats["errors"] == 1
+
+
+def test_socket_cache_is_shared_and_taken_over(tmp_path):
+    async def main():
+        path = tmp_path / "cache.sock"
+        owner, other = SocketCache(path), SocketCache(path)
+        await owner.set("key", "value")
+        # 只有当前用户可以连接
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        shared = await other.get("key")
+        await other.set("other", 1)
+        from_owner = await owner.get("other")
+        await owner.close()
+        # 持有缓存的进程退出后由其他进程接替，缓存内容从空开始
+        await asyncio.sleep(0.01)
+        after = await other.get("key")
+        owner_now = other.owner
+        await other.close()
+        return shared, from_owner, after, owner_now
+
+    assert asyncio.run(main()) == ("value", 1, None, True)
@@ -0,0 +1,50 @@
+import types
+import asyncio
+
+from app.debounce import Debouncer
+from tests.test_plugins import Plugin
+from tests.utils import close_host, create_host
+
+
+def channel(channel_id: str) -> types.SimpleNamespace:
+    return types.SimpleNamespace(id=channel_id)
+
+
+def test_enable_replaces_groups():
+    async def main():
+        batches = []
+        debouncer = Debouncer(lambda name, batch: batches.append((name, batch.key, len(batch))), window=0.01)
+        debouncer.enable(["on_channel_update_debounced", "on_guild_update_debounced"])
+        added = [debouncer.add("on_channel_update", channel("c")), debouncer.add("on_channel_update", channel("c"))]
+        debouncer.enable(["on_guild_update_debounced"])
+        added.append(debouncer.add("on_channel_update", channel("c")))
+        # 关闭事件组前已经在合并中的批次仍然会处理
+        await asyncio.sleep(0.05)
+        debouncer.close()
+        return added, batches
+
+    added, batches = asyncio.run(main())
+    assert added == [True, True, False]
+    assert batches == [("on_channel_update_debounced", "c", 2)]
+
+
+def test_unregister_disables_unused_groups():
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        plugin = Plugin("Channels")
+
+        async def on_channel_update_debounced(client, batch):
+            plugin.calls.append(batch.key)
+
+        plugin.on_channel_update_debounced = on_channel_update_debounced
+        client.register(plugin)
+        await client.on_ready()
+        before = client.debouncer.add("on_channel_update", channel("c"))
+        await client.unregister("Channels")
+        after = client.debouncer.add("on_channel_update", channel("c"))
+        client.debouncer.close()
+        await close_host(host)
+        return before, after
+
+    assert asyncio.run(main()) == (True, False)
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.guilds import GuildPlugins
+from app.storage import Storage
+
+
+def test_settings_survive_reload(tmp_path):
+    handlers = {"on_at_message_create": [(0, "Echo", None), (1, "Audit", None)]}
+    defaults = {"default": ["Echo"], 42: ["Audit"]}
+
+    def names(guild_plugins, guild_id):
+        return [handler[1] for handler in guild_plugins.chain("on_at_message_create", guild_id)]
+
+    async def session(change):
+        storage = Storage(tmp_path / "storage.db")
+        guild_plugins = GuildPlugins(handlers, storage.namespace("guilds"), defaults)
+        await guild_plugins.load()
+        if change is not None:
+            await change(guild_plugins)
+        result = {guild_id: names(guild_plugins, guild_id) for guild_id in ("default", "42", "other")}
+        await storage.close()
+        return result
+
+    async def set_then_clear(guild_plugins):
+        await guild_plugins.disable("other", "Audit")
+        await guild_plugins.enable("other", "Audit")
+        await guild_plugins.disable("default", "Audit")
+        await guild_plugins.set("default", [])
+
+    async def main():
+        return await session(None), await session(set_then_clear), await session(None)
+
+    fresh, changed, reloaded = asyncio.run(main())
+    assert fresh == {"default": ["Audit"], "42": ["Echo"], "other": ["Echo", "Audit"]}
+    # 清空有默认设置的频道后，重启时不会恢复为默认设置
+    assert changed == reloaded == {"default": ["Echo", "Audit"], "42": ["Echo"], "other": ["Echo", "Audit"]}
@@ -0,0 +1,98 @@
+import types
+import asyncio
+
+from app.interaction import TimerWheel
+from tests.test_plugins import Plugin
+from tests.utils import close_host, create_host
+
+
+def interaction(event_id: str, button_id: str, guild_id: str = "guild") -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        event_id=event_id,
+        id=f"interaction-{event_id}",
+        guild_id=guild_id,
+        data=types.SimpleNamespace(resolved=types.SimpleNamespace(button_id=button_id)),
+    )
+
+
+class Buttons(Plugin):
+    """注册按钮回调，同时实现逐个与批量的互动事件接口"""
+
+    def __init__(self) -> None:
+        super().__init__("Buttons")
+        self.batches = []
+
+    async def on_ready(self, client) -> None:
+        client.interactions.register("stop", self.on_stop)
+        client.interactions.register("pass", self.on_pass)
+        client.interactions.register("slow", self.on_slow)
+
+    async def on_stop(self, client, event) -> bool:
+        self.calls.append(f"stop:{event.event_id}")
+        return True
+
+    async def on_pass(self, client, event) -> bool:
+        self.calls.append(f"pass:{event.event_id}")
+        return False
+
+    async def on_slow(self, client, event) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    async def on_interaction_create(self, client, event) -> bool:
+        self.calls.append(f"handler:{event.event_id}")
+        return True
+
+    async def on_interaction_create_batch(self, client, events) -> None:
+        self.batches.append([event.event_id for event in events])
+
+
+def test_routed_callbacks_share_the_handler_gate():
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        plugin = Buttons()
+        client.register(plugin)
+        client.handler_timeouts["Buttons"] = 0.05
+        await client.on_ready()
+        for event in (interaction("1", "stop"), interaction("2", "pass"), interaction("3", "slow"), interaction("1", "stop")):
+            await asyncio.wait_for(client._dispatch_interaction("on_interaction_create", event), 1)
+        await client.guild_plugins.disable("other", "Buttons")
+        await client._dispatch_interaction("on_interaction_create", interaction("4", "stop", guild_id="other"))
+        await asyncio.gather(*(batcher.close() for batchers in client.batchers.values() for batcher in batchers))
+        await close_host(host)
+        return client, plugin
+
+    client, plugin = asyncio.run(main())
+    # 拦截的回调不再交给响应器，没有拦截与超时的回调继续交给响应器，重复事件被丢弃
+    assert plugin.calls == ["stop:1", "pass:2", "handler:2", "handler:3"]
+    assert client.timed_out["Buttons"] == 1
+    # 停用插件的频道中的事件仍然会经过批量接口，由批量分发时过滤
+    assert plugin.batches == [["1", "2", "3"]]
+
+
+def test_timer_wheel_catch_up_matches_single_steps():
+    now = [0.0]
+
+    def build():
+        wheel = TimerWheel(tick=1.0, slots=8, timer=lambda: now[0])
+        for i, ttl in enumerate((1, 3, 8, 9, 15, 16, 17, 30)):
+            wheel.add(f"key{i}", ttl)
+        return wheel
+
+    stepped, jumped = build(), build()
+    expected = []
+    for second in range(1, 21):
+        now[0] = float(second)
+        expected += stepped.advance()
+    # 一次转过多圈与逐格转动的结果一致
+    assert sorted(jumped.advance()) == sorted(expected)
+    assert len(jumped) == len(stepped) == 1
+    now[0] = 30.0
+    assert jumped.advance() == ["key7"]
+
+    # 空闲很久之后转动也只检查一圈
+    now[0] = 0.0
+    wheel = build()
+    now[0] = 1e12
+    assert len(wheel.advance()) == 8 and len(wheel) == 0
@@ -0,0 +1,34 @@
+import pytest
+
+from app.keywords import KeywordMatcher, KeywordRegistry
+
+
+def test_search_mask_and_updates():
+    matcher = KeywordMatcher(["he", "she", "his", "hers"])
+    assert matcher.search("ushers") == [(1, "she"), (2, "he"), (2, "hers")]
+    assert matcher.first("a SHE b") == "she"
+    matcher.replace(["his", "bad"])
+    assert "she" not in matcher and "BAD" in matcher
+    assert matcher.mask("This is Bad") == "T*** is ***"
+    assert not matcher.contains("ushers")
+
+
+def test_case_folding_keeps_positions():
+    # 'İ'.lower() 的长度为 2，逐个字符转换时保持不变，匹配位置与原文一致
+    matcher = KeywordMatcher(["bad word"])
+    text = "İİ BAD word"
+    assert matcher.search(text) == [(3, "bad word")]
+    assert matcher.mask(text) == "İİ ********"
+    # 关键词与文本按同样的规则转换，大写的 Σ 在词尾也能匹配
+    assert KeywordMatcher(["οδοσ"]).contains("ΟΔΟΣ")
+
+
+def test_registry_rejects_mismatched_ignore_case():
+    registry = KeywordRegistry()
+    registry.set("banned", ["Bad"], ignore_case=False)
+    assert registry.contains("banned", "Bad") and not registry.contains("banned", "bad")
+    # 不指定时沿用已有的设置
+    registry.set("banned", ["Bad", "Worse"])
+    assert registry.get("banned").ignore_case is False
+    with pytest.raises(ValueError):
+        registry.get("banned", ignore_case=True)
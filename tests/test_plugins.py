@@ -0,0 +1,154 @@
+import types
+import asyncio
+from typing import Iterable, List
+
+from app.interface import HandlerInterface
+from tests.utils import close_host, create_host, message
+
+
+class Plugin(HandlerInterface):
+    """记录收到的事件与生命周期调用的响应器"""
+
+    def __init__(self, name: str, dependencies: Iterable[str] = (), priority: int = 0) -> None:
+        self._name = name
+        self._dependencies = tuple(dependencies)
+        self._priority = priority
+        self.calls: List[str] = []
+
+    @property
+    def priority(self) -> int:
+        return self._priority
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def dependencies(self) -> Iterable[str]:
+        return self._dependencies
+
+    async def on_ready(self, client) -> None:
+        self.calls.append("on_ready")
+
+    async def on_shutdown(self, client) -> None:
+        self.calls.append("on_shutdown")
+
+    async def on_at_message_create(self, client, event) -> bool:
+        self.calls.append(event.event_id)
+        return False
+
+
+def test_dependency_order():
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        order = []
+        for plugin in (Plugin("C", ["B"]), Plugin("B", ["A"]), Plugin("A")):
+            plugin.on_ready = lambda client, name=plugin.name: order.append(name) or asyncio.sleep(0)
+            client.register(plugin)
+        await client.on_ready()
+        await close_host(host)
+        return order
+
+    assert asyncio.run(main()) == ["A", "B", "C"]
+
+
+def test_dependency_cycle_is_not_loaded():
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        plugins = [Plugin("P", ["Q"]), Plugin("Q", ["P"]), Plugin("R", ["P"]), Plugin("S")]
+        for plugin in plugins:
+            client.register(plugin)
+        await asyncio.wait_for(client.on_ready(), 5)
+        await asyncio.wait_for(client._dispatch("on_at_message_create", message("e1")), 5)
+        await close_host(host)
+        return client, plugins
+
+    client, (p, q, r, s) = asyncio.run(main())
+    assert set(client.plugins) == {"S"}
+    assert set(client._plugin_ready) == {"S"}
+    assert [item[1] for item in client.handlers["on_at_message_create"]] == ["S"]
+    assert p.calls == q.calls == r.calls == []
+    assert s.calls == ["on_ready", "e1"]
+
+
+def test_shared_handler_lifecycle():
+    async def main():
+        host = create_host([{"appid": "a", "token": "a"}, {"appid": "b", "token": "b"}])
+        shared, own = Plugin("Shared"), [Plugin("Own"), Plugin("Own")]
+        for client, plugin in zip(host.clients, own):
+            client.register(shared)
+            client.register(plugin)
+        await asyncio.gather(*(client.on_ready() for client in host.clients))
+        await asyncio.gather(*(client._dispatch("on_at_message_create", message(f"e-{client.name}")) for client in host.clients))
+        for client in host.clients:
+            await client.unregister("Shared")
+            await client.unregister("Own")
+        await close_host(host)
+        return shared, own
+
+    shared, own = asyncio.run(main())
+    # on_ready 对每个机器人执行一次，on_shutdown 只由最后一个注销的机器人执行
+    assert shared.calls == ["on_ready", "on_ready", "e-a", "e-b", "on_shutdown"]
+    assert [plugin.calls for plugin in own] == [["on_ready", "e-a", "on_shutdown"], ["on_ready", "e-b", "on_shutdown"]]
+
+
+def test_reload_while_dispatching():
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        release = asyncio.Event()
+        slow, old, gone = Plugin("Slow", priority=0), Plugin("Reloaded", priority=1), Plugin("Gone", priority=2)
+
+        async def wait(client, event):
+            slow.calls.append(event.event_id)
+            await release.wait()
+            return False
+
+        slow.on_at_message_create = wait
+        for plugin in (slow, old, gone):
+            client.register(plugin)
+        await client.on_ready()
+        dispatch = asyncio.create_task(client._dispatch("on_at_message_create", message("e1")))
+        await asyncio.sleep(0)
+        new = Plugin("Reloaded", priority=1)
+        await client.reload_plugin("Reloaded", new)
+        await client.unregister("Gone")
+        release.set()
+        await asyncio.wait_for(dispatch, 1)
+        await client._dispatch("on_at_message_create", message("e2"))
+        await close_host(host)
+        return slow, old, new, gone
+
+    slow, old, new, gone = asyncio.run(main())
+    # 已经开始分发的事件不会交给已经关闭的旧实例或已经注销的插件
+    assert slow.calls == ["on_ready", "e1", "e2"]
+    assert old.calls == ["on_ready", "on_shutdown"]
+    assert gone.calls == ["on_ready", "on_shutdown"]
+    assert new.calls == ["on_ready", "e2"]
+
+
+def test_shared_echo_replies_with_each_bot():
+    from app.plugins.echo.echo import Echo
+
+    async def main():
+        host = create_host([{"appid": "a", "token": "a"}, {"appid": "b", "token": "b"}])
+        echo, replies = Echo(), []
+        for client in host.clients:
+
+            async def post_dms(client=client, **kwargs):
+                replies.append((client.name, kwargs["content"]))
+
+            client.api = types.SimpleNamespace(post_dms=post_dms)
+            client.register(echo)
+        await asyncio.gather(*(client.on_ready() for client in host.clients))
+        for client in host.clients:
+            await client._dispatch("on_direct_message_create", message(f"dm-{client.name}", content=f"hi {client.name}"))
+        for client in host.clients:
+            await client.unregister("Echo")
+        await close_host(host)
+        return replies
+
+    # 共用的实例在每个机器人上都注册了模板，回复中是各自的机器人名称
+    assert asyncio.run(main()) == [("a", "机器人a收到你的私信了: hi a"), ("b", "机器人b收到你的私信了: hi b")]
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.accounting import current_plugin
+from app.scheduler import CronExpression, Scheduler
+
+
+def test_cron_parsing():
+    cron = CronExpression("*/15 9-17/4 1,15 * 1-5")
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {9, 13, 17}
+    assert cron.days == {1, 15}
+    assert cron.months == set(range(1, 13))
+    # 转换为 datetime.weekday()，星期一为 0
+    assert cron.weekdays == {0, 1, 2, 3, 4}
+    # 0 和 7 都表示星期日，单个值带步长时表示从该值开始到上限
+    assert CronExpression("0 0 * * 0,7").weekdays == {6}
+    assert CronExpression("50/5 * * * *").minutes == {50, 55}
+
+    for expression in ("* * * *", "60 * * * *", "* 5-1 * * *", "* * 0 * *", "a * * * *"):
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    # 不含 after 本身，秒数被忽略
+    ("* * * * *", datetime(2024, 1, 1, 12, 0, 30), datetime(2024, 1, 1, 12, 1)),
+    ("30 9 * * *", datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 2, 9, 30)),
+    ("0 */6 * * *", datetime(2024, 1, 1, 13, 5), datetime(2024, 1, 1, 18, 0)),
+    # 跨年与闰年
+    ("0 0 1 1 *", datetime(2024, 6, 1), datetime(2025, 1, 1)),
+    ("0 12 29 2 *", datetime(2024, 3, 1), datetime(2028, 2, 29, 12, 0)),
+    # 2024-01-01 是星期一，工作日早上九点
+    ("0 9 * * 1-5", datetime(2024, 1, 5, 10, 0), datetime(2024, 1, 8, 9, 0)),
+    # 日和星期同时被限制时满足其一即可：1 号或星期日
+    ("0 0 1 * 0", datetime(2024, 1, 2), datetime(2024, 1, 7)),
+    ("0 0 1 * 0", datetime(2024, 1, 28, 1, 0), datetime(2024, 2, 1)),
+])
+def test_cron_next(expression, after, expected):
+    assert CronExpression(expression).next(after) == expected
+
+
+def test_cron_that_never_fires():
+    with pytest.raises(ValueError):
+        CronExpression("0 0 31 2 *").next(datetime(2024, 1, 1))
+
+
+def test_scheduler_next_run_and_plugin_context():
+    now = [1000.0]
+
+    async def main():
+        scheduler = Scheduler(timer=lambda: now[0])
+        runs = []
+
+        async def job(label):
+            runs.append((label, current_plugin.get()))
+
+        token = current_plugin.set("Weather")
+        every = scheduler.every(10, job, "every", name="every", delay=0)
+        current_plugin.reset(token)
+        once = scheduler.once(5, job, "once", name="once")
+        cron = scheduler.cron("*/5 * * * *", job, "cron", name="cron")
+        first = (every.next_run, once.next_run, cron.next_run)
+
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        # 时间推进后立即唤醒调度器，固定间隔的任务按计划时间推进
+        now[0] = 1006.0
+        scheduler._wakeup.set()
+        await asyncio.sleep(0.01)
+        after = (every.next_run, "once" in scheduler.jobs)
+        await scheduler.close()
+        return first, after, runs
+
+    first, after, runs = asyncio.run(main())
+    expected_cron = CronExpression("*/5 * * * *").next(datetime.fromtimestamp(1000.0)).timestamp()
+    assert first == (1000.0, 1005.0, expected_cron)
+    assert after == (1010.0, False)
+    # 任务在注册时的插件上下文中运行
+    assert runs == [("every", "Weather"), ("once", None)]
@@ -0,0 +1,162 @@
+import json
+import time
+import asyncio
+
+import pytest
+from aiohttp import web
+from botpy.robot import Robot, Token
+from botpy.connection import ConnectionSession
+
+from app.session import SessionStore
+from tests.utils import close_host, create_host
+
+
+def _session(session_id="", last_seq=0, shard_id=0, shard_count=1, intent=513):
+    return {
+        "session_id": session_id,
+        "last_seq": last_seq,
+        "intent": intent,
+        "token": None,
+        "url": "",
+        "shards": {"shard_id": shard_id, "shard_count": shard_count},
+    }
+
+
+def test_save_and_restore(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    store.save("app", [_session("S1", 42), _session("S2", 7, shard_id=1, shard_count=2)])
+    assert not (tmp_path / "session.json.tmp").exists()
+
+    restored = SessionStore(tmp_path / "session.json")
+    session = _session()
+    assert restored.restore("app", session)
+    assert (session["session_id"], session["last_seq"]) == ("S1", 42)
+
+
+def test_sessions_without_id_are_not_saved(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    store.save("app", [_session("", 3)])
+    assert json.loads((tmp_path / "session.json").read_text())["sessions"] == []
+    assert not SessionStore(tmp_path / "session.json").restore("app", _session())
+
+
+@pytest.mark.parametrize("appid, session", [
+    ("other", _session()),
+    ("app", _session(shard_count=2)),
+    ("app", _session(intent=2)),
+])
+def test_restore_rejects_mismatched_session(tmp_path, appid, session):
+    SessionStore(tmp_path / "session.json").save("app", [_session("S1", 42)])
+    assert not SessionStore(tmp_path / "session.json").restore(appid, session)
+    assert session["session_id"] == ""
+
+
+def test_restore_rejects_expired_session(tmp_path, monkeypatch):
+    SessionStore(tmp_path / "session.json").save("app", [_session("S1", 42)])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 301)
+    assert not SessionStore(tmp_path / "session.json", max_age=300).restore("app", _session())
+
+
+def test_restore_matches_intent_rewritten_by_identify(tmp_path):
+    # botpy 将为 0 的 intents 改为 1 后才保存到会话中
+    SessionStore(tmp_path / "session.json").save("app", [_session("S1", 42, intent=1)])
+    session = _session(intent=0)
+    assert SessionStore(tmp_path / "session.json").restore("app", session)
+
+
+def test_corrupt_file_and_clear(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text("{not json")
+    assert not SessionStore(path).restore("app", _session())
+    SessionStore(path).clear()
+    assert not path.exists()
+
+
+class FakeGateway:
+    """只实现 HELLO / IDENTIFY / RESUME 的网关，记录客户端发送的操作码"""
+
+    def __init__(self) -> None:
+        self.ops = []
+        self.sockets = set()
+        self.runner = None
+        self.url = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/ws", self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/ws"
+
+    async def close(self) -> None:
+        for ws in list(self.sockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        await ws.send_str(json.dumps({"op": 10, "s": 0, "d": {"heartbeat_interval": 45000}}))
+        async for msg in ws:
+            data = json.loads(msg.data)
+            self.ops.append(data["op"])
+            if data["op"] == 2:
+                await ws.send_str(json.dumps({"op": 0, "s": 1, "t": "READY", "d": {
+                    "version": 1, "session_id": "S1", "shard": [0, 1], "user": {"username": "bot", "id": "1"},
+                }}))
+            elif data["op"] == 6:
+                await ws.send_str(json.dumps({"op": 0, "s": data["d"]["seq"] + 1, "t": "RESUMED", "d": {}}))
+        self.sockets.discard(ws)
+        return ws
+
+
+async def _connect_once(gateway: FakeGateway) -> None:
+    host = create_host()
+    client = host.clients[0]
+    client._ready = asyncio.Event()
+    token = Token("test", "secret")
+    token.access_token = "token"
+    token.expires_in = time.time() + 1000
+    client._ws_ap = {
+        "url": gateway.url,
+        "shards": 1,
+        "session_start_limit": {"max_concurrency": 1, "remaining": 1},
+    }
+    client._connection = ConnectionSession(
+        max_async=1, connect=client.bot_connect, dispatch=client.ws_dispatch, loop=client.loop, api=client.api
+    )
+    client._connection.state.robot = Robot({"username": "bot", "id": "1"})
+    task = asyncio.create_task(client._pool_init(token, 1))
+    for _ in range(100):
+        if client._initialized and gateway.ops:
+            break
+        await asyncio.sleep(0.02)
+    await client.shutdown(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await close_host(host)
+
+
+def test_resume_against_fake_gateway(isolated_config):
+    async def main():
+        gateway = FakeGateway()
+        await gateway.start()
+        try:
+            await _connect_once(gateway)
+            first = list(gateway.ops)
+            gateway.ops.clear()
+            await _connect_once(gateway)
+            return first, list(gateway.ops)
+        finally:
+            await gateway.close()
+
+    first, second = asyncio.run(main())
+    assert 2 in first and 6 not in first
+    assert 6 in second and 2 not in second
+    saved = json.loads((isolated_config / "data" / "session.json").read_text())
+    assert saved["sessions"][0]["session_id"] == "S1"
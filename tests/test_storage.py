@@ -0,0 +1,109 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.storage import Storage
+
+
+def test_put_get_flush_and_reopen(tmp_path):
+    path = tmp_path / "storage.db"
+
+    async def write():
+        storage = Storage(path, flush_interval=0.01)
+        namespace = storage.namespace("Echo")
+        await namespace.put("user:1", {"count": 1})
+        await namespace.put("user:2", {"count": 2})
+        await namespace.put("other", 3)
+        await namespace.delete("user:2")
+        cached = await namespace.get("user:1")
+        await storage.flush()
+        scanned = await namespace.scan("user:")
+        stats = storage.stats()
+        await storage.close()
+        return cached, scanned, stats
+
+    async def read():
+        storage = Storage(path)
+        namespace = storage.namespace("Echo")
+        values = [await namespace.get("user:1"), await namespace.get("user:2", "missing"), await namespace.get("other")]
+        await storage.close()
+        return values
+
+    cached, scanned, stats = asyncio.run(write())
+    assert cached == {"count": 1}
+    assert scanned == [("user:1", {"count": 1})]
+    assert stats["pending"] == 0 and stats["written"] == 3
+    assert asyncio.run(read()) == [{"count": 1}, "missing", 3]
+
+
+def test_values_are_copied_on_put(tmp_path):
+    async def main():
+        storage = Storage(tmp_path / "storage.db")
+        value = {"items": (1, 2), 3: "int key"}
+        await storage.put("ns", "key", value)
+        value["items"] = "changed"
+        first = await storage.get("ns", "key")
+        first["mutated"] = True
+        second = await storage.get("ns", "key")
+        await storage.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    # 缓存命中与从数据库读取一样得到 JSON 反序列化后的值，之后修改对象不会影响保存的值
+    assert second == {"items": [1, 2], "3": "int key"}
+    assert "mutated" in first
+
+
+def test_non_serializable_value_is_rejected(tmp_path):
+    async def main():
+        storage = Storage(tmp_path / "storage.db")
+        with pytest.raises(TypeError):
+            await storage.put("ns", "key", {"value": object()})
+        await storage.put("ns", "ok", 1)
+        await asyncio.wait_for(storage.flush(), 1)
+        result = await storage.get("ns", "key", "missing"), await storage.scan("ns")
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == ("missing", [("ok", 1)])
+
+
+def test_commit_failure_is_retried(tmp_path, monkeypatch):
+    async def main():
+        storage = Storage(tmp_path / "storage.db", flush_interval=0.01)
+        original = Storage._commit
+        failures = []
+
+        def commit(self, conn):
+            if not failures:
+                failures.append(1)
+                raise RuntimeError("disk failure")
+            original(self, conn)
+
+        monkeypatch.setattr(Storage, "_commit", commit)
+        await storage.put("ns", "key", "value")
+        await asyncio.wait_for(storage.flush(), 1)
+        rows = await asyncio.wait_for(storage.scan("ns"), 1)
+        await storage.close()
+        return failures, rows
+
+    failures, rows = asyncio.run(main())
+    assert failures == [1]
+    assert rows == [("key", "value")]
+
+
+def test_writer_failure_fails_pending_requests(tmp_path):
+    async def main():
+        # 数据库路径是文件夹，写线程无法打开数据库
+        path = tmp_path / "storage.db"
+        path.mkdir()
+        storage = Storage(path)
+        with pytest.raises(sqlite3.Error):
+            await asyncio.wait_for(storage.get("ns", "key"), 1)
+        # 写线程会在下一次请求时重新启动
+        with pytest.raises(sqlite3.Error):
+            await asyncio.wait_for(storage.flush(), 1)
+        await storage.close()
+
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+import json
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from app.tracing import (
+    CLIENT, INTERNAL, NON_RECORDING_SPAN, SERVER, STATUS_ERROR,
+    FileExporter, OtlpExporter, Tracer, current_span
+)
+
+
+class MemoryExporter:
+    def __init__(self) -> None:
+        self.payloads = []
+
+    async def export(self, payload) -> None:
+        self.payloads.append(payload)
+
+    async def close(self) -> None:
+        pass
+
+
+async def _local_server(handler):
+    """在随机端口上启动只有一个接口的 http 服务，返回 (runner, url)"""
+    app = web.Application()
+    app.router.add_route("*", "/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+def test_span_parenting_across_tasks():
+    async def main():
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        async def child(name):
+            await asyncio.sleep(0)
+            with tracer.span(name) as span:
+                return span
+
+        with tracer.span("event", SERVER, root=True) as root:
+            tasks = [asyncio.create_task(child(f"child{i}")) for i in range(3)]
+            with tracer.span("inline") as inline:
+                grandchild = await asyncio.create_task(child("grandchild"))
+        children = await asyncio.gather(*tasks)
+        # 上下文在任务外恢复，之后的 Span 开始新的 trace
+        outside = tracer.start_span("outside")
+        await tracer.close()
+        return root, children, inline, grandchild, outside, current_span.get()
+
+    root, children, inline, grandchild, outside, after = asyncio.run(main())
+    assert root.parent_id is None
+    assert all(span.trace_id == root.trace_id and span.parent_id == root.span_id for span in children + [inline])
+    assert grandchild.trace_id == root.trace_id and grandchild.parent_id == inline.span_id
+    assert outside.trace_id != root.trace_id and outside.parent_id is None
+    assert after is None
+
+
+def test_sampling_follows_the_root():
+    async def main():
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter, sample_ratio=0.0)
+        disabled = Tracer(None)
+        with tracer.span("event", root=True) as root:
+            with tracer.span("child") as child:
+                pass
+        await tracer.close()
+        return root, child, disabled.start_span("event"), tracer.stats(), exporter
+
+    root, child, disabled, stats, exporter = asyncio.run(main())
+    assert root is child is disabled is NON_RECORDING_SPAN
+    assert stats["started"] == 0
+    assert exporter.payloads == []
+
+
+def test_file_exporter_payload_shape(tmp_path):
+    async def main():
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(FileExporter(path), service_name="test-bot", batch_size=2)
+        with tracer.span("event", SERVER, {"bot.name": "test", "bot.count": 3, "bot.ratio": 0.5, "bot.stop": True}, root=True):
+            try:
+                with tracer.span("handler"):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+        await tracer.close()
+        return path, tracer.stats()
+
+    path, stats = asyncio.run(main())
+    payload = json.loads(path.read_text().splitlines()[0])
+    resource_spans = payload["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "test-bot"}}]
+    assert resource_spans["scopeSpans"][0]["scope"] == {"name": "qq-botpy-template"}
+    handler, event = resource_spans["scopeSpans"][0]["spans"]
+
+    assert len(event["traceId"]) == 32 and len(event["spanId"]) == 16
+    assert "parentSpanId" not in event
+    assert event["kind"] == SERVER
+    assert int(event["endTimeUnixNano"]) >= int(event["startTimeUnixNano"])
+    assert event["attributes"] == [
+        {"key": "bot.name", "value": {"stringValue": "test"}},
+        {"key": "bot.count", "value": {"intValue": "3"}},
+        {"key": "bot.ratio", "value": {"doubleValue": 0.5}},
+        {"key": "bot.stop", "value": {"boolValue": True}},
+    ]
+
+    assert handler["kind"] == INTERNAL
+    assert handler["traceId"] == event["traceId"] and handler["parentSpanId"] == event["spanId"]
+    assert handler["status"] == {"code": STATUS_ERROR, "message": "boom"}
+    assert handler["events"][0]["name"] == "exception"
+    assert {"key": "exception.type", "value": {"stringValue": "ValueError"}} in handler["events"][0]["attributes"]
+    assert stats["exported"] == 2 and stats["pending"] == 0
+
+
+def test_traceparent_header_and_otlp_export():
+    received = {"headers": [], "payloads": []}
+
+    async def handler(request):
+        if request.method == "POST":
+            received["payloads"].append(await request.json())
+        else:
+            received["headers"].append(request.headers.get("traceparent"))
+        return web.json_response({})
+
+    async def main():
+        runner, url = await _local_server(handler)
+        tracer = Tracer(OtlpExporter(url))
+        async with aiohttp.ClientSession(trace_configs=[tracer.trace_config()]) as session:
+            with tracer.span("event", SERVER, root=True) as root:
+                async with session.get(url) as response:
+                    await response.read()
+            # 没有当前 Span 时也会开始新的 trace
+            async with session.get(url) as response:
+                await response.read()
+        await tracer.close()
+        await runner.cleanup()
+        return root
+
+    root = asyncio.run(main())
+    traced, untraced = received["headers"]
+    version, trace_id, span_id, flags = traced.split("-")
+    assert (version, trace_id, flags) == ("00", root.trace_id, "01")
+    assert untraced is not None and untraced.split("-")[1] != root.trace_id
+
+    spans = [span for payload in received["payloads"] for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    request = next(span for span in spans if span["spanId"] == span_id)
+    assert request["kind"] == CLIENT
+    assert request["parentSpanId"] == root.span_id
+    assert {"key": "http.response.status_code", "value": {"intValue": "200"}} in request["attributes"]
+    assert len(spans) == 3
+
+
+def test_root_span_ends_for_unhandled_events():
+    from tests.utils import close_host, create_host, message
+
+    async def main():
+        host = create_host()
+        client = host.clients[0]
+        tracer = client.tracer = Tracer(MemoryExporter())
+        await client.on_ready()
+        # botpy 没有对应方法的事件不会创建任务
+        client.ws_dispatch("unknown_event", object())
+        client.ws_dispatch("at_message_create", message("e1"))
+        await asyncio.gather(*client._inflight)
+        spans = {span.name: span for span in tracer._buffer}
+        await tracer.close()
+        await close_host(host)
+        return spans
+
+    spans = asyncio.run(main())
+    assert set(spans) == {"on_unknown_event", "on_at_message_create"}
+    assert spans["on_unknown_event"].attributes["bot.handled"] is False
+    assert all(span.end_ns is not None for span in spans.values())
@@ -0,0 +1,34 @@
+import types
+from typing import Dict, List, Optional
+
+import botpy
+
+
+def create_host(bots: Optional[List[Dict[str, str]]] = None):
+    """创建不连接网关的 BotHost，需要在事件循环中调用"""
+    from launcher import BotHost
+
+    host = BotHost(bots or [{"appid": "test", "token": "test"}], intents=botpy.Intents.none())
+    for client in host.clients:
+        client._connection = types.SimpleNamespace(state=types.SimpleNamespace(robot=types.SimpleNamespace(name=client.name)))
+    return host
+
+
+async def close_host(host) -> None:
+    await host.tracer.close()
+    await host.storage.close()
+    await host.pool.close()
+    await host.cache.close()
+    host.log_sink.close()
+
+
+def message(event_id: str, content: str = "hello", guild_id: str = "guild", author_id: str = "user") -> types.SimpleNamespace:
+    """构造带有去重、限流与频道筛选会读取的字段的消息事件"""
+    return types.SimpleNamespace(
+        event_id=event_id,
+        id=f"message-{event_id}",
+        author=types.SimpleNamespace(id=author_id),
+        channel_id="channel",
+        guild_id=guild_id,
+        content=content,
+    )